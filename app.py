@@ -11,6 +11,11 @@ Diese Datei ist der Haupteinstiegspunkt der Anwendung und enthält:
 """
 import os
 import sys
+
+# Mindestversion: datetime.fromisoformat muss ISO-Zeitstempel mit 'Z'-Suffix verstehen (ab 3.11)
+if sys.version_info < (3, 11):
+    raise SystemExit("HospitalFlow benötigt Python 3.11 oder neuer")
+
 import streamlit as st
 from datetime import datetime, timedelta, timezone
 import time
@@ -89,7 +94,7 @@ try:
         get_status_color, calculate_inventory_status, calculate_capacity_status,
         format_duration_minutes, get_department_color, get_system_status,
         get_metric_severity_for_load, get_metric_severity_for_count, get_metric_severity_for_free,
-        get_explanation_score_color
+        get_explanation_score_color, batch_now
     )
 except (ImportError, ModuleNotFoundError):
     utils_module = safe_import("utils")
@@ -107,6 +112,7 @@ except (ImportError, ModuleNotFoundError):
     get_metric_severity_for_count = getattr(utils_module, "get_metric_severity_for_count")
     get_metric_severity_for_free = getattr(utils_module, "get_metric_severity_for_free")
     get_explanation_score_color = getattr(utils_module, "get_explanation_score_color")
+    batch_now = getattr(utils_module, "batch_now")
 
 # Import ui.styling with fallback
 try:
@@ -594,12 +600,14 @@ def load_page_module(page_name: str):
 page_module = load_page_module(page)
 
 if page_module:
-    if page == "Dashboard":
-        page_module.render(db, sim, get_cached_alerts_wrapper, get_cached_recommendations_wrapper, get_cached_capacity_wrapper)
-    elif page == "Betrieb":
-        page_module.render(db, sim, get_cached_alerts_wrapper, get_cached_recommendations_wrapper, get_cached_capacity_wrapper)
-    elif page in ["Live-Metriken", "Vorhersagen", "Transport", "Inventar", "Gerätewartung", "Entlassungsplanung", "Kapazitätsübersicht", "Dienstplan"]:
-        page_module.render(db, sim)
+    # Eine gemeinsame "Jetzt"-Zeit für alle relativen Zeitangaben dieses Durchlaufs
+    with batch_now():
+        if page == "Dashboard":
+            page_module.render(db, sim, get_cached_alerts_wrapper, get_cached_recommendations_wrapper, get_cached_capacity_wrapper)
+        elif page == "Betrieb":
+            page_module.render(db, sim, get_cached_alerts_wrapper, get_cached_recommendations_wrapper, get_cached_capacity_wrapper)
+        elif page in ["Live-Metriken", "Vorhersagen", "Transport", "Inventar", "Gerätewartung", "Entlassungsplanung", "Kapazitätsübersicht", "Dienstplan"]:
+            page_module.render(db, sim)
 else:
     st.error(f"Seitenmodul für '{page}' konnte nicht geladen werden.")
 
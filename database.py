@@ -16,6 +16,14 @@ import os
 import time
 import queue
 import queue
+import itertools
+
+
+# Prozessweite Versionsnummern je Datenbankdatei und Datenart (Cache-Schlüssel für die UI).
+# Alle HospitalDB-Instanzen (eine pro Session) derselben Datei teilen sich diese Werte,
+# damit ein Schreibvorgang in einer Session die Caches aller Sessions ungültig macht.
+_REV_COUNTER = itertools.count(1)
+_REVISIONS = {}
 
 
 class HospitalDB:
@@ -35,6 +43,9 @@ class HospitalDB:
         self._migration_run = False  # Track if migration has been run
         self._thread_local = threading.local()  # Thread-local storage für Connection Reuse
         self._force_delete_mode = False  # Flag to force DELETE journal mode if WAL causes issues
+        self._rev_path = os.path.abspath(db_path)  # Schlüssel der prozessweiten Versionsnummern
+        for rev_kind in ('pending', 'transport'):
+            _REVISIONS.setdefault((self._rev_path, rev_kind), next(_REV_COUNTER))
         
         # Erstelle Verzeichnis falls nicht vorhanden
         try:
@@ -256,6 +267,20 @@ class HospitalDB:
         self._migrate_schema()
         self._migration_run = True
     
+    @property
+    def pending_rev(self) -> int:
+        """Version ausstehender Empfehlungen (prozessweit, ändert sich bei jeder Annahme/Ablehnung)"""
+        return _REVISIONS[(self._rev_path, 'pending')]
+    
+    @property
+    def transport_rev(self) -> int:
+        """Version der Transportanfragen (prozessweit, ändert sich bei jeder Änderung)"""
+        return _REVISIONS[(self._rev_path, 'transport')]
+    
+    def _bump_rev(self, rev_kind: str):
+        """Vergibt eine neue prozessweite Versionsnummer für 'pending' oder 'transport'"""
+        _REVISIONS[(self._rev_path, rev_kind)] = next(_REV_COUNTER)
+    
     @contextmanager
     def _lock_with_timeout(self, timeout: float = None):
         """
@@ -1144,8 +1169,13 @@ class HospitalDB:
     
     # ===== ALERTS =====
     
-    def get_active_alerts(self) -> List[Dict]:
-        """Gibt aktive Warnungen zurück"""
+    def get_active_alerts(self, since: Optional[datetime] = None) -> List[Dict]:
+        """
+        Gibt aktive Warnungen zurück.
+        
+        Args:
+            since: Optional - nur Warnungen ab diesem Zeitpunkt (Filter läuft in SQL)
+        """
         # Always run migration (idempotent - safe to call multiple times)
         # This ensures migration runs even if database object was created before migration code was added
         try:
@@ -1206,7 +1236,15 @@ class HospitalDB:
                 select_clause = ', '.join(select_parts)
                 
                 # Build WHERE clause - only filter by resolved_at if column exists
-                where_clause = "WHERE resolved_at IS NULL" if has_resolved_at else ""
+                conditions = ["resolved_at IS NULL"] if has_resolved_at else []
+                params = []
+                # Zeitfilter direkt auf der Spalte, damit idx_alerts_timestamp genutzt wird
+                # (Warnungen werden als UTC-isoformat()-Strings gespeichert, daher String-Vergleich)
+                since_condition = "timestamp >= ?"
+                if since is not None:
+                    conditions.append(since_condition)
+                    params.append(since.isoformat())
+                where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
                 
                 query = f"""
                     SELECT {select_clause}
@@ -1216,19 +1254,21 @@ class HospitalDB:
                 """
                 
                 try:
-                    cursor.execute(query)
+                    cursor.execute(query, params)
                     rows = cursor.fetchall()
                 except Exception as query_error:
                     # If query failed, try a simpler query without resolved_at filter
                     if has_resolved_at:
                         # Try again without resolved_at filter - maybe column was added but not committed properly
+                        simple_where = f"WHERE {since_condition}" if since is not None else ""
                         simple_query = f"""
                             SELECT {select_clause}
                             FROM alerts
+                            {simple_where}
                             ORDER BY timestamp DESC
                         """
                         try:
-                            cursor.execute(simple_query)
+                            cursor.execute(simple_query, params)
                             rows = cursor.fetchall()
                         except Exception as fallback_error:
                             raise query_error  # Raise original error
@@ -1672,6 +1712,7 @@ class HospitalDB:
                     VALUES (?, 'recommendation_accepted', 'System', 'system', 'recommendation', ?, ?)
                 """, (datetime.now(timezone.utc).isoformat(), rec_id, f"Empfehlung {rec_id} akzeptiert: {action_text}"))
                 conn.commit()
+                self._bump_rev('pending')
                 
                 return cursor.rowcount > 0
             finally:
@@ -1698,6 +1739,7 @@ class HospitalDB:
                     VALUES (?, 'recommendation_rejected', 'System', 'system', 'recommendation', ?, ?)
                 """, (datetime.now(timezone.utc).isoformat(), rec_id, f"Empfehlung {rec_id} abgelehnt: {action_text}"))
                 conn.commit()
+                self._bump_rev('pending')
                 
                 return cursor.rowcount > 0
             finally:
@@ -1959,6 +2001,13 @@ class HospitalDB:
             finally:
                 conn.close()
     
+    # Spalten, die über update_transport_status(_batch) gesetzt werden dürfen
+    _TRANSPORT_UPDATE_COLUMNS = frozenset({
+        'status', 'start_time', 'expected_completion_time', 'planned_start_time',
+        'actual_time_minutes', 'delay_minutes', 'requested_time_start', 'requested_time_end',
+        'estimated_time_minutes',
+    })
+    
     def update_transport_status(self, transport_id: int, **kwargs) -> bool:
         """Aktualisiert Transport-Status"""
         with self.lock:
@@ -1968,9 +2017,7 @@ class HospitalDB:
                 updates = []
                 values = []
                 for key, value in kwargs.items():
-                    if key in ['status', 'start_time', 'expected_completion_time', 'planned_start_time', 
-                              'actual_time_minutes', 'delay_minutes', 'requested_time_start', 'requested_time_end',
-                              'estimated_time_minutes']:
+                    if key in self._TRANSPORT_UPDATE_COLUMNS:
                         updates.append(f"{key} = ?")
                         values.append(value)
                 
@@ -1981,10 +2028,45 @@ class HospitalDB:
                 query = f"UPDATE transport_requests SET {', '.join(updates)} WHERE id = ?"
                 cursor.execute(query, values)
                 conn.commit()
+                self._bump_rev('transport')
                 return cursor.rowcount > 0
             finally:
                 conn.close()
     
+    def update_transport_status_batch(self, updates: List[Dict]) -> List[int]:
+        """
+        Aktualisiert mehrere Transporte in einer Transaktion (effizienter als einzelne Aufrufe).
+        
+        Args:
+            updates: Liste von Dicts mit 'id' und den zu setzenden Spalten (wie update_transport_status)
+        
+        Returns:
+            List[int]: IDs der tatsächlich aktualisierten Transporte
+        """
+        if not updates:
+            return []
+        
+        with self.lock:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            try:
+                updated_ids = []
+                for update in updates:
+                    columns = [key for key in update if key in self._TRANSPORT_UPDATE_COLUMNS]
+                    if not columns:
+                        continue
+                    query = f"UPDATE transport_requests SET {', '.join(f'{key} = ?' for key in columns)} WHERE id = ?"
+                    cursor.execute(query, [update[key] for key in columns] + [update['id']])
+                    if cursor.rowcount > 0:
+                        updated_ids.append(update['id'])
+                # Ein Commit für alle Updates
+                conn.commit()
+                if updated_ids:
+                    self._bump_rev('transport')
+                return updated_ids
+            finally:
+                conn.close()
+    
     def delete_transport_request(self, transport_id: int) -> bool:
         """Löscht eine Transportanfrage"""
         with self.lock:
@@ -1993,6 +2075,7 @@ class HospitalDB:
             try:
                 cursor.execute("DELETE FROM transport_requests WHERE id = ?", (transport_id,))
                 conn.commit()
+                self._bump_rev('transport')
                 return cursor.rowcount > 0
             except Exception as e:
                 # Log error but don't raise - return False instead
@@ -2011,6 +2094,7 @@ class HospitalDB:
             try:
                 cursor.execute("DELETE FROM transport_requests WHERE status IN ('pending', 'ausstehend')")
                 conn.commit()
+                self._bump_rev('transport')
                 return True
             except Exception as e:
                 # Log error but don't raise - return False instead
@@ -2133,6 +2217,7 @@ class HospitalDB:
                     kwargs.get('estimated_time_minutes', 15)
                 ))
                 conn.commit()
+                self._bump_rev('transport')
                 return {'success': True, 'transport_id': cursor.lastrowid}
             finally:
                 conn.close()
@@ -2714,6 +2799,7 @@ class HospitalDB:
                     pass
                 
                 conn.commit()
+                self._bump_rev('transport')
                 return {'success': True, 'order_id': order_id}
             finally:
                 conn.close()
@@ -2748,6 +2834,37 @@ class HospitalDB:
             finally:
                 conn.close()
     
+    def update_inventory_order_status_batch(self, order_ids: List[int], status: str) -> bool:
+        """
+        Setzt den Status mehrerer Inventar-Bestellungen mit einem einzigen UPDATE.
+        
+        Args:
+            order_ids: IDs der Bestellungen
+            status: Neuer Status ('ordered', 'in_transit', 'delivered')
+        
+        Returns:
+            bool: True wenn mindestens eine Bestellung aktualisiert wurde, False sonst
+        """
+        if not order_ids:
+            return False
+        
+        with self.lock:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            try:
+                placeholders = ', '.join('?' * len(order_ids))
+                cursor.execute(f"UPDATE inventory_orders SET status = ? WHERE id IN ({placeholders})",
+                               [status, *order_ids])
+                conn.commit()
+                return cursor.rowcount > 0
+            except Exception as e:
+                import traceback
+                print(f"Error updating inventory order status: {e}")
+                traceback.print_exc()
+                return False
+            finally:
+                conn.close()
+    
     # ===== DEVICES =====
     
     def get_device_maintenance_urgencies(self) -> List[Dict]:
@@ -4050,6 +4167,7 @@ class HospitalDB:
                         rec.get('explanation_score', 'medium')
                     ))
                 conn.commit()
+                self._bump_rev('pending')
             finally:
                 conn.close()
     
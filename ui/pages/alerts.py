@@ -13,7 +13,7 @@ from utils import (
     get_status_color, calculate_inventory_status, calculate_capacity_status,
     format_duration_minutes, get_department_color, get_system_status,
     get_metric_severity_for_load, get_metric_severity_for_count, get_metric_severity_for_free,
-    get_explanation_score_color
+    get_explanation_score_color, get_department_name_mapping
 )
 from ui.components import render_badge, render_empty_state
 
@@ -32,7 +32,6 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
     if alerts:
 
         # German translation for severity and departments
-        from utils import get_department_name_mapping
         severity_de_map = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
         severity_en_map = {v: k for k, v in severity_de_map.items()}
         dept_map = get_department_name_mapping()
@@ -50,7 +49,7 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
             'N/A': 'Bereich',
         })
         # Build mapping for all unique departments
-        unique_depts = sorted(list(set([a.get('department', 'N/A') for a in alerts if a.get('department')])))
+        unique_depts = sorted({a['department'] for a in alerts if a.get('department')})
         areas_de = [dept_map.get(d, d) for d in unique_depts]
         area_map = dict(zip(areas_de, unique_depts))
         areas_de_display = ["Alle"] + areas_de
@@ -12,7 +12,7 @@ from utils import (
     get_status_color, calculate_inventory_status, calculate_capacity_status,
     format_duration_minutes, get_department_color, get_system_status,
     get_metric_severity_for_load, get_metric_severity_for_count, get_metric_severity_for_free,
-    get_explanation_score_color
+    get_explanation_score_color, get_department_name_mapping
 )
 from ui.components import render_badge, render_empty_state, render_loading_spinner
 
@@ -175,7 +175,6 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
         with departments_placeholder.container():
             # Department capacity cards
             # Mapping for department names (English to German) - verwende zentrales Mapping
-            from utils import get_department_name_mapping
             department_map = get_department_name_mapping()
             department_map.update({
                 'General Ward': 'Allgemeinstation',
@@ -256,7 +255,6 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
 
             with col1:
                 # Mapping for department names (English to German)
-                from utils import get_department_name_mapping
                 department_map = get_department_name_mapping()
                 department_map.update({
                     'General Ward': 'Allgemeinstation',
@@ -21,7 +21,8 @@ from utils import (
     get_status_color, calculate_inventory_status, calculate_capacity_status,
     format_duration_minutes, get_department_color, get_system_status,
     get_metric_severity_for_load, get_metric_severity_for_count, get_metric_severity_for_free,
-    get_explanation_score_color
+    get_explanation_score_color, get_department_name_mapping, aggregate_to_30_seconds,
+    round_timestamp_to_seconds
 )
 from ui.components import render_badge, render_empty_state, render_loading_spinner
 
@@ -294,13 +295,12 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
             
             # In DataFrames konvertieren
             df_waiting = pd.DataFrame(waiting_history)
-            df_waiting['timestamp'] = pd.to_datetime(df_waiting['timestamp']).dt.floor('S')
+            df_waiting['timestamp'] = round_timestamp_to_seconds(df_waiting['timestamp'])
             # Aggregiere auf 30-Sekunden-Intervalle
-            from utils import aggregate_to_30_seconds
             df_waiting = aggregate_to_30_seconds(df_waiting, timestamp_col='timestamp', value_col='value', agg_func='mean')
             
             df_ed = pd.DataFrame(ed_history)
-            df_ed['timestamp'] = pd.to_datetime(df_ed['timestamp']).dt.floor('S')
+            df_ed['timestamp'] = round_timestamp_to_seconds(df_ed['timestamp'])
             # Aggregiere auf 30-Sekunden-Intervalle
             df_ed = aggregate_to_30_seconds(df_ed, timestamp_col='timestamp', value_col='value', agg_func='mean')
             
@@ -417,7 +417,6 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
                     pred_minutes = bottleneck['time_horizon_minutes']
                     dept = bottleneck.get('department', 'N/A')
                     # German translation for department names - verwende zentrales Mapping
-                    from utils import get_department_name_mapping
                     dept_map = get_department_name_mapping()
                     dept_de = dept_map.get(dept, dept)
                     # German time string
@@ -471,7 +470,6 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
                     badge_html = f"{badge_html} {acknowledged_badge}"
                 
                 # Übersetze Department-Namen
-                from utils import get_department_name_mapping
                 dept_map = get_department_name_mapping()
                 dept_de = dept_map.get(alert.get('department', 'N/A'), alert.get('department', 'N/A'))
                 
@@ -506,7 +504,6 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
                 badge_html = render_badge(priority_de.upper(), rec['priority'])
                 
                 # Übersetze Department-Namen
-                from utils import get_department_name_mapping
                 dept_map = get_department_name_mapping()
                 dept_de = dept_map.get(rec.get('department', 'N/A'), rec.get('department', 'N/A'))
                 
@@ -85,6 +85,7 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
         
         # Berechne Verbrauchsraten und Nachfüllvorschläge für alle Artikel
         restock_suggestions = []
+        today = datetime.now().date()  # Einmal für alle Bestelltermine
         for item in inventory:
             # Berechne Verbrauchsrate basierend auf Historie und Aktivität
             consumption_rate_data = db.calculate_inventory_consumption_rate(
@@ -106,7 +107,8 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
             reorder_suggestion = calculate_reorder_suggestion(
                 item=item,
                 daily_consumption_rate=daily_consumption_rate,
-                days_until_stockout=days_until_stockout
+                days_until_stockout=days_until_stockout,
+                now_date=today
             )
             
             # Zeige Artikel an, wenn:
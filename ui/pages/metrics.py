@@ -112,6 +112,17 @@ def filter_dataframe(df: pd.DataFrame, search_text: str = "", departments: list
     return filtered
 
 
+def map_by_category_codes(series: pd.Series, mapping: dict, na_value: str = '') -> pd.Series:
+    """Übersetzt Werte über Kategorie-Codes und Lookup-Array statt Lambda pro Zeile"""
+    categorical = series.astype('category')
+    # Letzter Eintrag fängt fehlende Werte ab (Code -1)
+    lookup = np.array(
+        [mapping.get(c, c) for c in categorical.cat.categories] + [na_value],
+        dtype=object
+    )
+    return pd.Series(lookup[categorical.cat.codes.to_numpy()], index=series.index)
+
+
 def export_to_csv(df: pd.DataFrame, filename_prefix: str = "export") -> bytes:
     """Exportiere DataFrame zu CSV"""
     output = io.StringIO()
@@ -751,7 +762,7 @@ def render_devices_section(df: pd.DataFrame, search_text: str, selected_departme
     
     # Fix: Use column access with fallback to Series instead of .get() which returns scalar
     urgency_series = display_df['urgency_level'] if 'urgency_level' in display_df.columns else pd.Series([''] * len(display_df), index=display_df.index)
-    display_df['Dringlichkeit'] = urgency_series.map(lambda x: SEVERITY_MAP.get(x, x) if pd.notna(x) else '')
+    display_df['Dringlichkeit'] = map_by_category_codes(urgency_series, SEVERITY_MAP)
     
     # Fix: Use column access with fallback to Series instead of .get() which returns scalar
     maintenance_series = display_df['next_maintenance_due'] if 'next_maintenance_due' in display_df.columns else pd.Series([pd.NaT] * len(display_df), index=display_df.index)
@@ -767,7 +778,7 @@ def render_devices_section(df: pd.DataFrame, search_text: str, selected_departme
     
     # Fix: Use column access with fallback to Series instead of .get() which returns scalar
     dept_series = display_df['department'] if 'department' in display_df.columns else pd.Series([''] * len(display_df), index=display_df.index)
-    display_df['Abteilung'] = dept_series.map(lambda x: DEPT_MAP.get(x, x) if pd.notna(x) else '')
+    display_df['Abteilung'] = map_by_category_codes(dept_series, DEPT_MAP)
     
     table_cols = ['Gerät', 'Geräte-ID', 'Dringlichkeit', 'Nächste Wartung', 'Abteilung']
     st.dataframe(display_df[table_cols], use_container_width=True, hide_index=True)
@@ -833,9 +844,10 @@ def render_capacity_section(df: pd.DataFrame, search_text: str, selected_departm
     # Export
     col1, col2 = st.columns([1, 4])
     with col1:
-        export_cols = ['department', 'occupied_beds', 'available_beds', 'total_beds', 'utilization_rate']
-        available_cols = [col for col in export_cols if col in filtered_df.columns]
-        csv_data = export_to_csv(filtered_df[available_cols], "capacity")
+        export_cols = pd.Index(['department', 'occupied_beds', 'available_beds', 'total_beds', 'utilization_rate'])
+        # Index-Schnittmenge statt Python-Schleife; Reihenfolge von export_cols bleibt erhalten
+        available_cols = export_cols.intersection(filtered_df.columns, sort=False)
+        csv_data = export_to_csv(filtered_df.loc[:, available_cols], "capacity")
         st.download_button(
             "📥 CSV Export",
             csv_data,
@@ -2,8 +2,10 @@
 Seitenmodul für Betrieb
 """
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 from datetime import datetime, timedelta, timezone
 import pandas as pd
+import re
 import time
 from utils import (
     format_time_ago, get_severity_color, get_priority_color, get_risk_color,
@@ -14,15 +16,404 @@ from utils import (
 )
 from ui.components import render_badge, render_empty_state, render_loading_spinner
 
+# Deutsche Übersetzungen - einmal beim Import aufgebaut statt bei jedem Rendern
+DEPT_MAP = get_department_name_mapping()
+# Warnungen: 'N/A' wird im Filter als allgemeiner Bereich angezeigt
+ALERT_DEPT_MAP = {**DEPT_MAP, 'N/A': 'Bereich'}
+# Erkennung von Abteilungen in Audit-Details: ein vorkompiliertes Muster statt Substring-Schleife
+# (längere Schlüssel zuerst, damit z.B. "General Ward" vor "General" greift)
+_DEPT_RE = re.compile("|".join(map(re.escape, sorted(DEPT_MAP, key=len, reverse=True))))
 
-@st.cache_data(ttl=60)
+SEVERITY_DE_MAP = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
+SEVERITY_EN_MAP = {v: k for k, v in SEVERITY_DE_MAP.items()}
+
+HOURS_MAP = {"Letzte 1 Stunde": 1, "Letzte 6 Stunden": 6, "Letzte 24 Stunden": 24}
+
+# Anzahl der Spalten im Raster der Bestätigen-Buttons
+ACK_BUTTON_COLUMNS = 3
+
+# Anzahl der Karten, die pro Seite (bzw. pro "Mehr anzeigen") gerendert werden
+OPS_PAGE_SIZE = 20
+
+REC_TYPE_MAP = {
+    'capacity': 'Kapazität',
+    'staffing': 'Personal',
+    'inventory': 'Inventar',
+    'general': 'Allgemein',
+}
+
+ROLE_MAP = {
+    'system': 'System',
+    'nurse': 'Pflegekraft',
+    'doctor': 'Arzt/Ärztin',
+    'admin': 'Leitung',
+    'manager': 'Manager',
+    'staff': 'Personal',
+    'user': 'Benutzer',
+}
+
+# Filter-Dropdown arbeitet mit den Rohwerten aus dem Audit-Log
+ACTION_FILTER_MAP = {
+    'alert_acknowledged': 'Warnung bestätigt',
+    'recommendation_accepted': 'Empfehlung angenommen',
+    'recommendation_rejected': 'Empfehlung abgelehnt',
+}
+
+# Tabelle arbeitet mit normalisierten Werten (lowercase, Leerzeichen statt Unterstrich)
+ACTION_MAP = {
+    'alert acknowledged': 'Warnung bestätigt',
+    'alert_acknowledged': 'Warnung bestätigt',
+    'acknowledge alert': 'Warnung bestätigt',
+    'acknowledge_alert': 'Warnung bestätigt',
+    'recommendation accepted': 'Empfehlung angenommen',
+    'recommendation_accepted': 'Empfehlung angenommen',
+    'accept recommendation': 'Empfehlung angenommen',
+    'accept_recommendation': 'Empfehlung angenommen',
+    'recommendation rejected': 'Empfehlung abgelehnt',
+    'recommendation_rejected': 'Empfehlung abgelehnt',
+    'reject recommendation': 'Empfehlung abgelehnt',
+    'reject_recommendation': 'Empfehlung abgelehnt',
+    'update': 'Aktualisiert',
+    'create': 'Erstellt',
+    'delete': 'Gelöscht',
+    'view': 'Angesehen',
+    'modify': 'Geändert',
+}
+
+ENTITY_MAP = {
+    'alert': 'Warnung',
+    'recommendation': 'Empfehlung',
+    'capacity': 'Kapazität',
+    'transport': 'Transport',
+    'inventory': 'Inventar',
+    'device': 'Gerät',
+    'patient': 'Patient',
+}
+
+# HTML-Templates für Karten - einmal beim Import definiert, pro Karte nur noch str.format
+_ALERT_CARD_TMPL = """<div class="{delay_class}" style="background: {background_color}; padding: 1rem; border-radius: 8px; margin-bottom: 0.75rem; border-left: 4px solid {border_color}; box-shadow: 0 1px 2px rgba(0,0,0,0.05);">
+    <div style="display: flex; align-items: center; gap: 0.75rem; margin-bottom: 0.5rem;">
+        {badge_html}
+        <span style="font-size: 0.75rem; color: #6b7280; font-weight: 500;">{dept_de}</span>
+        <span style="font-size: 0.75rem; color: #9ca3af;">•</span>
+        <span style="font-size: 0.75rem; color: #6b7280;">{time_ago}</span>
+    </div>
+    <div style="font-weight: 600; color: #1f2937; font-size: 0.95rem;">
+        {message}
+    </div>
+</div>"""
+
+_REC_CARD_TMPL = """
+<div class="{delay_class}" style="background: white; padding: 1.5rem; border-radius: 8px; margin-bottom: 1rem; border-left: 4px solid {priority_color}; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
+    <div style="margin-bottom: 1rem;">
+        <h4 style="margin: 0 0 0.5rem 0; color: #1f2937;">{title}</h4>
+        <div style="margin-bottom: 0.75rem;">{badge_html}</div>
+    </div>
+    <div style="background: #f9fafb; padding: 1rem; border-radius: 6px; margin-bottom: 0.75rem;">
+        <div style="margin-bottom: 0.75rem;">
+            <strong style="color: #1f2937; font-size: 0.875rem;">Maßnahme:</strong>
+            <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{action}</p>
+        </div>
+        <div style="margin-bottom: 0.75rem;">
+            <strong style="color: #1f2937; font-size: 0.875rem;">Begründung:</strong>
+            <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{reason}</p>
+        </div>
+        <div style="margin-bottom: 0.75rem;">
+            <strong style="color: #1f2937; font-size: 0.875rem;">Erwartete Auswirkung:</strong>
+            <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{expected_impact}</p>
+        </div>
+        <div>
+            <strong style="color: #1f2937; font-size: 0.875rem;">Sicherheits-Hinweis:</strong>
+            <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{safety_note}</p>
+        </div>
+    </div>
+    <div style="display: flex; gap: 0.5rem; flex-wrap: wrap;">
+        {impact_tags_html}
+    </div>
+</div>
+"""
+
+# Altes Format ohne action/reason
+_REC_CARD_LEGACY_TMPL = """
+<div class="{delay_class}" style="background: white; padding: 1.5rem; border-radius: 8px; margin-bottom: 1rem; border-left: 4px solid {priority_color}; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
+    <div style="display: flex; align-items: start; gap: 0.75rem; margin-bottom: 1rem;">
+        {badge_html}
+        <div style="flex: 1;">
+            <h4 style="margin: 0 0 0.5rem 0; color: #1f2937;">{title}</h4>
+            <p style="color: #6b7280; margin: 0; line-height: 1.6;">{description}</p>
+        </div>
+    </div>
+    <div style="display: flex; gap: 0.5rem; flex-wrap: wrap; margin-bottom: 1rem;">
+        {impact_tags_html}
+    </div>
+</div>
+"""
+
+_IMPACT_TAG_TMPL = '<span class="badge" style="background: #e5e7eb; color: #4b5563;">{}</span>'
+
+
+@st.cache_resource(ttl=60)
 def _get_audit_log_cached(_db, limit):
-    """Gecachter Audit-Log"""
-    return _db.get_audit_log(limit)
+    """Gecachter Audit-Log (nur lesen)"""
+    # cache_resource spart das Hashen/Serialisieren der Ausgabe, liefert aber allen Sessions
+    # dieselben Objekte: die Einträge dürfen nicht verändert werden (Read-only-Vertrag).
+    # Das Tupel verhindert nur Änderungen an der Liste selbst, nicht an den Dicts.
+    return tuple(_db.get_audit_log(limit))
+
+
+@st.cache_data(ttl=30)
+def _get_active_alerts_since_cached(_db, since):
+    """Gecachte aktive Warnungen ab einem Zeitpunkt (Zeitfilter in SQL)"""
+    return _db.get_active_alerts(since=since)
+
+
+def _cutoff_time(hours):
+    """Startzeitpunkt des Zeitraum-Filters, auf die Minute abgerundet (stabiler Cache-Schlüssel)"""
+    return datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(hours=hours)
+
+
+def _alert_area_options(alerts):
+    """Bereich-Optionen für den Warnungsfilter (Anzeige-Liste, Anzeige→Code-Mapping)"""
+    # Direkt berechnen: ein st.cache_data-Treffer kostet mehr als dieser eine Durchlauf
+    unique_depts = sorted({d for a in alerts if (d := a.get('department'))})
+    areas_de = [ALERT_DEPT_MAP.get(d, d) for d in unique_depts]
+    return ["Alle"] + areas_de, dict(zip(areas_de, unique_depts))
+
+
+def _audit_filter_options(audit_log):
+    """Rollen-, Aktions- und Bereich-Optionen aus dem Audit-Log"""
+    # Eindeutige Rollen, Aktionen und Bereiche in einem Durchlauf sammeln
+    roles, actions, entities = set(), set(), set()
+    for entry in audit_log:
+        roles.add(entry.get('user_role'))
+        actions.add(entry.get('action_type'))
+        entities.add(entry.get('entity_type'))
+    # Leere Werte (None, '') verwerfen
+    unique_roles = sorted(filter(None, roles))
+    unique_actions = sorted(filter(None, actions))
+    unique_entities = sorted(filter(None, entities))
+    
+    roles_de = [ROLE_MAP.get(r, r.title()) for r in unique_roles]
+    actions_de = [ACTION_FILTER_MAP.get(act, act.replace('_', ' ').title()) for act in unique_actions]
+    entities_de = [ENTITY_MAP.get(ent, ent.title()) for ent in unique_entities]
+    return (
+        (["Alle"] + roles_de, dict(zip(roles_de, unique_roles))),
+        (["Alle"] + actions_de, dict(zip(actions_de, unique_actions))),
+        (["Alle"] + entities_de, dict(zip(entities_de, unique_entities))),
+    )
+
+
+def _render_alert_card(alert, i):
+    """Erzeugt das HTML für eine Warnungskarte"""
+    # Prüfe ob Warnung bestätigt wurde
+    is_acknowledged = alert.get('acknowledged', 0) == 1
+    
+    # Wenn bestätigt, verwende blaue Farbe, sonst normale Severity-Farbe
+    if is_acknowledged:
+        border_color = "#3B82F6"  # Blau (blue-500)
+        background_color = "#EFF6FF"  # Sehr helles Blau für Hintergrund
+    else:
+        border_color = get_severity_color(alert['severity'])
+        background_color = "white"
+    
+    # Schweregrad ins Deutsche übersetzen für Anzeige
+    severity_de = SEVERITY_DE_MAP.get(alert['severity'], alert['severity'])
+    badge_html = render_badge(severity_de.upper(), alert['severity'])
+    
+    # Bestätigt-Badge hinzufügen wenn bestätigt
+    if is_acknowledged:
+        acknowledged_badge = '<span class="badge" style="background: #3B82F6; color: white;">✓ BESTÄTIGT</span>'  # Blau
+        badge_html = f"{badge_html} {acknowledged_badge}"
+    
+    # Abteilung für Anzeige übersetzen
+    dept_de = ALERT_DEPT_MAP.get(alert.get('department', 'N/A'), alert.get('department', 'N/A'))
+    delay_class = "fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3"
+    return _ALERT_CARD_TMPL.format(
+        delay_class=delay_class,
+        background_color=background_color,
+        border_color=border_color,
+        badge_html=badge_html,
+        dept_de=dept_de,
+        time_ago=format_time_ago(alert['timestamp']),
+        message=alert['message'],
+    )
+
+
+def _lazy_tabs(labels, key):
+    """Erzeugt Tabs, bei denen nur der ausgewählte Tab ausgeführt wird (sofern Streamlit das unterstützt)"""
+    try:
+        return st.tabs(labels, key=key, on_change="rerun")
+    except TypeError:
+        # Ältere Streamlit-Versionen kennen kein on_change für Tabs: alle Tabs rendern
+        return st.tabs(labels)
+
+
+def _tab_open(tab):
+    """Prüft, ob ein Tab aktuell ausgewählt ist (ohne Zustandsverfolgung gilt jeder Tab als offen)"""
+    return getattr(tab, 'open', None) is not False
+
+
+def _acknowledge_alert(db, alert_id):
+    """Bestätigt eine Warnung und rendert nur den Warnungen-Tab neu"""
+    db.acknowledge_alert(alert_id)
+    # Nur die betroffenen Caches invalidieren (kein globales st.cache_data.clear())
+    _get_active_alerts_since_cached.clear()
+    _get_audit_log_cached.clear()
+    bg_data = st.session_state.get('background_data')
+    if bg_data:
+        # Bestätigte Warnung direkt in den Background-Daten markieren statt neu zu laden
+        for bg_alert in bg_data.get('alerts', []):
+            if bg_alert.get('id') == alert_id:
+                bg_alert['acknowledged'] = 1
+        bg_data['audit_log'] = db.get_audit_log(100)
+    _rerun_fragment()
+
+
+def _render_show_more(state_key, total, shown):
+    """Rendert einen "Mehr anzeigen"-Button, solange nicht alle Einträge sichtbar sind"""
+    remaining = total - shown
+    if remaining <= 0:
+        return
+    if st.button(f"Mehr anzeigen ({remaining} weitere)", key=f"{state_key}_more", use_container_width=True):
+        st.session_state[state_key] = shown + OPS_PAGE_SIZE
+        _rerun_fragment()
+
+
+def _rerun_fragment():
+    """Rerunnt nur das aktuelle Fragment (Fallback: ganze Seite, wenn kein Fragment-Rerun läuft)"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
 
 def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get_cached_capacity=None):
     """Rendert die Betrieb-Seite"""
-    # Feedback-Nachrichten nach Rerun anzeigen
+    # ===== SOFORT: STRUKTUR RENDERN =====
+    # Operations page with tabs - sofort anzeigen
+    tab1, tab2, tab3 = _lazy_tabs(["🚨 Warnungen", "💡 Empfehlungen", "📝 Protokoll"], key="ops_tabs")
+    
+    # Jeder Tab ist ein Fragment: Filter- und Widget-Interaktionen rerunnen nur den jeweiligen Tab.
+    # Nicht ausgewählte Tabs werden gar nicht erst gerendert.
+    if _tab_open(tab1):
+        with tab1:
+            _alerts_fragment(db, get_cached_alerts)
+    if _tab_open(tab2):
+        with tab2:
+            _recommendations_fragment(db, sim, get_cached_recommendations)
+    if _tab_open(tab3):
+        with tab3:
+            _audit_fragment(db)
+
+
+@st.fragment
+def _alerts_fragment(db, get_cached_alerts=None):
+    """Rendert den Warnungen-Tab"""
+    st.markdown("### Warnungen")
+    spinner_tab1 = st.empty()
+    with spinner_tab1.container():
+        st.markdown(render_loading_spinner("Lade Warnungen..."), unsafe_allow_html=True)
+    st.markdown("")  # Spacing
+    
+    # Filterzeile
+    col1, col2, col3 = st.columns([2, 2, 2])
+    
+    with col1:
+        # Bereich Dropdown mit deutschen Übersetzungen
+        # Verwende Background-Daten oder get_cached_alerts() für sofortigen Zugriff
+        bg_data = st.session_state.get('background_data') or {}
+        all_alerts = bg_data.get('alerts') or (get_cached_alerts() if get_cached_alerts else db.get_active_alerts())
+        # Dropdown-Optionen aus den Abteilungen ableiten
+        areas_de_display, area_map = _alert_area_options(all_alerts)
+        selected_area_de = st.selectbox("Bereich", areas_de_display, key="ops_alert_area")
+        selected_area = None if selected_area_de == "Alle" else area_map[selected_area_de]
+    
+    with col2:
+        # Severity chips
+        severity_options = ["Alle", "hoch", "mittel", "niedrig"]
+        selected_severities = st.multiselect(
+            "Schweregrad",
+            severity_options,
+            default=["hoch", "mittel"],
+            key="ops_alert_severity"
+        )
+        if not selected_severities:
+            selected_severities = severity_options
+    
+    with col3:
+        # Zeitspanne
+        time_range = st.selectbox(
+            "Zeitraum",
+            list(HOURS_MAP),
+            index=2,
+            key="ops_alert_time"
+        )
+        hours = HOURS_MAP[time_range]
+    
+    # Bei geänderten Filtern wieder mit der ersten Seite beginnen
+    alert_fkey = (selected_area, tuple(selected_severities), time_range)
+    if st.session_state.get('ops_alerts_fkey') != alert_fkey:
+        st.session_state['ops_alerts_fkey'] = alert_fkey
+        st.session_state['ops_alerts_shown'] = OPS_PAGE_SIZE
+    
+    st.markdown("")  # Spacing
+    
+    # Leere Platzhalter für progressive Anzeige
+    alerts_content_placeholder = st.empty()
+    
+    # Zeitraum-Filterung direkt in SQL (nur nicht aufgelöste Warnungen ab cutoff_time)
+    cutoff_time = _cutoff_time(hours)
+    alerts = _get_active_alerts_since_cached(db, cutoff_time)
+    
+    # Deutsche Filterwerte in englische umwandeln für Vergleich mit Alert-Werten
+    sev_set = None if "Alle" in selected_severities else {SEVERITY_EN_MAP.get(sev, sev) for sev in selected_severities}
+    
+    # Bereichs- und Schweregrad-Filter in einem vektorisierten Durchlauf
+    filtered_alerts = alerts
+    if alerts and (selected_area is not None or sev_set is not None):
+        alerts_df = pd.DataFrame(alerts, columns=['department', 'severity'])
+        mask = pd.Series(True, index=alerts_df.index)
+        if selected_area is not None:
+            mask &= alerts_df['department'] == selected_area
+        if sev_set is not None:
+            mask &= alerts_df['severity'].isin(sev_set)
+        filtered_alerts = [a for a, keep in zip(alerts, mask.to_numpy()) if keep]
+    
+    # Spinner entfernen
+    spinner_tab1.empty()
+    
+    # Warnungen als kompakte Karten anzeigen
+    with alerts_content_placeholder.container():
+        if filtered_alerts:
+            # Nur die ersten Karten rendern, weitere über "Mehr anzeigen" nachladen
+            shown_alerts = filtered_alerts[:st.session_state.get('ops_alerts_shown', OPS_PAGE_SIZE)]
+            # Alle Karten in einem einzigen Aufruf an das Frontend senden
+            st.html("\n".join(_render_alert_card(alert, i) for i, alert in enumerate(shown_alerts)))
+            
+            # Bestätigen-Buttons als kompaktes Raster mit einem einzigen st.columns-Aufruf
+            # (bestätigte Warnungen tragen bereits ein Badge und brauchen keinen Button)
+            unacked_alerts = [a for a in shown_alerts if a.get('acknowledged', 0) != 1]
+            if unacked_alerts:
+                ack_cols = st.columns(min(len(unacked_alerts), ACK_BUTTON_COLUMNS))
+                for i, alert in enumerate(unacked_alerts):
+                    if ack_cols[i % len(ack_cols)].button(f"Bestätigen: {alert['message']}", key=f"ops_ack_{alert['id']}", use_container_width=True):
+                        _acknowledge_alert(db, alert['id'])
+            
+            _render_show_more('ops_alerts_shown', len(filtered_alerts), len(shown_alerts))
+        else:
+            st.markdown("""
+        <div class="empty-state">
+            <div class="empty-state-icon">🔍</div>
+            <div class="empty-state-title">Keine Warnungen gefunden</div>
+            <div class="empty-state-text">Keine Warnungen entsprechen den ausgewählten Filtern</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+@st.fragment
+def _recommendations_fragment(db, sim, get_cached_recommendations=None):
+    """Rendert den Empfehlungen-Tab"""
+    # Feedback-Nachrichten nach Fragment-Rerun anzeigen
     if 'ops_feedback_message' in st.session_state:
         feedback = st.session_state.ops_feedback_message
         if feedback['type'] == 'success':
@@ -33,620 +424,290 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
             st.warning(feedback['message'])
         del st.session_state.ops_feedback_message
     
-    # ===== SOFORT: STRUKTUR RENDERN =====
-    # Operations page with tabs - sofort anzeigen
-    tab1, tab2, tab3 = st.tabs(["🚨 Warnungen", "💡 Empfehlungen", "📝 Protokoll"])
-    
-    # Loading Spinner für jeden Tab
-    spinner_tab1 = st.empty()
+    st.markdown("### Empfehlungen")
     spinner_tab2 = st.empty()
-    spinner_tab3 = st.empty()
+    with spinner_tab2.container():
+        st.markdown(render_loading_spinner("Lade Empfehlungen..."), unsafe_allow_html=True)
     
-    # Alerts Tab
-    with tab1:
-        st.markdown("### Warnungen")
-        with spinner_tab1.container():
-            st.markdown(render_loading_spinner("Lade Warnungen..."), unsafe_allow_html=True)
-        st.markdown("")  # Spacing
-        
-        # Filterzeile
-        col1, col2, col3 = st.columns([2, 2, 2])
-        
-        with col1:
-            # Bereich Dropdown mit deutschen Übersetzungen
-            # Verwende Background-Daten oder get_cached_alerts() für sofortigen Zugriff
-            if 'background_data' in st.session_state and st.session_state.background_data:
-                all_alerts = st.session_state.background_data.get('alerts', [])
-            else:
-                all_alerts = get_cached_alerts() if get_cached_alerts else db.get_active_alerts()
-            # Severity-Mapping für Filter (Deutsch -> Englisch)
-            from utils import get_department_name_mapping
-            severity_de_map = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
-            severity_en_map = {v: k for k, v in severity_de_map.items()}
-            dept_map = get_department_name_mapping()
-            # Erweitere für Kompatibilität
-            dept_map.update({
-                'ED': 'Notaufnahme',
-                'General Ward': 'Allgemeinstation',
-                'Neurology': 'Neurologie',
-                'Pediatrics': 'Pädiatrie',
-                'Oncology': 'Onkologie',
-                'Maternity': 'Geburtshilfe',
-                'Radiology': 'Radiologie',
-                'Ward': 'Station',
-                'Other': 'Andere',
-                'N/A': 'Bereich',
-            })
-            # Mapping für alle eindeutigen Abteilungen erstellen
-            unique_depts = sorted(list(set([a.get('department', 'N/A') for a in all_alerts if a.get('department')])))
-            areas_de = [dept_map.get(d, d) for d in unique_depts]
-            area_map = dict(zip(areas_de, unique_depts))
-            areas_de_display = ["Alle"] + areas_de
-            selected_area_de = st.selectbox("Bereich", areas_de_display, key="ops_alert_area")
-            selected_area = None if selected_area_de == "Alle" else area_map[selected_area_de]
-        
-        with col2:
-            # Severity chips
-            severity_options = ["Alle", "hoch", "mittel", "niedrig"]
-            selected_severities = st.multiselect(
-                "Schweregrad",
-                severity_options,
-                default=["hoch", "mittel"],
-                key="ops_alert_severity"
-            )
-            if not selected_severities:
-                selected_severities = severity_options
-        
-        with col3:
-            # Zeitspanne
-            time_range = st.selectbox(
-                "Zeitraum",
-                ["Letzte 1 Stunde", "Letzte 6 Stunden", "Letzte 24 Stunden"],
-                index=2,
-                key="ops_alert_time"
-            )
-            hours_map = {"Letzte 1 Stunde": 1, "Letzte 6 Stunden": 6, "Letzte 24 Stunden": 24}
-            hours = hours_map[time_range]
-        
-        st.markdown("")  # Spacing
-        
-        # Leere Platzhalter für progressive Anzeige
-        alerts_content_placeholder = st.empty()
-        
-        # Gefilterte Warnungen abrufen - verwende Background-Daten für sofortigen Zugriff
-        if 'background_data' in st.session_state and st.session_state.background_data:
-            alerts = st.session_state.background_data.get('alerts', [])
-        else:
-            alerts = get_cached_alerts() if get_cached_alerts else db.get_active_alerts()
-        
-        # Zeitraum-Filterung manuell anwenden (nur für nicht aufgelöste Warnungen)
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-        
-        # Hilfsfunktion zum Normalisieren von Timestamps
-        def normalize_timestamp(ts):
-            if ts is None:
-                return None
-            
-            # Handle pandas Timestamp
-            if hasattr(ts, 'to_pydatetime'):
-                ts = ts.to_pydatetime()
-            
-            if isinstance(ts, datetime):
-                # Wenn bereits datetime, stelle sicher, dass es timezone-aware ist
-                if ts.tzinfo is None:
-                    return ts.replace(tzinfo=timezone.utc)
-                return ts
-            if isinstance(ts, str):
-                try:
-                    # Versuche ISO-Format
-                    dt = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-                    # Ensure timezone-aware (fromisoformat might return naive if no timezone in string)
-                    if dt.tzinfo is None:
-                        dt = dt.replace(tzinfo=timezone.utc)
-                    return dt
-                except Exception:
-                    try:
-                        # Versuche anderes Format
-                        dt = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S.%f')
-                        return dt.replace(tzinfo=timezone.utc)
-                    except Exception:
-                        try:
-                            dt = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S')
-                            return dt.replace(tzinfo=timezone.utc)
-                        except Exception:
-                            return None
-            return None
-        
-        # Filtere nach Zeitraum
-        filtered_by_time = []
-        for a in alerts:
-            ts = normalize_timestamp(a.get('timestamp'))
-            
-            # Defensive check: Ensure ts is timezone-aware before comparison
-            if ts is not None:
-                if isinstance(ts, datetime) and ts.tzinfo is None:
-                    ts = ts.replace(tzinfo=timezone.utc)
-                
-                # Now safe to compare
-                if ts >= cutoff_time:
-                    filtered_by_time.append(a)
-        alerts = filtered_by_time
-        
-        # Filter anwenden
-        filtered_alerts = alerts
-        if selected_area is not None:
-            filtered_alerts = [a for a in filtered_alerts if a.get('department') == selected_area]
-        if "Alle" not in selected_severities:
-            # Deutsche Filterwerte in englische umwandeln für Vergleich mit Alert-Werten
-            selected_severities_en = [severity_en_map.get(sev, sev) for sev in selected_severities]
-            filtered_alerts = [a for a in filtered_alerts if a['severity'] in selected_severities_en]
-        
-        # Spinner entfernen
-        spinner_tab1.empty()
-        
-        # Warnungen als kompakte Karten anzeigen
-        with alerts_content_placeholder.container():
-            if filtered_alerts:
-                for i, alert in enumerate(filtered_alerts):
-                    # Prüfe ob Warnung bestätigt wurde
-                    is_acknowledged = alert.get('acknowledged', 0) == 1
-                    
-                    # Wenn bestätigt, verwende blaue Farbe, sonst normale Severity-Farbe
-                    if is_acknowledged:
-                        border_color = "#3B82F6"  # Blau (blue-500)
-                        background_color = "#EFF6FF"  # Sehr helles Blau für Hintergrund
-                    else:
-                        border_color = get_severity_color(alert['severity'])
-                        background_color = "white"
-                    
-                    # Schweregrad ins Deutsche übersetzen für Anzeige
-                    severity_de = severity_de_map.get(alert['severity'], alert['severity'])
-                    badge_html = render_badge(severity_de.upper(), alert['severity'])
-                    
-                    # Bestätigt-Badge hinzufügen wenn bestätigt
-                    if is_acknowledged:
-                        acknowledged_badge = '<span class="badge" style="background: #3B82F6; color: white;">✓ BESTÄTIGT</span>'  # Blau
-                        badge_html = f"{badge_html} {acknowledged_badge}"
-                    
-                    # Abteilung für Anzeige übersetzen
-                    from utils import get_department_name_mapping
-                    dept_map = get_department_name_mapping()
-                    dept_map.update({
-                        'ED': 'Notaufnahme',
-                        'General Ward': 'Allgemeinstation',
-                        'Neurology': 'Neurologie',
-                        'Pediatrics': 'Pädiatrie',
-                        'Oncology': 'Onkologie',
-                        'Maternity': 'Geburtshilfe',
-                        'Radiology': 'Radiologie',
-                        'Ward': 'Station',
-                        'Other': 'Andere',
-                        'N/A': 'Bereich',
-                    })
-                    dept_de = dept_map.get(alert.get('department', 'N/A'), alert.get('department', 'N/A'))
-                    delay_class = "fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3"
-                    col1, col2 = st.columns([5, 1])
-                    with col1:
-                        st.html(f"""<div class="{delay_class}" style="background: {background_color}; padding: 1rem; border-radius: 8px; margin-bottom: 0.75rem; border-left: 4px solid {border_color}; box-shadow: 0 1px 2px rgba(0,0,0,0.05);">
-                        <div style="display: flex; align-items: center; gap: 0.75rem; margin-bottom: 0.5rem;">
-                            {badge_html}
-                            <span style="font-size: 0.75rem; color: #6b7280; font-weight: 500;">{dept_de}</span>
-                            <span style="font-size: 0.75rem; color: #9ca3af;">•</span>
-                            <span style="font-size: 0.75rem; color: #6b7280;">{format_time_ago(alert['timestamp'])}</span>
-                        </div>
-                        <div style="font-weight: 600; color: #1f2937; font-size: 0.95rem;">
-                            {alert['message']}
-                        </div>
-                    </div>""")
-                    with col2:
-                        st.markdown("<div style='height: 1rem;'></div>", unsafe_allow_html=True)
-                        if is_acknowledged:
-                            st.button("✓ Bestätigt", key=f"ops_ack_{alert['id']}", use_container_width=True, disabled=True, type="primary")
-                        else:
-                            if st.button("Bestätigen", key=f"ops_ack_{alert['id']}", use_container_width=True):
-                                db.acknowledge_alert(alert['id'])
-                                # Cache invalidieren, damit die Seite aktualisiert wird
-                                if 'background_data' in st.session_state:
-                                    # Aktualisiere die Alerts direkt im Cache
-                                    updated_alerts = db.get_active_alerts()
-                                    st.session_state.background_data['alerts'] = updated_alerts
-                                    st.session_state.background_data['timestamp'] = time.time()
-                                # Cache-Timestamp zurücksetzen, damit Background-Daten sofort aktualisiert werden
-                                if 'background_data_timestamp' in st.session_state:
-                                    st.session_state.background_data_timestamp = 0
-                                st.rerun()
-            else:
-                st.markdown("""
-            <div class="empty-state">
-                <div class="empty-state-icon">🔍</div>
-                <div class="empty-state-title">Keine Warnungen gefunden</div>
-                <div class="empty-state-text">Keine Warnungen entsprechen den ausgewählten Filtern</div>
-            </div>
-            """, unsafe_allow_html=True)
+    recommendations_content_placeholder = st.empty()
     
-    # Recommendations Tab
-    with tab2:
-        st.markdown("### Empfehlungen")
-        with spinner_tab2.container():
-            st.markdown(render_loading_spinner("Lade Empfehlungen..."), unsafe_allow_html=True)
-        
-        recommendations_content_placeholder = st.empty()
-        
-        # Empfehlungen abrufen - verwende Background-Daten für sofortigen Zugriff
-        if 'background_data' in st.session_state and st.session_state.background_data:
-            recommendations = st.session_state.background_data.get('recommendations', [])
-        else:
-            recommendations = get_cached_recommendations() if get_cached_recommendations else db.get_pending_recommendations()
-        
-        # Spinner entfernen
-        spinner_tab2.empty()
-        
-        # German translation for explanation_score (trust level)
-        vertrauen_map = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
-        with recommendations_content_placeholder.container():
-            st.markdown("")  # Abstand
-            if recommendations:
-                for i, rec in enumerate(recommendations):
-                    priority_color = get_priority_color(rec['priority'])
-                    # German translation for priority
-                    priority_de_map = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
-                    priority_de = priority_de_map.get(rec['priority'], rec['priority'])
-                    badge_html = render_badge(priority_de.upper(), rec['priority'])
-
-                    # Impact tags (extract from department and rec_type)
-                    impact_tags = []
-                    if rec.get('department'):
-                        # Übersetze Department-Namen ins Deutsche
-                        dept_map = get_department_name_mapping()
-                        dept_de = dept_map.get(rec['department'], rec['department'])
-                        impact_tags.append(dept_de)
-                    if rec.get('rec_type'):
-                        # Häufige rec_types ins Deutsche übersetzen
-                        rec_type_map = {
-                            'capacity': 'Kapazität',
-                            'staffing': 'Personal',
-                            'inventory': 'Inventar',
-                            'general': 'Allgemein',
-                        }
-                        rec_type = rec['rec_type']
-                        impact_tags.append(rec_type_map.get(rec_type, rec_type.replace('_', ' ').title()))
+    # Empfehlungen abrufen - verwende Background-Daten für sofortigen Zugriff
+    if 'background_data' in st.session_state and st.session_state.background_data:
+        recommendations = st.session_state.background_data.get('recommendations', [])
+    else:
+        recommendations = get_cached_recommendations() if get_cached_recommendations else db.get_pending_recommendations()
+    
+    # Spinner entfernen
+    spinner_tab2.empty()
+    
+    with recommendations_content_placeholder.container():
+        st.markdown("")  # Abstand
+        if recommendations:
+            # Nur die ersten Karten rendern, weitere über "Mehr anzeigen" nachladen
+            shown_recommendations = recommendations[:st.session_state.get('ops_recs_shown', OPS_PAGE_SIZE)]
+            for i, rec in enumerate(shown_recommendations):
+                priority_color = get_priority_color(rec['priority'])
+                # German translation for priority
+                priority_de = SEVERITY_DE_MAP.get(rec['priority'], rec['priority'])
+                badge_html = render_badge(priority_de.upper(), rec['priority'])
+
+                # Impact tags (extract from department and rec_type)
+                impact_tags = []
+                if rec.get('department'):
+                    # Übersetze Department-Namen ins Deutsche
+                    dept_de = DEPT_MAP.get(rec['department'], rec['department'])
+                    impact_tags.append(dept_de)
+                if rec.get('rec_type'):
+                    # Häufige rec_types ins Deutsche übersetzen
+                    rec_type = rec['rec_type']
+                    impact_tags.append(REC_TYPE_MAP.get(rec_type, rec_type.replace('_', ' ').title()))
 
-                    # Neues Template-Format verwenden, falls verfügbar, sonst auf altes Format zurückgreifen
-                    has_new_format = rec.get('action') and rec.get('reason')
+                # Neues Template-Format verwenden, falls verfügbar, sonst auf altes Format zurückgreifen
+                has_new_format = rec.get('action') and rec.get('reason')
 
+                if has_new_format:
+                    # Build impact tags HTML
+                    impact_tags_html = ' '.join(_IMPACT_TAG_TMPL.format(tag) for tag in impact_tags)
+                    
+                    delay_class = "fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3"
+                    st.markdown(_REC_CARD_TMPL.format(
+                        delay_class=delay_class,
+                        priority_color=priority_color,
+                        title=rec['title'],
+                        badge_html=badge_html,
+                        action=rec.get('action', 'N/A'),
+                        reason=rec.get('reason', 'N/A'),
+                        expected_impact=rec.get('expected_impact', 'N/A'),
+                        safety_note=rec.get('safety_note', 'N/A'),
+                        impact_tags_html=impact_tags_html,
+                    ), unsafe_allow_html=True)
+                else:
+                    # Fallback to old format
+                    delay_class = "fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3"
+                    impact_tags_html = ' '.join(_IMPACT_TAG_TMPL.format(tag) for tag in impact_tags)
+                    
+                    st.markdown(_REC_CARD_LEGACY_TMPL.format(
+                        delay_class=delay_class,
+                        priority_color=priority_color,
+                        badge_html=badge_html,
+                        title=rec['title'],
+                        description=rec['description'],
+                        impact_tags_html=impact_tags_html,
+                    ), unsafe_allow_html=True)
+                
+                # Expandable "Why suggested?" section
+                with st.expander("Warum vorgeschlagen?", expanded=False):
                     if has_new_format:
-                        # Build impact tags HTML
-                        impact_tags_html = ' '.join([f'<span class="badge" style="background: #e5e7eb; color: #4b5563;">{tag}</span>' for tag in impact_tags])
-                        
-                        delay_class = "fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3"
-                        st.markdown(f"""
-                        <div class="{delay_class}" style="background: white; padding: 1.5rem; border-radius: 8px; margin-bottom: 1rem; border-left: 4px solid {priority_color}; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
-                            <div style="margin-bottom: 1rem;">
-                                <h4 style="margin: 0 0 0.5rem 0; color: #1f2937;">{rec['title']}</h4>
-                                <div style="margin-bottom: 0.75rem;">{badge_html}</div>
-                            </div>
-                            <div style="background: #f9fafb; padding: 1rem; border-radius: 6px; margin-bottom: 0.75rem;">
-                                <div style="margin-bottom: 0.75rem;">
-                                    <strong style="color: #1f2937; font-size: 0.875rem;">Maßnahme:</strong>
-                                    <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{rec.get('action', 'N/A')}</p>
-                                </div>
-                                <div style="margin-bottom: 0.75rem;">
-                                    <strong style="color: #1f2937; font-size: 0.875rem;">Begründung:</strong>
-                                    <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{rec.get('reason', 'N/A')}</p>
-                                </div>
-                                <div style="margin-bottom: 0.75rem;">
-                                    <strong style="color: #1f2937; font-size: 0.875rem;">Erwartete Auswirkung:</strong>
-                                    <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{rec.get('expected_impact', 'N/A')}</p>
-                                </div>
-                                <div>
-                                    <strong style="color: #1f2937; font-size: 0.875rem;">Sicherheits-Hinweis:</strong>
-                                    <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{rec.get('safety_note', 'N/A')}</p>
-                                </div>
-                            </div>
-                            <div style="display: flex; gap: 0.5rem; flex-wrap: wrap;">
-                                {impact_tags_html}
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        # Grund und erwartete Auswirkung aus dem Template verwenden
+                        explanation = f"""
+                        <strong>Begründung:</strong> {rec.get('reason', 'N/A')}<br><br>
+                        <strong>Erwartete Auswirkung:</strong> {rec.get('expected_impact', 'N/A')}<br><br>
+                        """
                     else:
-                        # Fallback to old format
-                        delay_class = "fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3"
-                        impact_tags_html = ' '.join([f'<span class="badge" style="background: #e5e7eb; color: #4b5563;">{tag}</span>' for tag in impact_tags])
-                        
-                        st.markdown(f"""
-                        <div class="{delay_class}" style="background: white; padding: 1.5rem; border-radius: 8px; margin-bottom: 1rem; border-left: 4px solid {priority_color}; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
-                            <div style="display: flex; align-items: start; gap: 0.75rem; margin-bottom: 1rem;">
-                                {badge_html}
-                                <div style="flex: 1;">
-                                    <h4 style="margin: 0 0 0.5rem 0; color: #1f2937;">{rec['title']}</h4>
-                                    <p style="color: #6b7280; margin: 0; line-height: 1.6;">{rec['description']}</p>
-                                </div>
-                            </div>
-                            <div style="display: flex; gap: 0.5rem; flex-wrap: wrap; margin-bottom: 1rem;">
-                                {impact_tags_html}
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        # Erklärung basierend auf rec_type generieren
+                        rec_type = rec.get('rec_type', 'general')
+                        explanations = {
+                            'capacity': f"Die aktuelle Kapazitätsauslastung in {rec.get('department', 'diesem Bereich')} liegt über dem Schwellenwert. Historische Daten zeigen, dass das Öffnen von Überlaufbetten die Wartezeiten um 15-20% reduziert.",
+                            'staffing': f"Die Analyse der Personalauslastung zeigt, dass {rec.get('department', 'dieser Bereich')} eine erhöhte Nachfrage erfährt. Eine Umverteilung kann die Reaktionszeiten verbessern.",
+                            'inventory': f"Die Bestände kritischer Materialien in {rec.get('department', 'diesem Bereich')} liegen unter dem Optimum. Jetzt nachbestellen, um Engpässe zu vermeiden.",
+                            'general': f"Die KI-Analyse der aktuellen Kennzahlen und Trends in {rec.get('department', 'diesem Bereich')} empfiehlt diese Maßnahme zur Optimierung des Betriebs."
+                        }
+                        explanation = explanations.get(rec_type, explanations['general'])
                     
-                    # Expandable "Why suggested?" section
-                    with st.expander("Warum vorgeschlagen?", expanded=False):
-                        if has_new_format:
-                            # Grund und erwartete Auswirkung aus dem Template verwenden
-                            explanation = f"""
-                            <strong>Begründung:</strong> {rec.get('reason', 'N/A')}<br><br>
-                            <strong>Erwartete Auswirkung:</strong> {rec.get('expected_impact', 'N/A')}<br><br>
-                            """
-                        else:
-                            # Erklärung basierend auf rec_type generieren
-                            rec_type = rec.get('rec_type', 'general')
-                            explanations = {
-                                'capacity': f"Die aktuelle Kapazitätsauslastung in {rec.get('department', 'diesem Bereich')} liegt über dem Schwellenwert. Historische Daten zeigen, dass das Öffnen von Überlaufbetten die Wartezeiten um 15-20% reduziert.",
-                                'staffing': f"Die Analyse der Personalauslastung zeigt, dass {rec.get('department', 'dieser Bereich')} eine erhöhte Nachfrage erfährt. Eine Umverteilung kann die Reaktionszeiten verbessern.",
-                                'inventory': f"Die Bestände kritischer Materialien in {rec.get('department', 'diesem Bereich')} liegen unter dem Optimum. Jetzt nachbestellen, um Engpässe zu vermeiden.",
-                                'general': f"Die KI-Analyse der aktuellen Kennzahlen und Trends in {rec.get('department', 'diesem Bereich')} empfiehlt diese Maßnahme zur Optimierung des Betriebs."
-                            }
-                            explanation = explanations.get(rec_type, explanations['general'])
+                    st.markdown(f"""
+                    <div style="background: #f9fafb; padding: 1rem; border-radius: 6px; border-left: 3px solid {priority_color};">
+                        <div style="color: #4b5563; line-height: 1.6;">{explanation}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                # Annehmen/Ablehnen-Buttons
+                col1, col2, col3 = st.columns([4, 1, 1])
+                with col1:
+                    action_text = st.text_input(
+                        "Maßnahme / Begründung",
+                        key=f"ops_action_{rec['id']}",
+                        placeholder="Bitte ergreifende Maßnahme oder Ablehnungsgrund eingeben"
+                    )
+                with col2:
+                    st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
+                    accept_clicked = st.button("✅ Annehmen", key=f"ops_accept_{rec['id']}", use_container_width=True)
+                    if accept_clicked:
+                        # Wenn kein Text eingegeben wurde, verwende die Maßnahme aus der Empfehlung
+                        final_action_text = action_text if action_text else rec.get('action', rec.get('title', ''))
                         
-                        st.markdown(f"""
-                        <div style="background: #f9fafb; padding: 1rem; border-radius: 6px; border-left: 3px solid {priority_color};">
-                            <div style="color: #4b5563; line-height: 1.6;">{explanation}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    # Annehmen/Ablehnen-Buttons
-                    col1, col2, col3 = st.columns([4, 1, 1])
-                    with col1:
-                        action_text = st.text_input(
-                            "Maßnahme / Begründung",
-                            key=f"ops_action_{rec['id']}",
-                            placeholder="Bitte ergreifende Maßnahme oder Ablehnungsgrund eingeben"
-                        )
-                    with col2:
-                        st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
-                        accept_clicked = st.button("✅ Annehmen", key=f"ops_accept_{rec['id']}", use_container_width=True)
-                        if accept_clicked:
-                            # Wenn kein Text eingegeben wurde, verwende die Maßnahme aus der Empfehlung
-                            final_action_text = action_text if action_text else rec.get('action', rec.get('title', ''))
+                        if final_action_text:
+                            db.accept_recommendation(rec['id'], final_action_text)
+                            # Simulationseffekt basierend auf Empfehlungstyp anwenden
+                            rec_type = rec.get('rec_type', '')
+                            if 'staffing' in rec_type.lower() or 'reassign' in rec.get('action', '').lower():
+                                sim.apply_recommendation_effect(rec_type, 'staffing_reassignment', duration_minutes=30)
+                            elif 'capacity' in rec_type.lower() or 'overflow' in rec.get('action', '').lower() or 'bed' in rec.get('action', '').lower():
+                                sim.apply_recommendation_effect(rec_type, 'open_overflow_beds', duration_minutes=45)
+                            elif 'room' in rec_type.lower() or 'room' in rec.get('action', '').lower():
+                                sim.apply_recommendation_effect(rec_type, 'room_allocation', duration_minutes=30)
                             
-                            if final_action_text:
-                                db.accept_recommendation(rec['id'], final_action_text)
-                                # Simulationseffekt basierend auf Empfehlungstyp anwenden
-                                rec_type = rec.get('rec_type', '')
-                                if 'staffing' in rec_type.lower() or 'reassign' in rec.get('action', '').lower():
-                                    sim.apply_recommendation_effect(rec_type, 'staffing_reassignment', duration_minutes=30)
-                                elif 'capacity' in rec_type.lower() or 'overflow' in rec.get('action', '').lower() or 'bed' in rec.get('action', '').lower():
-                                    sim.apply_recommendation_effect(rec_type, 'open_overflow_beds', duration_minutes=45)
-                                elif 'room' in rec_type.lower() or 'room' in rec.get('action', '').lower():
-                                    sim.apply_recommendation_effect(rec_type, 'room_allocation', duration_minutes=30)
-                                
-                                # Cache leeren und Background-Daten aktualisieren
-                                st.cache_data.clear()
-                                if 'background_data' in st.session_state:
-                                    # Aktualisiere Empfehlungen und Audit-Log direkt im Cache
-                                    st.session_state.background_data['recommendations'] = db.get_pending_recommendations()
-                                    st.session_state.background_data['audit_log'] = db.get_audit_log(100)
-                                    st.session_state.background_data['timestamp'] = time.time()
-                                
-                                # Feedback-Nachricht für nach Rerun speichern
-                                st.session_state.ops_feedback_message = {
-                                    'type': 'success',
-                                    'message': '✅ Empfehlung angenommen'
-                                }
-                                st.rerun()
-                            else:
-                                st.warning("⚠️ Keine Maßnahme verfügbar")
-                    with col3:
-                        st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
-                        reject_clicked = st.button("❌ Ablehnen", key=f"ops_reject_{rec['id']}", use_container_width=True)
-                        if reject_clicked:
-                            if action_text:
-                                db.reject_recommendation(rec['id'], action_text)
-                                
-                                # Cache leeren und Background-Daten aktualisieren
-                                st.cache_data.clear()
-                                if 'background_data' in st.session_state:
-                                    # Aktualisiere Empfehlungen und Audit-Log direkt im Cache
-                                    st.session_state.background_data['recommendations'] = db.get_pending_recommendations()
-                                    st.session_state.background_data['audit_log'] = db.get_audit_log(100)
-                                    st.session_state.background_data['timestamp'] = time.time()
-                                
-                                # Feedback-Nachricht für nach Rerun speichern
-                                st.session_state.ops_feedback_message = {
-                                    'type': 'info',
-                                    'message': '❌ Empfehlung abgelehnt'
-                                }
-                                st.rerun()
-                            else:
-                                st.warning("⚠️ Bitte Ablehnungsgrund eingeben")
-                    
-                    st.markdown("---")
-            else:
-                st.markdown("""
-            <div class="empty-state">
-                <div class="empty-state-icon">✅</div>
-                <div class="empty-state-title">Keine ausstehenden Empfehlungen</div>
-                <div class="empty-state-text">Alle Empfehlungen wurden überprüft</div>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    # Audit Tab
-    with tab3:
-        st.markdown("### Prüfprotokoll")
-        with spinner_tab3.container():
-            st.markdown(render_loading_spinner("Lade Protokoll..."), unsafe_allow_html=True)
-        
-        audit_content_placeholder = st.empty()
-        
-        # Filter - verwende Background-Daten für sofortigen Zugriff
-        if 'background_data' in st.session_state and st.session_state.background_data:
-            audit_log = st.session_state.background_data.get('audit_log', [])
-        else:
-            audit_log = _get_audit_log_cached(db, 100)  # Fallback: Gecacht
-        
-        # Spinner entfernen
-        spinner_tab3.empty()
-        
-        with audit_content_placeholder.container():
-            st.markdown("")  # Abstand
-            
-            # Refresh button to clear old data
-            col_btn1, col_btn2 = st.columns([1, 5])
-            with col_btn1:
-                if st.button("🔄 Aktualisieren", use_container_width=True):
-                    st.cache_data.clear()  # Cache leeren bei manueller Aktualisierung
-                    st.rerun()
+                            # Nur den Audit-Cache leeren und Background-Daten aktualisieren
+                            _get_audit_log_cached.clear()
+                            if 'background_data' in st.session_state:
+                                # Aktualisiere Empfehlungen und Audit-Log direkt im Cache
+                                st.session_state.background_data['recommendations'] = db.get_pending_recommendations()
+                                st.session_state.background_data['audit_log'] = db.get_audit_log(100)
+                                st.session_state.background_data['timestamp'] = time.time()
+                            
+                            # Feedback-Nachricht für nach Rerun speichern
+                            st.session_state.ops_feedback_message = {
+                                'type': 'success',
+                                'message': '✅ Empfehlung angenommen'
+                            }
+                            _rerun_fragment()
+                        else:
+                            st.warning("⚠️ Keine Maßnahme verfügbar")
+                with col3:
+                    st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
+                    reject_clicked = st.button("❌ Ablehnen", key=f"ops_reject_{rec['id']}", use_container_width=True)
+                    if reject_clicked:
+                        if action_text:
+                            db.reject_recommendation(rec['id'], action_text)
+                            
+                            # Nur den Audit-Cache leeren und Background-Daten aktualisieren
+                            _get_audit_log_cached.clear()
+                            if 'background_data' in st.session_state:
+                                # Aktualisiere Empfehlungen und Audit-Log direkt im Cache
+                                st.session_state.background_data['recommendations'] = db.get_pending_recommendations()
+                                st.session_state.background_data['audit_log'] = db.get_audit_log(100)
+                                st.session_state.background_data['timestamp'] = time.time()
+                            
+                            # Feedback-Nachricht für nach Rerun speichern
+                            st.session_state.ops_feedback_message = {
+                                'type': 'info',
+                                'message': '❌ Empfehlung abgelehnt'
+                            }
+                            _rerun_fragment()
+                        else:
+                            st.warning("⚠️ Bitte Ablehnungsgrund eingeben")
+                
+                st.markdown("---")
             
-            st.markdown("")  # Abstand
-        
-        # Translation maps for dropdowns
-        role_map_filter = {
-            'system': 'System',
-            'nurse': 'Pflegekraft',
-            'doctor': 'Arzt/Ärztin',
-            'admin': 'Leitung',
-            'manager': 'Manager',
-            'staff': 'Personal',
-            'user': 'Benutzer',
-        }
-        action_map_filter = {
-            'alert_acknowledged': 'Warnung bestätigt',
-            'recommendation_accepted': 'Empfehlung angenommen',
-            'recommendation_rejected': 'Empfehlung abgelehnt',
-        }
-        entity_map_filter = {
-            'alert': 'Warnung',
-            'recommendation': 'Empfehlung',
-            'capacity': 'Kapazität',
-            'transport': 'Transport',
-            'inventory': 'Inventar',
-            'device': 'Gerät',
-            'patient': 'Patient',
-        }
-
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            # Get unique roles and translate them
-            unique_roles = sorted(list(set([a.get('user_role', 'system') for a in audit_log if a.get('user_role')])))
-            roles_de = [role_map_filter.get(r, r.title()) for r in unique_roles]
-            role_reverse_map = dict(zip(roles_de, unique_roles))
-            roles_de_display = ["Alle"] + roles_de
-            selected_role_de = st.selectbox("Rolle", roles_de_display, key="ops_audit_role")
-            selected_role_audit = None if selected_role_de == "Alle" else role_reverse_map.get(selected_role_de, selected_role_de)
-
-        with col2:
-            # Get unique actions and translate them
-            unique_actions = sorted(list(set([a.get('action_type', '') for a in audit_log if a.get('action_type')])))
-            actions_de = [action_map_filter.get(act, act.replace('_', ' ').title()) for act in unique_actions]
-            action_reverse_map = dict(zip(actions_de, unique_actions))
-            actions_de_display = ["Alle"] + actions_de
-            selected_action_de = st.selectbox("Aktion", actions_de_display, key="ops_audit_action")
-            selected_action = None if selected_action_de == "Alle" else action_reverse_map.get(selected_action_de, selected_action_de)
-
-        with col3:
-            # Get unique entity types and translate them
-            unique_entities = sorted(list(set([a.get('entity_type', '') for a in audit_log if a.get('entity_type')])))
-            entities_de = [entity_map_filter.get(ent, ent.title()) for ent in unique_entities]
-            entity_reverse_map = dict(zip(entities_de, unique_entities))
-            entities_de_display = ["Alle"] + entities_de
-            selected_area_de = st.selectbox("Bereich", entities_de_display, key="ops_audit_area")
-            selected_area_audit = None if selected_area_de == "Alle" else entity_reverse_map.get(selected_area_de, selected_area_de)
+            _render_show_more('ops_recs_shown', len(recommendations), len(shown_recommendations))
+        else:
+            st.markdown("""
+        <div class="empty-state">
+            <div class="empty-state-icon">✅</div>
+            <div class="empty-state-title">Keine ausstehenden Empfehlungen</div>
+            <div class="empty-state-text">Alle Empfehlungen wurden überprüft</div>
+        </div>
+        """, unsafe_allow_html=True)
+
 
+@st.fragment
+def _audit_fragment(db):
+    """Rendert den Protokoll-Tab"""
+    st.markdown("### Prüfprotokoll")
+    spinner_tab3 = st.empty()
+    with spinner_tab3.container():
+        st.markdown(render_loading_spinner("Lade Protokoll..."), unsafe_allow_html=True)
+    
+    audit_content_placeholder = st.empty()
+    
+    # Filter - verwende Background-Daten für sofortigen Zugriff
+    if 'background_data' in st.session_state and st.session_state.background_data:
+        audit_log = st.session_state.background_data.get('audit_log', [])
+    else:
+        audit_log = _get_audit_log_cached(db, 100)  # Fallback: Gecacht
+    
+    # Spinner entfernen
+    spinner_tab3.empty()
+    
+    with audit_content_placeholder.container():
         st.markdown("")  # Abstand
         
-        # Filter anwenden
-        filtered_audit = audit_log
+        # Refresh button to clear old data
+        col_btn1, col_btn2 = st.columns([1, 5])
+        with col_btn1:
+            if st.button("🔄 Aktualisieren", use_container_width=True):
+                # Nur den Audit-Cache leeren und Protokoll neu laden
+                _get_audit_log_cached.clear()
+                if st.session_state.get('background_data'):
+                    st.session_state.background_data['audit_log'] = db.get_audit_log(100)
+                _rerun_fragment()
+        
+        st.markdown("")  # Abstand
+    
+    # Dropdown-Optionen aus dem Audit-Log ableiten
+    (roles_de_display, role_reverse_map), (actions_de_display, action_reverse_map), (entities_de_display, entity_reverse_map) = \
+        _audit_filter_options(audit_log)
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        selected_role_de = st.selectbox("Rolle", roles_de_display, key="ops_audit_role")
+        selected_role_audit = None if selected_role_de == "Alle" else role_reverse_map.get(selected_role_de, selected_role_de)
+
+    with col2:
+        selected_action_de = st.selectbox("Aktion", actions_de_display, key="ops_audit_action")
+        selected_action = None if selected_action_de == "Alle" else action_reverse_map.get(selected_action_de, selected_action_de)
+
+    with col3:
+        selected_area_de = st.selectbox("Bereich", entities_de_display, key="ops_audit_area")
+        selected_area_audit = None if selected_area_de == "Alle" else entity_reverse_map.get(selected_area_de, selected_area_de)
+
+    st.markdown("")  # Abstand
+    
+    # Rollen-, Aktions- und Bereichsfilter in einem vektorisierten Durchlauf
+    filtered_audit = audit_log
+    if audit_log and (selected_role_audit is not None or selected_action is not None or selected_area_audit is not None):
+        audit_df = pd.DataFrame(audit_log, columns=['user_role', 'action_type', 'entity_type'])
+        mask = pd.Series(True, index=audit_df.index)
         if selected_role_audit is not None:
-            filtered_audit = [a for a in filtered_audit if a.get('user_role') == selected_role_audit]
+            mask &= audit_df['user_role'] == selected_role_audit
         if selected_action is not None:
-            filtered_audit = [a for a in filtered_audit if a.get('action_type') == selected_action]
+            mask &= audit_df['action_type'] == selected_action
         if selected_area_audit is not None:
-            filtered_audit = [a for a in filtered_audit if a.get('entity_type') == selected_area_audit]
-        
-        # Als Tabelle anzeigen
-        if filtered_audit:
-            # Tabelle mit deutschen Spaltenüberschriften vorbereiten
-            # Deutsche Übersetzungen für Rollen und Aktionen (case-insensitive)
-            role_map = {
-                'system': 'System',
-                'nurse': 'Pflegekraft',
-                'doctor': 'Arzt/Ärztin',
-                'admin': 'Leitung',
-                'manager': 'Manager',
-                'staff': 'Personal',
-                'user': 'Benutzer',
-            }
-            action_map = {
-                'alert acknowledged': 'Warnung bestätigt',
-                'alert_acknowledged': 'Warnung bestätigt',
-                'acknowledge alert': 'Warnung bestätigt',
-                'acknowledge_alert': 'Warnung bestätigt',
-                'recommendation accepted': 'Empfehlung angenommen',
-                'recommendation_accepted': 'Empfehlung angenommen',
-                'accept recommendation': 'Empfehlung angenommen',
-                'accept_recommendation': 'Empfehlung angenommen',
-                'recommendation rejected': 'Empfehlung abgelehnt',
-                'recommendation_rejected': 'Empfehlung abgelehnt',
-                'reject recommendation': 'Empfehlung abgelehnt',
-                'reject_recommendation': 'Empfehlung abgelehnt',
-                'update': 'Aktualisiert',
-                'create': 'Erstellt',
-                'delete': 'Gelöscht',
-                'view': 'Angesehen',
-                'modify': 'Geändert',
-            }
-            entity_map = {
-                'alert': 'Warnung',
-                'recommendation': 'Empfehlung',
-                'capacity': 'Kapazität',
-                'transport': 'Transport',
-                'inventory': 'Inventar',
-                'device': 'Gerät',
-                'patient': 'Patient',
-            }
-            dept_map = get_department_name_mapping()
-            dept_map.update({
-                'ER': 'Notaufnahme',
-                'ED': 'Notaufnahme',
-                'General Ward': 'Allgemeinstation',
-                'Neurology': 'Neurologie',
-                'Pediatrics': 'Pädiatrie',
-                'Oncology': 'Onkologie',
-                'Maternity': 'Geburtshilfe',
-                'Radiology': 'Radiologie',
-            })
+            mask &= audit_df['entity_type'] == selected_area_audit
+        filtered_audit = [a for a, keep in zip(audit_log, mask.to_numpy()) if keep]
+    
+    # Als Tabelle anzeigen
+    if filtered_audit:
+        # Spaltenweise aufbauen statt einer Liste von Zeilen-Dicts
+        times, roles, actions, areas, details_col = [], [], [], [], []
+        # Relative Zeit pro Render nur einmal je Zeitstempel berechnen (nicht global cachen,
+        # da sich "vor X Min." mit der Uhrzeit ändert)
+        time_ago_cache = {}
+        for entry in filtered_audit:
+            role = entry.get('user_role', 'system').lower().strip()
+            action = entry.get('action_type', '').lower().strip().replace('_', ' ')
+            entity = entry.get('entity_type', 'N/A').lower().strip()
             
-            table_data = []
-            for entry in filtered_audit:
-                role = entry.get('user_role', 'system').lower().strip()
-                action = entry.get('action_type', '').lower().strip().replace('_', ' ')
-                entity = entry.get('entity_type', 'N/A').lower().strip()
-                
-                # Extract department from details if available
-                details = entry.get('details', '')
-                department = ''
-                # Look for department in details
-                for dept_key, dept_val in dept_map.items():
-                    if dept_key in details:
-                        department = f" ({dept_val})"
-                        break
-                
-                table_data.append({
-                    "Zeit": format_time_ago(entry['timestamp']),
-                    "Rolle": role_map.get(role, entry.get('user_role', 'System').title()),
-                    "Aktion": action_map.get(action, entry.get('action_type', 'N/A').replace('_', ' ').title()),
-                    "Bereich": entity_map.get(entity, entry.get('entity_type', 'N/A').title()),
-                    "Details": (details[:50] + "..." if details and len(details) > 50 else details) + department
-                })
+            # Extract department from details if available
+            details = entry.get('details') or ''
+            # Look for department in details
+            m = _DEPT_RE.search(details)
+            department = f" ({DEPT_MAP[m.group(0)]})" if m else ''
             
-            df_audit = pd.DataFrame(table_data)
-            st.dataframe(
-                df_audit,
-                use_container_width=True,
-                hide_index=True,
-                height=400
-            )
-
-        else:
-            st.info("Keine Protokolleinträge gefunden")
+            ts = entry['timestamp']
+            time_ago = time_ago_cache.get(ts)
+            if time_ago is None:
+                time_ago = time_ago_cache[ts] = format_time_ago(ts)
+            times.append(time_ago)
+            roles.append(ROLE_MAP.get(role, entry.get('user_role', 'System').title()))
+            actions.append(ACTION_MAP.get(action, entry.get('action_type', 'N/A').replace('_', ' ').title()))
+            areas.append(ENTITY_MAP.get(entity, entry.get('entity_type', 'N/A').title()))
+            trimmed = f"{details[:50]}..." if len(details) > 50 else details
+            details_col.append(f"{trimmed}{department}")
+        
+        df_audit = pd.DataFrame({
+            "Zeit": times,
+            "Rolle": roles,
+            "Aktion": actions,
+            "Bereich": areas,
+            "Details": details_col,
+        }, copy=False)
+        st.dataframe(
+            df_audit,
+            use_container_width=True,
+            hide_index=True,
+            height=400
+        )
 
+    else:
+        st.info("Keine Protokolleinträge gefunden")
@@ -4,22 +4,82 @@ Seitenmodul für Vorhersagen
 import streamlit as st
 import plotly.express as px
 from datetime import datetime
+from operator import itemgetter
 import pandas as pd
+import numpy as np
 from utils import (
     format_time_ago, get_severity_color, get_priority_color, get_risk_color,
     get_status_color, calculate_inventory_status, calculate_capacity_status,
     format_duration_minutes, get_department_color, get_system_status,
-    get_metric_severity_for_load, get_metric_severity_for_count, get_metric_severity_for_free,
-    get_explanation_score_color
+    get_metric_severity_for_free,
+    get_explanation_score_color, get_department_name_mapping, LOAD_THRESHOLDS
 )
 from ui.components import render_badge, render_empty_state
 
 
+# Statische Übersetzungen einmal beim Import aufbauen statt bei jedem Rerun
+DEPT_MAP = get_department_name_mapping()
+
+PRED_TYPE_MAP = {
+    'patient_arrival': 'Patientenzugang',
+    'bed_demand': 'Bettenbedarf',
+}
+
+# Auf der Seite angezeigte Vorhersagetypen
+ALLOWED_PRED_TYPES = frozenset(PRED_TYPE_MAP)
+
+# HTML-Vorlage für Vorhersagekarten (mit .format gefüllt)
+_PRED_CARD_TMPL = """<div style="background: white; padding: 1rem; border-radius: 8px; margin-bottom: 0.5rem; border: 1px solid #e5e7eb;">
+    <div style="display: flex; justify-content: space-between; align-items: flex-start;">
+        <div style="flex: 1;">
+            <strong style="font-size: 0.95rem;">{pred_type}</strong>
+            <div style="color: #6b7280; font-size: 0.875rem; margin-top: 0.25rem;">{dept_de} • {time_str}</div>
+        </div>
+        <div style="text-align: right; margin-left: 1rem;">
+            <div style="font-size: 1.5rem; font-weight: 700; color: {value_color};">{formatted_value}</div>
+            <div style="font-size: 0.75rem; color: #6b7280; margin-top: 0.25rem;">{value_description}</div>
+            <div style="font-size: 0.75rem; color: {confidence_color}; margin-top: 0.25rem;">{confidence_pct:.0f}% Vertrauen</div>
+        </div>
+    </div>
+</div>"""
+
+# Filteroption für "keine Einschränkung"
+ALLE = "Alle"
+
+# Schwellenwerte für Patientenzugang, angepasst an typische Werte (0-12 Patienten pro Zeithorizont)
+ARRIVAL_THRESHOLDS = {'critical': 8, 'watch': 5}
+
+
 @st.cache_data(ttl=30)
 def _get_predictions_cached(_db, time_horizon_minutes):
     """Gecachte Vorhersagen"""
     return _db.get_predictions(time_horizon_minutes)
 
+@st.cache_data(ttl=30)
+def _build_prediction_figure(records):
+    """Gecachtes Streudiagramm aus (prediction_type, time_horizon_minutes, confidence, predicted_value, department)-Tupeln"""
+    df_plot = pd.DataFrame(records, columns=['prediction_type', 'time_horizon_minutes', 'confidence', 'predicted_value', 'department'])
+    df_plot['Vorhersagetyp'] = df_plot['prediction_type'].map(lambda x: PRED_TYPE_MAP.get(x, x.replace('_', ' ').title()))
+    # Ensure size values are always positive for scatter plot
+    df_plot['size_value'] = df_plot['predicted_value'].abs().clip(lower=1)
+    fig = px.scatter(
+        df_plot,
+        x='time_horizon_minutes',
+        y='confidence',
+        size='size_value',
+        color='Vorhersagetyp',
+        hover_data=['department', 'predicted_value'],
+        title=""
+    )
+    fig.update_layout(
+        height=400,
+        xaxis_title="Zeithorizont (Minuten)",
+        yaxis_title="Vertrauen",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
 def format_prediction_value(pred_type: str, value: float) -> tuple[str, str]:
     if pred_type == 'patient_arrival':
         return f"{int(value)}", "neue Patienten erwartet"
@@ -29,23 +89,30 @@ def format_prediction_value(pred_type: str, value: float) -> tuple[str, str]:
         return f"{value:.1f}", ""
 
 
-def get_prediction_value_color(pred_type: str, value: float) -> str:
-    """Bestimmt die Farbe für den Vorhersagewert basierend auf dem Typ und Wert"""
-    if pred_type == 'bed_demand':
-        # Für Bettenauslastung: >= 90% = rot, >= 75% = gelb, sonst grün
-        severity, _ = get_metric_severity_for_load(value)
-        return get_severity_color(severity)
-    elif pred_type == 'patient_arrival':
-        # Für Patientenzugang: >= 8 = rot, >= 5 = gelb, sonst grün
-        # Schwellenwerte angepasst an typische Werte (0-12 Patienten pro Zeithorizont)
-        thresholds = {'critical': 8, 'watch': 5}
-        severity, _ = get_metric_severity_for_count(int(value), thresholds)
-        return get_severity_color(severity)
-    else:
-        return "#1f2937"  # Standard dunkelgrau
+def get_prediction_colors(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Bestimmt Vertrauens- und Wertfarbe für alle Vorhersagen (vektorisiert über den DataFrame)"""
+    confidence = df['confidence']
+    confidence_colors = np.select([confidence > 0.8, confidence > 0.7], ["#10B981", "#F59E0B"], default="#EF4444")
+    
+    value = df['predicted_value']
+    is_bed = df['prediction_type'] == 'bed_demand'
+    is_arrival = df['prediction_type'] == 'patient_arrival'
+    value_colors = np.select(
+        [
+            is_bed & (value >= LOAD_THRESHOLDS['critical']), is_bed & (value >= LOAD_THRESHOLDS['watch']), is_bed,
+            is_arrival & (value >= ARRIVAL_THRESHOLDS['critical']),
+            is_arrival & (value >= ARRIVAL_THRESHOLDS['watch']), is_arrival,
+        ],
+        [
+            get_severity_color('hoch'), get_severity_color('mittel'), get_severity_color('niedrig'),
+            get_severity_color('high'), get_severity_color('medium'), get_severity_color('low'),
+        ],
+        default="#1f2937",  # Standard dunkelgrau
+    )
+    return confidence_colors, value_colors
 
 
-def handle_smart_filter(selected: list, previous: list, all_options: list, key: str) -> list:
+def handle_smart_filter(selected: list[str], previous: tuple[str, ...], all_options: list[str], key: str) -> list[str]:
     """
     Intelligente Filter-Logik für multiselect Filter mit "Alle" Option.
     
@@ -57,12 +124,16 @@ def handle_smart_filter(selected: list, previous: list, all_options: list, key:
     """
     # Wenn leer, setze "Alle"
     if not selected:
-        return ["Alle"]
+        return [ALLE]
+    
+    # Mitgliedschaft von "Alle" nur einmal prüfen
+    has_alle_selected = ALLE in selected
+    has_alle_previous = ALLE in previous
     
     # Wenn "Alle" in selected UND "Alle" war vorher auch ausgewählt UND es gibt andere Optionen
     # → Entferne "Alle", behalte die anderen
-    if "Alle" in selected and "Alle" in previous and len(selected) > 1:
-        result = [s for s in selected if s != "Alle"]
+    if has_alle_selected and has_alle_previous and len(selected) > 1:
+        result = [s for s in selected if s != ALLE]
         # Wenn nach Entfernen leer, behalte zumindest die erste Option
         if not result:
             result = [selected[1]] if len(selected) > 1 else selected
@@ -70,182 +141,120 @@ def handle_smart_filter(selected: list, previous: list, all_options: list, key:
     
     # Wenn "Alle" in selected UND "Alle" war vorher NICHT ausgewählt
     # → "Alle" ersetzt alles
-    if "Alle" in selected and "Alle" not in previous:
-        return ["Alle"]
+    if has_alle_selected and not has_alle_previous:
+        return [ALLE]
     
     # Sonst behalte selected wie es ist
     return selected
 
 
+def _apply_smart_filter(key: str) -> None:
+    """on_change-Callback: wendet handle_smart_filter auf den Widget-Zustand an"""
+    value_key = f"{key}_value"
+    processed = handle_smart_filter(st.session_state[key], st.session_state.get(value_key, (ALLE,)), [], key)
+    st.session_state[key] = processed
+    # Vorheriger Wert wird nur gelesen, daher als unveränderliches Tupel speichern
+    st.session_state[value_key] = tuple(processed)
+
+
+def _smart_multiselect(label: str, options: list[str], key: str) -> list[str]:
+    """Multiselect mit "Alle"-Option und Smart-Filter-Logik"""
+    all_options = [ALLE] + options
+    # Zustand nur initialisieren bzw. bereinigen, wenn nötig (Optionen können sich zwischen Reruns ändern)
+    current = st.session_state.get(key)
+    if current is None or not set(current).issubset(all_options):
+        current = [v for v in current or () if v in all_options] or [ALLE]
+        st.session_state[key] = current
+        st.session_state[f"{key}_value"] = tuple(current)
+    return st.multiselect(label, options=all_options, key=key, on_change=_apply_smart_filter, args=(key,))
+
+
 def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get_cached_capacity=None):
     """Rendert die Vorhersagen-Seite"""
     st.markdown("### 5-15 Minuten Vorhersagen")
     
-    # Hole alle Vorhersagen - verwende Background-Daten für sofortigen Zugriff
-    if 'background_data' in st.session_state and st.session_state.background_data:
-        all_predictions = st.session_state.background_data.get('predictions', [])
-    else:
-        all_predictions = _get_predictions_cached(db, 15)  # Fallback: Gecacht
-    all_predictions = [p for p in all_predictions if p['prediction_type'] in ['patient_arrival', 'bed_demand'] and 5 <= p['time_horizon_minutes'] <= 15]
+    # Hole alle Vorhersagen - verwende Background-Daten für sofortigen Zugriff.
+    # background_data ist nach dem App-Start immer gesetzt; fehlen dort Vorhersagen
+    # (z.B. fehlgeschlagene Batch-Query), greift der gecachte DB-Abruf.
+    bg_data = st.session_state.get('background_data') or {}
+    all_predictions = bg_data.get('predictions') or _get_predictions_cached(db, 15)
+    
+    # Typ-/Horizont-Vorfilter und eindeutige Filterwerte in einem einzigen Durchlauf
+    shown_predictions = []
+    depts, types, times = set(), set(), set()
+    for p in all_predictions:
+        if p['prediction_type'] in ALLOWED_PRED_TYPES and 5 <= p['time_horizon_minutes'] <= 15:
+            shown_predictions.append(p)
+            depts.add(p.get('department', 'N/A'))
+            types.add(p['prediction_type'])
+            times.add(p['time_horizon_minutes'])
+    all_predictions = shown_predictions
     
     predictions = []
     
     if all_predictions:
-        # Bereite Daten für Filter vor - verwende zentrales Mapping
-        from utils import get_department_name_mapping
-        dept_map_base = get_department_name_mapping()
-        
-        # dept_map_base enthält bereits English -> Deutsch Mapping
-        # Verwende es direkt für die Anzeige
-        dept_map_display = dept_map_base.copy()
-        
-        # Erstelle Reverse-Mapping (Deutsch -> English) für Filter-Logik
-        dept_map_filter = {de_name: code for code, de_name in dept_map_base.items()}
-        
-        pred_type_map = {
-            'patient_arrival': 'Patientenzugang',
-            'bed_demand': 'Bettenbedarf',
-        }
-        
-        # Extrahiere eindeutige Werte für Filter
-        unique_departments = sorted(list(set([p.get('department', 'N/A') for p in all_predictions])))
-        # Übersetze Department-Codes zu deutschen Namen für Dropdown
-        departments_de = [dept_map_display.get(d, d) for d in unique_departments]
-        # Mapping für Filter: Deutsch -> English Code
-        department_display_map = dict(zip(departments_de, unique_departments))
-        
-        unique_types = sorted(list(set([p['prediction_type'] for p in all_predictions])))
-        types_de = [pred_type_map.get(t, t.replace('_', ' ').title()) for t in unique_types]
-        type_display_map = dict(zip(types_de, unique_types))
-        
-        unique_times = sorted(list(set([p['time_horizon_minutes'] for p in all_predictions])))
-        times_display = [f"{t} Minuten" for t in unique_times]
-        time_display_map = dict(zip(times_display, unique_times))
+        # Mapping für Filter (Deutsch -> English Code) in einem Durchlauf aufbauen;
+        # die Dropdown-Optionen sind seine Schlüssel in sortierter Reihenfolge
+        department_display_map = {DEPT_MAP.get(d, d): d for d in sorted(depts)}
+        departments_de = list(department_display_map)
         
-        # Session State Initialisierung für Filter
-        dept_key = "pred_filter_dept"
-        type_key = "pred_filter_type"
-        time_key = "pred_filter_time"
-        dept_value_key = "pred_filter_dept_value"
-        type_value_key = "pred_filter_type_value"
-        time_value_key = "pred_filter_time_value"
+        type_display_map = {PRED_TYPE_MAP.get(t, t.replace('_', ' ').title()): t for t in sorted(types)}
+        types_de = list(type_display_map)
         
-        # Initialisiere Werte falls nicht vorhanden
-        if dept_value_key not in st.session_state:
-            st.session_state[dept_value_key] = ["Alle"]
-        if type_value_key not in st.session_state:
-            st.session_state[type_value_key] = ["Alle"]
-        if time_value_key not in st.session_state:
-            st.session_state[time_value_key] = ["Alle"]
+        time_display_map = {f"{t} Minuten": t for t in sorted(times)}
+        times_display = list(time_display_map)
         
-        # Filter-Spalten
+        # Filter-Spalten: Smart-Filter-Logik läuft im on_change-Callback, der den Widget-Zustand
+        # vor dem Rerun korrigiert (kein zusätzliches st.rerun() nötig)
         col1, col2, col3 = st.columns(3)
         with col1:
-            selected_depts_de = st.multiselect(
-                "Abteilung",
-                options=["Alle"] + departments_de,
-                default=st.session_state[dept_value_key],
-                key=dept_key
-            )
-            # Smart-Filter-Logik anwenden
-            processed_depts = handle_smart_filter(
-                selected_depts_de, 
-                st.session_state[dept_value_key], 
-                ["Alle"] + departments_de, 
-                dept_key
-            )
-            if processed_depts != selected_depts_de:
-                st.session_state[dept_value_key] = processed_depts
-                st.rerun()
-            else:
-                st.session_state[dept_value_key] = selected_depts_de
-            
+            selected_depts_de = _smart_multiselect("Abteilung", departments_de, "pred_filter_dept")
         with col2:
-            selected_types_de = st.multiselect(
-                "Kategorie",
-                options=["Alle"] + types_de,
-                default=st.session_state[type_value_key],
-                key=type_key
-            )
-            # Smart-Filter-Logik anwenden
-            processed_types = handle_smart_filter(
-                selected_types_de, 
-                st.session_state[type_value_key], 
-                ["Alle"] + types_de, 
-                type_key
-            )
-            if processed_types != selected_types_de:
-                st.session_state[type_value_key] = processed_types
-                st.rerun()
-            else:
-                st.session_state[type_value_key] = selected_types_de
-            
+            selected_types_de = _smart_multiselect("Kategorie", types_de, "pred_filter_type")
         with col3:
-            selected_times_display = st.multiselect(
-                "Zeithorizont",
-                options=["Alle"] + times_display,
-                default=st.session_state[time_value_key],
-                key=time_key
-            )
-            # Smart-Filter-Logik anwenden
-            processed_times = handle_smart_filter(
-                selected_times_display, 
-                st.session_state[time_value_key], 
-                ["Alle"] + times_display, 
-                time_key
-            )
-            if processed_times != selected_times_display:
-                st.session_state[time_value_key] = processed_times
-                st.rerun()
-            else:
-                st.session_state[time_value_key] = selected_times_display
+            selected_times_display = _smart_multiselect("Zeithorizont", times_display, "pred_filter_time")
         
         st.markdown("")  # Spacing
         
-        # Filter anwenden
-        predictions = all_predictions.copy()
-        
-        # Abteilungsfilter
-        if "Alle" not in selected_depts_de:
-            selected_depts = [department_display_map[d] for d in selected_depts_de]
-            predictions = [p for p in predictions if p.get('department', 'N/A') in selected_depts]
-        
-        # Kategoriefilter
-        if "Alle" not in selected_types_de:
-            selected_types = [type_display_map[t] for t in selected_types_de]
-            predictions = [p for p in predictions if p['prediction_type'] in selected_types]
-        
-        # Zeitfilter
-        if "Alle" not in selected_times_display:
-            selected_times = [time_display_map[t] for t in selected_times_display]
-            predictions = [p for p in predictions if p['time_horizon_minutes'] in selected_times]
+        # Filter anwenden (Sets für O(1)-Lookups, ein Durchlauf für alle drei Filter)
+        dept_filter = None if ALLE in selected_depts_de else {department_display_map[d] for d in selected_depts_de}
+        type_filter = None if ALLE in selected_types_de else {type_display_map[t] for t in selected_types_de}
+        time_filter = None if ALLE in selected_times_display else {time_display_map[t] for t in selected_times_display}
+        if dept_filter is None and type_filter is None and time_filter is None:
+            # Kein Filter aktiv: all_predictions ist bereits eine frische Liste dieses Renders,
+            # daher ohne Kopie weiterverwenden (die Sortierung unten verändert keine Background-Daten)
+            predictions = all_predictions
+        else:
+            predictions = [
+                p for p in all_predictions
+                if (dept_filter is None or p.get('department', 'N/A') in dept_filter)
+                and (type_filter is None or p['prediction_type'] in type_filter)
+                and (time_filter is None or p['time_horizon_minutes'] in time_filter)
+            ]
         
         # Sortiere nach Zeithorizont: 5 Minuten zuerst, dann 10, dann 15
-        predictions.sort(key=lambda x: x['time_horizon_minutes'])
+        predictions.sort(key=itemgetter('time_horizon_minutes'))
         
         # Dedupliziere: Nur eine Vorhersage pro Kategorie, Abteilung und Zeit
         # Bevorzuge die erste (mit kürzestem Zeithorizont, bereits sortiert)
-        seen = set()
-        unique_predictions = []
+        unique_predictions = {}
         for pred in predictions:
-            key = (pred['prediction_type'], pred.get('department', 'N/A'), pred['time_horizon_minutes'])
-            if key not in seen:
-                seen.add(key)
-                unique_predictions.append(pred)
-        predictions = unique_predictions
-    
-        capacity_data = get_cached_capacity() if get_cached_capacity else db.get_capacity_overview()
-        capacity_by_dept = {c['department']: c for c in capacity_data}
+            unique_predictions.setdefault((pred['prediction_type'], pred.get('department', 'N/A'), pred['time_horizon_minutes']), pred)
+        predictions = list(unique_predictions.values())
         
         if predictions:
             st.markdown("#### Bevorstehende Vorhersagen")
-            for pred in predictions:
-                confidence_color = "#10B981" if pred['confidence'] > 0.8 else "#F59E0B" if pred['confidence'] > 0.7 else "#EF4444"
+            # Karten sammeln und in einem einzigen Aufruf an das Frontend senden
+            card_parts = []
+            df = pd.DataFrame(predictions)
+            # Farben für alle Karten vektorisiert statt pro Vorhersage berechnen
+            confidence_colors, value_colors = get_prediction_colors(df)
+            for pred, confidence_color, value_color in zip(predictions, confidence_colors, value_colors):
                 pred_type_key = pred['prediction_type']
-                pred_type = pred_type_map.get(pred_type_key, pred_type_key.replace('_', ' ').title())
+                pred_type = PRED_TYPE_MAP.get(pred_type_key, pred_type_key.replace('_', ' ').title())
                 dept = pred.get('department', 'N/A')
                 # Übersetze Department-Code zu deutschem Namen für Anzeige
-                dept_de = dept_map_display.get(dept, dept)
+                dept_de = DEPT_MAP.get(dept, dept)
                 minutes = pred['time_horizon_minutes']
                 if minutes == 1:
                     time_str = f'in {minutes} Minute'
@@ -253,48 +262,26 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
                     time_str = f'in {minutes} Minuten'
                 
                 formatted_value, value_description = format_prediction_value(pred_type_key, pred['predicted_value'])
-                value_color = get_prediction_value_color(pred_type_key, pred['predicted_value'])
-                
-                html_card = f"""<div style="background: white; padding: 1rem; border-radius: 8px; margin-bottom: 0.5rem; border: 1px solid #e5e7eb;">
-    <div style="display: flex; justify-content: space-between; align-items: flex-start;">
-        <div style="flex: 1;">
-            <strong style="font-size: 0.95rem;">{pred_type}</strong>
-            <div style="color: #6b7280; font-size: 0.875rem; margin-top: 0.25rem;">{dept_de} • {time_str}</div>
-        </div>
-        <div style="text-align: right; margin-left: 1rem;">
-            <div style="font-size: 1.5rem; font-weight: 700; color: {value_color};">{formatted_value}</div>
-            <div style="font-size: 0.75rem; color: #6b7280; margin-top: 0.25rem;">{value_description}</div>
-            <div style="font-size: 0.75rem; color: {confidence_color}; margin-top: 0.25rem;">{pred['confidence']*100:.0f}% Vertrauen</div>
-        </div>
-    </div>
-</div>"""
                 
-                st.markdown(html_card, unsafe_allow_html=True)
+                card_parts.append(_PRED_CARD_TMPL.format(
+                    pred_type=pred_type,
+                    dept_de=dept_de,
+                    time_str=time_str,
+                    value_color=value_color,
+                    formatted_value=formatted_value,
+                    value_description=value_description,
+                    confidence_color=confidence_color,
+                    confidence_pct=pred['confidence'] * 100,
+                ))
+            st.markdown("".join(card_parts), unsafe_allow_html=True)
             
             st.markdown("### Prognose-Vertrauen nach Zeithorizont")
             
-            df = pd.DataFrame(predictions)
             if len(df) > 0:
-                df_plot = df.copy()
-                df_plot['Vorhersagetyp'] = df_plot['prediction_type'].map(lambda x: pred_type_map.get(x, x.replace('_', ' ').title()))
-                # Ensure size values are always positive for scatter plot
-                df_plot['size_value'] = df_plot['predicted_value'].apply(lambda x: max(1, abs(x)))
-                fig = px.scatter(
-                    df_plot,
-                    x='time_horizon_minutes',
-                    y='confidence',
-                    size='size_value',
-                    color='Vorhersagetyp',
-                    hover_data=['department', 'predicted_value'],
-                    title=""
-                )
-                fig.update_layout(
-                    height=400,
-                    xaxis_title="Zeithorizont (Minuten)",
-                    yaxis_title="Vertrauen",
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)'
-                )
+                fig = _build_prediction_figure(tuple(
+                    (p['prediction_type'], p['time_horizon_minutes'], p['confidence'], p['predicted_value'], p.get('department', 'N/A'))
+                    for p in predictions
+                ))
                 st.plotly_chart(fig, use_container_width=True)
         else:
             st.markdown(render_empty_state("🔮", "Keine Vorhersagen gefunden", "Bitte passen Sie die Filter an, um Vorhersagen anzuzeigen"), unsafe_allow_html=True)
@@ -2,245 +2,205 @@
 Seitenmodul für Empfehlungen
 """
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import pandas as pd
-import random
-from utils import (
-    format_time_ago, get_severity_color, get_priority_color, get_risk_color,
-    get_status_color, calculate_inventory_status, calculate_capacity_status,
-    format_duration_minutes, get_department_color, get_system_status,
-    get_metric_severity_for_load, get_metric_severity_for_count, get_metric_severity_for_free,
-    get_explanation_score_color
-)
-from ui.components import render_badge, render_empty_state
+import time
+from utils import format_time_ago, get_priority_color
+from ui.components import render_badge
+
+
+# Statische Übersetzungen einmal beim Import aufbauen statt bei jedem Rerun
+PRIORITY_DE_MAP = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
+VERTRAUEN_MAP = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
+
+REC_TYPE_MAP = {
+    'capacity': 'Kapazität',
+    'staffing': 'Personal',
+    'inventory': 'Inventar',
+    'general': 'Allgemein',
+}
+
+# Prioritäts-Badges und -Farben einmal beim Import vorberechnen
+_BADGE_HTML = {p: render_badge(p_de.upper(), p) for p, p_de in PRIORITY_DE_MAP.items()}
+_PRIORITY_COLOR = {p: get_priority_color(p) for p in PRIORITY_DE_MAP}
+
+
+# HTML-Vorlagen für Empfehlungskarten (mit .format_map gefüllt)
+_REC_CARD_TMPL = """<div style="background: white; padding: 1.5rem; border-radius: 8px; margin-bottom: 1rem; border-left: 4px solid {priority_color}; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
+    <div style="margin-bottom: 1rem;">
+        <h4 style="margin: 0 0 0.5rem 0; color: #1f2937;">{title}</h4>
+        <div style="margin-bottom: 0.75rem;">{badge_html}</div>
+    </div>
+    <div style="background: #f9fafb; padding: 1rem; border-radius: 6px; margin-bottom: 0.75rem;">
+        <div style="margin-bottom: 0.75rem;">
+            <strong style="color: #1f2937; font-size: 0.875rem;">Maßnahme:</strong>
+            <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{action}</p>
+        </div>
+        <div style="margin-bottom: 0.75rem;">
+            <strong style="color: #1f2937; font-size: 0.875rem;">Begründung:</strong>
+            <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{reason}</p>
+        </div>
+        <div style="margin-bottom: 0.75rem;">
+            <strong style="color: #1f2937; font-size: 0.875rem;">Erwartete Auswirkung:</strong>
+            <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{expected_impact}</p>
+        </div>
+        <div>
+            <strong style="color: #1f2937; font-size: 0.875rem;">Sicherheits-Hinweis:</strong>
+            <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{safety_note}</p>
+        </div>
+    </div>
+    <div style="display: flex; gap: 0.5rem; flex-wrap: wrap; margin-bottom: 0.75rem;">
+        {impact_tags_html}
+    </div>
+    <div style="color: #6b7280; font-size: 0.8125rem;">
+        {time_ago}
+    </div>
+    <details style="margin-top: 0.5rem;">
+        <summary style="cursor: pointer; color: #4b5563;">Warum vorgeschlagen?</summary>
+        <div style="background: #f9fafb; padding: 1rem; border-radius: 6px; border-left: 3px solid {priority_color}; margin-top: 0.5rem;">
+            <div style="color: #4b5563; line-height: 1.6;">{explanation}</div>
+        </div>
+    </details>
+</div>"""
+
+_REC_CARD_LEGACY_TMPL = """<div style="background: white; padding: 1.5rem; border-radius: 8px; margin-bottom: 1rem; border-left: 4px solid {priority_color}; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
+    <div style="display: flex; align-items: start; gap: 0.75rem; margin-bottom: 1rem;">
+        {badge_html}
+        <div style="flex: 1;">
+            <h4 style="margin: 0 0 0.5rem 0; color: #1f2937;">{title}</h4>
+            <p style="color: #6b7280; margin: 0; line-height: 1.6;">{description}</p>
+        </div>
+    </div>
+    <div style="display: flex; gap: 0.5rem; flex-wrap: wrap; margin-bottom: 0.75rem;">
+        {impact_tags_html}
+    </div>
+    <div style="color: #6b7280; font-size: 0.8125rem;">
+        {time_ago}
+    </div>
+    <details style="margin-top: 0.5rem;">
+        <summary style="cursor: pointer; color: #4b5563;">Warum vorgeschlagen?</summary>
+        <div style="background: #f9fafb; padding: 1rem; border-radius: 6px; border-left: 3px solid {priority_color}; margin-top: 0.5rem;">
+            <div style="color: #4b5563; line-height: 1.6;">{explanation}</div>
+        </div>
+    </details>
+</div>"""
+
+# Anzahl der Empfehlungen, die pro "Mehr anzeigen"-Schritt gerendert werden
+REC_PAGE_SIZE = 20
+
+# Erklärungstexte für Empfehlungen ohne Begründung (nach Empfehlungstyp)
+REC_EXPLANATIONS = {
+    'capacity': 'Diese Empfehlung wurde basierend auf aktueller Kapazitätsauslastung generiert. Sie berücksichtigt Bettenverfügbarkeit, erwartete Entlassungen und aktuelle Belegung.',
+    'staffing': 'Diese Empfehlung wurde basierend auf Personalauslastung und aktuellen Arbeitsbelastungen generiert. Sie berücksichtigt Schichtpläne und verfügbare Ressourcen.',
+    'inventory': 'Diese Empfehlung wurde basierend auf Inventarständen und Verbrauchsprognosen generiert. Sie berücksichtigt aktuelle Bestände und erwarteten Bedarf.',
+    'general': 'Diese Empfehlung wurde basierend auf allgemeinen Systemmetriken und Trends generiert.'
+}
+
+_EXPLANATION_TMPL = "<strong>Begründung:</strong> {reason}<br><br><strong>Erwartete Auswirkung:</strong> {expected_impact}"
+
+_IMPACT_TAG_TMPL = '<span class="badge" style="background: #e5e7eb; color: #4b5563; padding: 0.25rem 0.5rem; border-radius: 4px; font-size: 0.75rem;">{}</span>'
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _get_pending_recommendations_cached(_db, pending_rev):
+    """Gecachte ausstehende Empfehlungen (neu geladen, sobald sich db.pending_rev ändert – auch durch andere Sessions)"""
+    return _db.get_pending_recommendations()
+
+
+def _render_show_more(state_key, total, shown):
+    """Rendert einen "Mehr anzeigen"-Button, solange nicht alle Empfehlungen sichtbar sind"""
+    remaining = total - shown
+    if remaining <= 0:
+        return
+    if st.button(f"Mehr anzeigen ({remaining} weitere)", key=f"{state_key}_more", use_container_width=True):
+        st.session_state[state_key] = shown + REC_PAGE_SIZE
+        st.rerun()
+
+
+def _build_impact_tags_html(department, rec_type, explanation_score):
+    """Baut das HTML der Impact-Tags aus Abteilung, Empfehlungstyp und Vertrauen"""
+    impact_tags = []
+    if department:
+        impact_tags.append(department)
+    if rec_type:
+        impact_tags.append(REC_TYPE_MAP.get(rec_type, rec_type.replace('_', ' ').title()))
+    if explanation_score:
+        explanation_score_de = VERTRAUEN_MAP.get(explanation_score, explanation_score)
+        impact_tags.append(f"Vertrauen: {explanation_score_de.upper()}")
+    return ' '.join(_IMPACT_TAG_TMPL.format(tag) for tag in impact_tags)
+
+
+def _build_rec_card_html(rec, tag_cache, time_ago_cache):
+    """Baut das HTML einer Empfehlungskarte"""
+    priority = rec['priority']
+    priority_color = _PRIORITY_COLOR.get(priority) or get_priority_color(priority)
+    badge_html = _BADGE_HTML.get(priority) or render_badge(PRIORITY_DE_MAP.get(priority, priority).upper(), priority)
+
+    # Impact-Tags hängen nur von (Abteilung, Typ, Vertrauen) ab: je Kombination einmal bauen
+    tag_key = (rec.get('department'), rec.get('rec_type'), rec.get('explanation_score'))
+    impact_tags_html = tag_cache.get(tag_key)
+    if impact_tags_html is None:
+        impact_tags_html = tag_cache[tag_key] = _build_impact_tags_html(*tag_key)
+
+    # Relative Zeit je Zeitstempel nur einmal pro Render berechnen (Batch-Empfehlungen teilen ihren Zeitstempel)
+    timestamp = rec['timestamp']
+    time_ago = time_ago_cache.get(timestamp)
+    if time_ago is None:
+        time_ago = time_ago_cache[timestamp] = format_time_ago(timestamp)
+
+    # Neues Template-Format verwenden, falls verfügbar
+    action = rec.get('action')
+    reason = rec.get('reason')
+    card_ctx = {
+        'priority_color': priority_color,
+        'badge_html': badge_html,
+        'title': rec['title'],
+        'impact_tags_html': impact_tags_html,
+        'time_ago': time_ago,
+    }
+
+    if action and reason:
+        card_ctx.update(
+            action=action,
+            reason=reason,
+            expected_impact=rec.get('expected_impact', 'N/A'),
+            safety_note=rec.get('safety_note', 'N/A'),
+        )
+        card_ctx['explanation'] = _EXPLANATION_TMPL.format_map(card_ctx)
+        return _REC_CARD_TMPL.format_map(card_ctx)
+    else:
+        # Fallback to old format
+        card_ctx['description'] = rec['description']
+        card_ctx['explanation'] = REC_EXPLANATIONS.get(rec.get('rec_type', 'general'), REC_EXPLANATIONS['general'])
+        return _REC_CARD_LEGACY_TMPL.format_map(card_ctx)
+
+
+def _build_rec_cards_html(recommendations, minute):
+    """Baut das HTML aller Empfehlungskarten als einen String (unveränderte Karten aus dem Session-Cache)"""
+    # Karten-HTML je (ID, Zeitstempel, Minute) wiederverwenden; die Minute steckt im Schlüssel,
+    # weil die relative Zeitangabe der Karte minütlich wechselt
+    previous_cache = st.session_state.get('rec_html_cache', {})
+    card_cache = {}
+    tag_cache = {}
+    time_ago_cache = {}
+    html_parts = []
+    for rec in recommendations:
+        ckey = (rec['id'], rec['timestamp'], minute)
+        card_html = previous_cache.get(ckey)
+        if card_html is None:
+            card_html = _build_rec_card_html(rec, tag_cache, time_ago_cache)
+        card_cache[ckey] = card_html
+        html_parts.append(card_html)
+    # Nur die Karten dieses Renders behalten, damit der Cache nicht wächst
+    st.session_state['rec_html_cache'] = card_cache
+    return "\n".join(html_parts)
 
 
 def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get_cached_capacity=None):
     """Rendert die Empfehlungen-Seite"""
     
     # Empfehlungen abrufen
-    all_recommendations = db.get_pending_recommendations()
+    all_recommendations = _get_pending_recommendations_cached(db, db.pending_rev)
     
-    if all_recommendations:
-        # German translation maps
-        priority_de_map = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
-        severity_de_map = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
-        vertrauen_map = {'high': 'hoch', 'medium': 'mittel', 'low': 'niedrig'}
-        
-        # Filter
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            # Priority filter
-            unique_priorities = sorted(list(set([r.get('priority', 'medium') for r in all_recommendations])))
-            priorities_de = [priority_de_map.get(p, p) for p in unique_priorities]
-            priority_reverse_map = dict(zip(priorities_de, unique_priorities))
-            priorities_de_display = ["Alle"] + priorities_de
-            selected_priority_de = st.selectbox("Priorität", priorities_de_display, key="rec_priority")
-            selected_priority = None if selected_priority_de == "Alle" else priority_reverse_map.get(selected_priority_de, selected_priority_de)
-        
-        with col2:
-            # Department filter
-            unique_depts = sorted(list(set([r.get('department', 'N/A') for r in all_recommendations if r.get('department')])))
-            depts_de_display = ["Alle"] + unique_depts
-            selected_dept = st.selectbox("Abteilung", depts_de_display, key="rec_dept")
-            selected_dept = None if selected_dept == "Alle" else selected_dept
-        
-        with col3:
-            # Rec type filter
-            unique_rec_types = sorted(list(set([r.get('rec_type', 'general') for r in all_recommendations])))
-            rec_type_map = {
-                'capacity': 'Kapazität',
-                'staffing': 'Personal',
-                'inventory': 'Inventar',
-                'general': 'Allgemein',
-            }
-            rec_types_de = [rec_type_map.get(rt, rt.replace('_', ' ').title()) for rt in unique_rec_types]
-            rec_type_reverse_map = dict(zip(rec_types_de, unique_rec_types))
-            rec_types_de_display = ["Alle"] + rec_types_de
-            selected_rec_type_de = st.selectbox("Typ", rec_types_de_display, key="rec_type")
-            selected_rec_type = None if selected_rec_type_de == "Alle" else rec_type_reverse_map.get(selected_rec_type_de, selected_rec_type_de)
-        
-        with col4:
-            # Status filter (all recommendations are pending, but we can filter by explanation_score)
-            unique_scores = sorted(list(set([r.get('explanation_score', 'medium') for r in all_recommendations if r.get('explanation_score')])))
-            scores_de = [vertrauen_map.get(s, s) for s in unique_scores]
-            score_reverse_map = dict(zip(scores_de, unique_scores))
-            scores_de_display = ["Alle"] + scores_de
-            selected_score_de = st.selectbox("Vertrauen", scores_de_display, key="rec_score")
-            selected_score = None if selected_score_de == "Alle" else score_reverse_map.get(selected_score_de, selected_score_de)
-        
-        # Filter recommendations
-        filtered_recommendations = all_recommendations
-        if selected_priority:
-            filtered_recommendations = [r for r in filtered_recommendations if r.get('priority') == selected_priority]
-        if selected_dept:
-            filtered_recommendations = [r for r in filtered_recommendations if r.get('department') == selected_dept]
-        if selected_rec_type:
-            filtered_recommendations = [r for r in filtered_recommendations if r.get('rec_type') == selected_rec_type]
-        if selected_score:
-            filtered_recommendations = [r for r in filtered_recommendations if r.get('explanation_score') == selected_score]
-        
-        st.markdown("")  # Abstand
-        
-        if filtered_recommendations:
-            for rec in filtered_recommendations:
-                priority_color = get_priority_color(rec['priority'])
-                priority_de = priority_de_map.get(rec['priority'], rec['priority'])
-                badge_html = render_badge(priority_de.upper(), rec['priority'])
-
-                # Impact tags (extract from department and rec_type)
-                impact_tags = []
-                if rec.get('department'):
-                    impact_tags.append(rec['department'])
-                if rec.get('rec_type'):
-                    rec_type_map = {
-                        'capacity': 'Kapazität',
-                        'staffing': 'Personal',
-                        'inventory': 'Inventar',
-                        'general': 'Allgemein',
-                    }
-                    rec_type = rec['rec_type']
-                    impact_tags.append(rec_type_map.get(rec_type, rec_type.replace('_', ' ').title()))
-                
-                if rec.get('explanation_score'):
-                    explanation_score_de = vertrauen_map.get(rec['explanation_score'], rec['explanation_score'])
-                    explanation_color = get_explanation_score_color(rec['explanation_score'])
-                    impact_tags.append(f"Vertrauen: {explanation_score_de.upper()}")
-
-                # Neues Template-Format verwenden, falls verfügbar
-                has_new_format = rec.get('action') and rec.get('reason')
-
-                if has_new_format:
-                    # Build impact tags HTML
-                    impact_tags_html = ' '.join([f'<span class="badge" style="background: #e5e7eb; color: #4b5563; padding: 0.25rem 0.5rem; border-radius: 4px; font-size: 0.75rem;">{tag}</span>' for tag in impact_tags])
-                    
-                    st.markdown(f"""
-                    <div style="background: white; padding: 1.5rem; border-radius: 8px; margin-bottom: 1rem; border-left: 4px solid {priority_color}; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
-                        <div style="margin-bottom: 1rem;">
-                            <h4 style="margin: 0 0 0.5rem 0; color: #1f2937;">{rec['title']}</h4>
-                            <div style="margin-bottom: 0.75rem;">{badge_html}</div>
-                        </div>
-                        <div style="background: #f9fafb; padding: 1rem; border-radius: 6px; margin-bottom: 0.75rem;">
-                            <div style="margin-bottom: 0.75rem;">
-                                <strong style="color: #1f2937; font-size: 0.875rem;">Maßnahme:</strong>
-                                <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{rec.get('action', 'N/A')}</p>
-                            </div>
-                            <div style="margin-bottom: 0.75rem;">
-                                <strong style="color: #1f2937; font-size: 0.875rem;">Begründung:</strong>
-                                <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{rec.get('reason', 'N/A')}</p>
-                            </div>
-                            <div style="margin-bottom: 0.75rem;">
-                                <strong style="color: #1f2937; font-size: 0.875rem;">Erwartete Auswirkung:</strong>
-                                <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{rec.get('expected_impact', 'N/A')}</p>
-                            </div>
-                            <div>
-                                <strong style="color: #1f2937; font-size: 0.875rem;">Sicherheits-Hinweis:</strong>
-                                <p style="margin: 0.25rem 0 0 0; color: #4b5563; line-height: 1.6;">{rec.get('safety_note', 'N/A')}</p>
-                            </div>
-                        </div>
-                        <div style="display: flex; gap: 0.5rem; flex-wrap: wrap; margin-bottom: 0.75rem;">
-                            {impact_tags_html}
-                        </div>
-                        <div style="color: #6b7280; font-size: 0.8125rem;">
-                            {format_time_ago(rec['timestamp'])}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    # Fallback to old format
-                    impact_tags_html = ' '.join([f'<span class="badge" style="background: #e5e7eb; color: #4b5563; padding: 0.25rem 0.5rem; border-radius: 4px; font-size: 0.75rem;">{tag}</span>' for tag in impact_tags])
-                    
-                    st.markdown(f"""
-                    <div style="background: white; padding: 1.5rem; border-radius: 8px; margin-bottom: 1rem; border-left: 4px solid {priority_color}; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
-                        <div style="display: flex; align-items: start; gap: 0.75rem; margin-bottom: 1rem;">
-                            {badge_html}
-                            <div style="flex: 1;">
-                                <h4 style="margin: 0 0 0.5rem 0; color: #1f2937;">{rec['title']}</h4>
-                                <p style="color: #6b7280; margin: 0; line-height: 1.6;">{rec['description']}</p>
-                            </div>
-                        </div>
-                        <div style="display: flex; gap: 0.5rem; flex-wrap: wrap; margin-bottom: 0.75rem;">
-                            {impact_tags_html}
-                        </div>
-                        <div style="color: #6b7280; font-size: 0.8125rem;">
-                            {format_time_ago(rec['timestamp'])}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Expandable "Why suggested?" section
-                with st.expander("Warum vorgeschlagen?", expanded=False):
-                    if has_new_format:
-                        explanation = f"""
-                        <strong>Begründung:</strong> {rec.get('reason', 'N/A')}<br><br>
-                        <strong>Erwartete Auswirkung:</strong> {rec.get('expected_impact', 'N/A')}<br><br>
-                        """
-                    else:
-                        rec_type = rec.get('rec_type', 'general')
-                        explanations = {
-                            'capacity': 'Diese Empfehlung wurde basierend auf aktueller Kapazitätsauslastung generiert. Sie berücksichtigt Bettenverfügbarkeit, erwartete Entlassungen und aktuelle Belegung.',
-                            'staffing': 'Diese Empfehlung wurde basierend auf Personalauslastung und aktuellen Arbeitsbelastungen generiert. Sie berücksichtigt Schichtpläne und verfügbare Ressourcen.',
-                            'inventory': 'Diese Empfehlung wurde basierend auf Inventarständen und Verbrauchsprognosen generiert. Sie berücksichtigt aktuelle Bestände und erwarteten Bedarf.',
-                            'general': 'Diese Empfehlung wurde basierend auf allgemeinen Systemmetriken und Trends generiert.'
-                        }
-                        explanation = explanations.get(rec_type, explanations['general'])
-                    
-                    st.markdown(f"""
-                    <div style="background: #f9fafb; padding: 1rem; border-radius: 6px; border-left: 3px solid {priority_color};">
-                        <div style="color: #4b5563; line-height: 1.6;">{explanation}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Annehmen/Ablehnen-Buttons
-                col1, col2, col3 = st.columns([4, 1, 1])
-                with col1:
-                    action_text = st.text_input(
-                        "Maßnahme / Begründung",
-                        key=f"rec_action_{rec['id']}",
-                        placeholder="Bitte ergreifende Maßnahme oder Ablehnungsgrund eingeben"
-                    )
-                with col2:
-                    st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
-                    accept_clicked = st.button("✅ Annehmen", key=f"rec_accept_{rec['id']}", use_container_width=True)
-                    if accept_clicked:
-                        if action_text:
-                            db.accept_recommendation(rec['id'], action_text)
-                            # Simulationseffekt basierend auf Empfehlungstyp anwenden
-                            rec_type = rec.get('rec_type', '')
-                            if 'staffing' in rec_type.lower() or 'reassign' in rec.get('action', '').lower():
-                                sim.apply_recommendation_effect(rec_type, 'staffing_reassignment', duration_minutes=30)
-                            elif 'capacity' in rec_type.lower() or 'overflow' in rec.get('action', '').lower() or 'bed' in rec.get('action', '').lower():
-                                sim.apply_recommendation_effect(rec_type, 'open_overflow_beds', duration_minutes=45)
-                            elif 'room' in rec_type.lower() or 'room' in rec.get('action', '').lower():
-                                sim.apply_recommendation_effect(rec_type, 'room_allocation', duration_minutes=30)
-                            st.success("✅ Empfehlung angenommen")
-                            st.rerun()
-                        else:
-                            st.warning("⚠️ Bitte Maßnahme eingeben")
-                with col3:
-                    st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
-                    reject_clicked = st.button("❌ Ablehnen", key=f"rec_reject_{rec['id']}", use_container_width=True)
-                    if reject_clicked:
-                        if action_text:
-                            db.reject_recommendation(rec['id'], action_text)
-                            st.info("❌ Empfehlung abgelehnt")
-                            st.rerun()
-                        else:
-                            st.warning("⚠️ Bitte Ablehnungsgrund eingeben")
-                
-                st.markdown("---")
-        else:
-            st.markdown("""
-            <div class="empty-state">
-                <div class="empty-state-icon">🔍</div>
-                <div class="empty-state-title">Keine Empfehlungen gefunden</div>
-                <div class="empty-state-text">Keine Empfehlungen entsprechen den ausgewählten Filtern</div>
-            </div>
-            """, unsafe_allow_html=True)
-    else:
+    if not all_recommendations:
         st.markdown("""
         <div class="empty-state">
             <div class="empty-state-icon">✅</div>
@@ -248,4 +208,141 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
             <div class="empty-state-text">Alle Empfehlungen wurden überprüft</div>
         </div>
         """, unsafe_allow_html=True)
-
+        return
+    
+    # Eindeutige Filterwerte für alle vier Dropdowns in einem Durchlauf sammeln
+    prios, depts, rtypes, scores = set(), set(), set(), set()
+    for r in all_recommendations:
+        prios.add(r.get('priority', 'medium'))
+        if r.get('department'):
+            depts.add(r['department'])
+        rtypes.add(r.get('rec_type', 'general'))
+        if r.get('explanation_score'):
+            scores.add(r['explanation_score'])
+    
+    # Filter
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        # Priority filter
+        unique_priorities = sorted(prios)
+        priorities_de = [PRIORITY_DE_MAP.get(p, p) for p in unique_priorities]
+        priority_reverse_map = dict(zip(priorities_de, unique_priorities))
+        priorities_de_display = ["Alle"] + priorities_de
+        selected_priority_de = st.selectbox("Priorität", priorities_de_display, key="rec_priority")
+        selected_priority = None if selected_priority_de == "Alle" else priority_reverse_map.get(selected_priority_de, selected_priority_de)
+    
+    with col2:
+        # Department filter
+        unique_depts = sorted(depts)
+        depts_de_display = ["Alle"] + unique_depts
+        selected_dept = st.selectbox("Abteilung", depts_de_display, key="rec_dept")
+        selected_dept = None if selected_dept == "Alle" else selected_dept
+    
+    with col3:
+        # Rec type filter
+        unique_rec_types = sorted(rtypes)
+        rec_types_de = [REC_TYPE_MAP.get(rt, rt.replace('_', ' ').title()) for rt in unique_rec_types]
+        rec_type_reverse_map = dict(zip(rec_types_de, unique_rec_types))
+        rec_types_de_display = ["Alle"] + rec_types_de
+        selected_rec_type_de = st.selectbox("Typ", rec_types_de_display, key="rec_type")
+        selected_rec_type = None if selected_rec_type_de == "Alle" else rec_type_reverse_map.get(selected_rec_type_de, selected_rec_type_de)
+    
+    with col4:
+        # Status filter (all recommendations are pending, but we can filter by explanation_score)
+        unique_scores = sorted(scores)
+        scores_de = [VERTRAUEN_MAP.get(s, s) for s in unique_scores]
+        score_reverse_map = dict(zip(scores_de, unique_scores))
+        scores_de_display = ["Alle"] + scores_de
+        selected_score_de = st.selectbox("Vertrauen", scores_de_display, key="rec_score")
+        selected_score = None if selected_score_de == "Alle" else score_reverse_map.get(selected_score_de, selected_score_de)
+    
+    # Gefilterte Liste und Karten-HTML wiederverwenden, solange Filter, Datenstand und Minute
+    # (Auflösung von format_time_ago) gleich bleiben – z.B. bei Reruns durch Tippen in den Maßnahmen-Feldern
+    shown_limit = st.session_state.get('rec_shown', REC_PAGE_SIZE)
+    minute = int(time.time() // 60)
+    fkey = (selected_priority, selected_dept, selected_rec_type, selected_score, shown_limit, db.pending_rev, minute)
+    if st.session_state.get('rec_fkey') == fkey:
+        filtered_recommendations, shown_recommendations, html_blob = st.session_state['rec_filtered']
+    else:
+        # Empfehlungen filtern (alle vier Filter in einem Durchlauf)
+        if selected_priority or selected_dept or selected_rec_type or selected_score:
+            filtered_recommendations = [
+                r for r in all_recommendations
+                if (not selected_priority or r.get('priority') == selected_priority)
+                and (not selected_dept or r.get('department') == selected_dept)
+                and (not selected_rec_type or r.get('rec_type') == selected_rec_type)
+                and (not selected_score or r.get('explanation_score') == selected_score)
+            ]
+        else:
+            filtered_recommendations = all_recommendations
+        # Nur die ersten Karten rendern, weitere über "Mehr anzeigen" nachladen
+        shown_recommendations = filtered_recommendations[:shown_limit]
+        html_blob = _build_rec_cards_html(shown_recommendations, minute) if shown_recommendations else ""
+        st.session_state['rec_fkey'] = fkey
+        st.session_state['rec_filtered'] = (filtered_recommendations, shown_recommendations, html_blob)
+    
+    # Keine Treffer: Leerzustand zeigen und vor Abstand, Karten und Bedienelementen abbrechen
+    if not filtered_recommendations:
+        st.markdown("""
+        <div class="empty-state">
+            <div class="empty-state-icon">🔍</div>
+            <div class="empty-state-title">Keine Empfehlungen gefunden</div>
+            <div class="empty-state-text">Keine Empfehlungen entsprechen den ausgewählten Filtern</div>
+        </div>
+        """, unsafe_allow_html=True)
+        return
+    
+    st.markdown("")  # Abstand
+    
+    st.caption(f"{len(shown_recommendations)} von {len(filtered_recommendations)} Empfehlungen")
+    # Erster Durchlauf: alle Karten samt "Warum vorgeschlagen?"-Details in einem einzigen Aufruf senden
+    st.markdown(html_blob, unsafe_allow_html=True)
+    st.markdown("---")
+    
+    # Zweiter Durchlauf: Bedienelemente je Empfehlung
+    for rec in shown_recommendations:
+        # Annehmen/Ablehnen in einem Formular: Eingaben im Textfeld lösen erst beim Absenden einen Rerun aus.
+        # Enter darf nicht absenden – sonst würde eine getippte Ablehnungsbegründung "Annehmen" auslösen
+        with st.form(key=f"rec_form_{rec['id']}", border=False, enter_to_submit=False):
+            col1, col2, col3 = st.columns([4, 1, 1])
+            with col1:
+                action_text = st.text_input(
+                    f"Maßnahme / Begründung: {rec['title']}",
+                    key=f"rec_action_{rec['id']}",
+                    placeholder="Bitte ergreifende Maßnahme oder Ablehnungsgrund eingeben"
+                )
+            with col2:
+                st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
+                accept_clicked = st.form_submit_button("✅ Annehmen", key=f"rec_accept_{rec['id']}", use_container_width=True)
+                if accept_clicked:
+                    if action_text:
+                        db.accept_recommendation(rec['id'], action_text)
+                        # Simulationseffekt basierend auf Empfehlungstyp anwenden
+                        rec_type = rec.get('rec_type', '')
+                        rec_type_lower = rec_type.lower()
+                        action_lower = (rec.get('action') or '').lower()
+                        if 'staffing' in rec_type_lower or 'reassign' in action_lower:
+                            sim.apply_recommendation_effect(rec_type, 'staffing_reassignment', duration_minutes=30)
+                        elif 'capacity' in rec_type_lower or 'overflow' in action_lower or 'bed' in action_lower:
+                            sim.apply_recommendation_effect(rec_type, 'open_overflow_beds', duration_minutes=45)
+                        elif 'room' in rec_type_lower or 'room' in action_lower:
+                            sim.apply_recommendation_effect(rec_type, 'room_allocation', duration_minutes=30)
+                        st.success("✅ Empfehlung angenommen")
+                        st.rerun()
+                    else:
+                        st.warning("⚠️ Bitte Maßnahme eingeben")
+            with col3:
+                st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
+                reject_clicked = st.form_submit_button("❌ Ablehnen", key=f"rec_reject_{rec['id']}", use_container_width=True)
+                if reject_clicked:
+                    if action_text:
+                        db.reject_recommendation(rec['id'], action_text)
+                        st.info("❌ Empfehlung abgelehnt")
+                        st.rerun()
+                    else:
+                        st.warning("⚠️ Bitte Ablehnungsgrund eingeben")
+        
+        st.markdown("---")
+    
+    _render_show_more('rec_shown', len(filtered_recommendations), len(shown_recommendations))
@@ -5,30 +5,178 @@ import streamlit as st
 import random
 import time
 from datetime import datetime, timedelta, timezone, date, time as dt_time
-from zoneinfo import ZoneInfo
+from functools import lru_cache
 from utils import (
     format_time_ago, get_severity_color, get_priority_color, get_risk_color,
     get_status_color, calculate_inventory_status, calculate_capacity_status,
     format_duration_minutes, get_department_color, get_system_status,
     get_metric_severity_for_load, get_metric_severity_for_count, get_metric_severity_for_free,
-    get_explanation_score_color, convert_utc_to_local, LOCAL_TIMEZONE
+    get_explanation_score_color, convert_utc_to_local, LOCAL_TZ, get_department_name_mapping
 )
 from ui.components import render_badge, render_empty_state, render_loading_spinner
 
 
-@st.cache_data(ttl=30)
-def _get_transport_requests_cached(_db):
-    """Gecachte Transportanfragen"""
+# Statusgruppen (englische und deutsche Statuswerte)
+PENDING_STATUSES = frozenset({'pending', 'ausstehend'})
+ACTIVE_STATUSES = frozenset({'in_progress', 'in_bearbeitung'})
+COMPLETED_STATUSES = frozenset({'completed', 'abgeschlossen'})
+
+# Mindestabstand in Sekunden zwischen zwei periodischen Status-Updates
+STATUS_UPDATE_INTERVAL = 10
+
+# Neutrale Verzögerung (kein Aufschlag auf die geplante Zeit)
+_NO_DELAY = timedelta(0)
+
+# Anzahl abgeschlossener Transporte pro Seite im Expander
+TRANSPORT_PAGE_SIZE = 20
+
+# Anzeige-Übersetzungen für Transportkarten einmal beim Import aufbauen
+DEPT_MAP = get_department_name_mapping()
+
+PRIORITY_MAP = {'high': 'HOCH', 'medium': 'MITTEL', 'low': 'NIEDRIG', 'hoch': 'HOCH', 'mittel': 'MITTEL', 'niedrig': 'NIEDRIG'}
+STATUS_MAP = {
+    'pending': 'AUSSTEHEND',
+    'in_progress': 'IN BEARBEITUNG',
+    'completed': 'ABGESCHLOSSEN',
+    'planned': 'GEPLANT',
+    'ausstehend': 'AUSSTEHEND',
+    'in_bearbeitung': 'IN BEARBEITUNG',
+    'abgeschlossen': 'ABGESCHLOSSEN'
+}
+# Badge-Farbe und Anzeigetext je bekanntem Wert (ein Lookup statt Farbfunktion + Übersetzung pro Karte)
+PRIORITY_STYLE = {p: (get_priority_color(p), d) for p, d in PRIORITY_MAP.items()}
+STATUS_STYLE = {s: (get_status_color(s), d) for s, d in STATUS_MAP.items()}
+REQUEST_TYPE_MAP = {
+    'patient': 'Patient',
+    'equipment': 'Gerät',
+    'specimen': 'Probe',
+    'Patient': 'Patient',
+    'Gerät': 'Gerät',
+    'Probe': 'Probe'
+}
+
+# HTML-Vorlage einer Transportkarte (nur die dynamischen Felder werden pro Karte eingesetzt)
+_TRANSPORT_CARD_TMPL = """
+    <div class="{delay_class}" style="background: white; padding: 1rem; border-radius: 8px; margin-bottom: 0.5rem;">
+        <div style="display: flex; justify-content: space-between; align-items: center;">
+            <div style="flex: 1;">
+                <div>
+                    <span class="badge" style="background: {priority_color}; color: white;">{priority_display}</span>
+                    <span class="badge" style="background: {status_color}; color: white; margin-left: 0.5rem;">{status_display}</span>
+                    <strong style="margin-left: 0.5rem;">{request_type_display}</strong>
+                    {details_info}
+                </div>
+                {planned_time_display}
+                {requested_time_info}
+                <div style="color: #6b7280; font-size: 0.875rem; margin-top: 0.25rem;">
+                    {from_location_de} → {to_location_de}
+                    {estimated_info}
+                    {actual_info}
+                    {completion_info}
+                    {delay_info}
+                    • {time_ago}
+                </div>
+            </div>
+        </div>
+    </div>
+    """
+
+_PLANNED_TIME_TMPL = "<div style='color: {status_color}; font-weight: 600; font-size: 0.9375rem; margin-top: 0.25rem;'>📅 Geplant: {date} um {time} Uhr</div>"
+_PLANNED_TIME_MISSING_HTML = "<div style='color: #F59E0B; font-weight: 600; font-size: 0.9375rem; margin-top: 0.25rem;'>⚠️ Geplante Startzeit noch nicht festgelegt</div>"
+_CARD_DIVIDER_HTML = '<div style="border-bottom: 1px solid #e5e7eb; margin-top: 0.5rem; margin-bottom: 0.5rem;"></div>'
+
+
+def _parse_iso(value):
+    """Parst einen ISO-Zeitstempel (fromisoformat versteht das 'Z'-Suffix ab Python 3.11, siehe Prüfung in app.py)"""
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+@lru_cache(maxsize=4096)
+def _format_planned_time(planned_start):
+    """Formatiert eine geplante Startzeit als (Datum, Uhrzeit) in lokaler Zeit (gecacht je Zeitstempel)"""
+    planned_time = convert_utc_to_local(planned_start)
+    if not planned_time:
+        # Fallback falls Konvertierung fehlschlägt
+        planned_time = _parse_iso(planned_start)
+        if planned_time.tzinfo:
+            planned_time = planned_time.replace(tzinfo=None)
+    return planned_time.strftime('%d.%m.%Y'), planned_time.strftime('%H:%M')
+
+
+@lru_cache(maxsize=4096)
+def _format_time_ago_minute(timestamp, minute):
+    """Relative Zeitangabe, gecacht je Zeitstempel und Minute (ändert sich höchstens einmal pro Minute)"""
+    return format_time_ago(timestamp)
+
+
+def _lazy_expander(label, key):
+    """Erzeugt einen Expander, dessen Inhalt nur im geöffneten Zustand ausgeführt wird (sofern Streamlit das unterstützt)"""
+    try:
+        return st.expander(label, expanded=False, key=key, on_change="rerun")
+    except TypeError:
+        # Ältere Streamlit-Versionen kennen keinen Öffnungszustand: Inhalt immer rendern
+        return st.expander(label, expanded=False)
+
+
+def _render_show_more(state_key, total, shown):
+    """Rendert einen "Mehr anzeigen"-Button, solange nicht alle Transporte sichtbar sind"""
+    remaining = total - shown
+    if remaining <= 0:
+        return
+    if st.button(f"Mehr anzeigen ({remaining} weitere)", key=f"{state_key}_more", use_container_width=True):
+        st.session_state[state_key] = shown + TRANSPORT_PAGE_SIZE
+        st.rerun()
+
+
+@st.cache_data(ttl=30, max_entries=4, show_spinner=False)
+def _get_transport_requests_cached(_db, transport_rev):
+    """Gecachte Transportanfragen (neu geladen, sobald sich db.transport_rev ändert – auch durch andere Sessions)"""
     return _db.get_transport_requests()
 
 
+@st.cache_data(ttl=30)
+def _get_orders_by_id_cached(_db):
+    """Gecachte Inventar-Bestellungen, nach ID indiziert"""
+    return {o['id']: o for o in _db.get_inventory_orders()}
+
+
+def _completion_remaining_minutes(expected_completion, now):
+    """Verbleibende Minuten bis zur erwarteten Ankunft relativ zur lokalen Zeit now (None, wenn nicht lesbar)"""
+    # convert_utc_to_local parst ISO- und SQLite-Formate und liefert bei Fehlern None
+    completion_time = convert_utc_to_local(expected_completion)
+    if completion_time is None:
+        return None
+    return (completion_time - now).total_seconds() / 60
+
+
+def _refresh_transport_after_write(db):
+    """Markiert ein Transport-Update und lädt die Transporte einmal über den Cache (neue transport_rev) nach"""
+    st.session_state['last_transport_update_time'] = time.monotonic()
+    if 'background_data' in st.session_state and st.session_state.background_data:
+        # Aktualisiere nur Transport-Daten im Background-Cache; der Cache-Eintrag wird im Rerun wiederverwendet
+        try:
+            st.session_state.background_data['transport'] = _get_transport_requests_cached(db, db.transport_rev)
+            st.session_state.background_data['timestamp'] = time.time()
+        except Exception:
+            # Falls Fehler, lösche Background-Cache komplett
+            st.session_state.background_data_timestamp = 0
+
+
+def _maybe_delay(estimated_time):
+    """Würfelt eine Verzögerung (10% Chance, 20-50% der geschätzten Zeit); liefert (Minuten, timedelta)"""
+    if random.random() < 0.10:
+        delay_minutes = int(estimated_time * random.uniform(0.2, 0.5))
+        return delay_minutes, timedelta(minutes=delay_minutes)
+    return 0, _NO_DELAY
+
+
 def _update_transport_statuses(db):
     """
     Aktualisiert Transport-Statuses periodisch.
     Aktiviert geplante Transporte und schließt aktive Transporte ab.
     Batch-Update für bessere Performance.
     """
-    transport = _get_transport_requests_cached(db)
+    transport = _get_transport_requests_cached(db, db.transport_rev)
     now = datetime.now(timezone.utc)
     updates_made = False
     
@@ -37,27 +185,21 @@ def _update_transport_statuses(db):
     transports_to_complete = []
     transports_to_delay = []
     
-    # 1. Sammle geplante Transporte, die aktiviert werden müssen
+    # Ein Durchlauf: 1. geplante Transporte, die aktiviert werden müssen,
+    # 2. aktive Transporte, die aktualisiert/abgeschlossen werden müssen
     for trans in transport:
-        if trans.get('status') == 'planned':
+        status = trans.get('status')
+        if status == 'planned':
             planned_start_time_str = trans.get('planned_start_time')
             if planned_start_time_str:
                 try:
-                    if isinstance(planned_start_time_str, str):
-                        planned_start_time = datetime.fromisoformat(planned_start_time_str.replace('Z', '+00:00'))
-                    else:
-                        planned_start_time = planned_start_time_str
+                    planned_start_time = _parse_iso(planned_start_time_str)
                     
                     if planned_start_time <= now:
                         estimated_time = trans.get('estimated_time_minutes', 15)
-                        expected_completion = now + timedelta(minutes=estimated_time)
-                        delay_minutes = 0
-                        
                         # 10% Chance auf Verzögerung beim Aktivieren
-                        if random.random() < 0.10:
-                            delay_percentage = random.uniform(0.2, 0.5)
-                            delay_minutes = int(estimated_time * delay_percentage)
-                            expected_completion = expected_completion + timedelta(minutes=delay_minutes)
+                        delay_minutes, delay_delta = _maybe_delay(estimated_time)
+                        expected_completion = now + timedelta(minutes=estimated_time) + delay_delta
                         
                         transports_to_activate.append({
                             'id': trans['id'],
@@ -66,40 +208,30 @@ def _update_transport_statuses(db):
                         })
                 except Exception:
                     pass
-    
-    # 2. Sammle aktive Transporte, die aktualisiert/abgeschlossen werden müssen
-    for trans in transport:
-        if trans.get('status') in ['in_progress', 'in_bearbeitung']:
+        
+        elif status in ACTIVE_STATUSES:
             expected_completion_time_str = trans.get('expected_completion_time')
             start_time_str = trans.get('start_time')
             
             if expected_completion_time_str and start_time_str:
                 try:
-                    if isinstance(expected_completion_time_str, str):
-                        expected_completion_time = datetime.fromisoformat(expected_completion_time_str.replace('Z', '+00:00'))
-                    else:
-                        expected_completion_time = expected_completion_time_str
+                    expected_completion_time = _parse_iso(expected_completion_time_str)
                     
-                    # Prüfe auf Verzögerung während der Fahrt
-                    delay_minutes = trans.get('delay_minutes', 0) or 0
-                    if delay_minutes == 0 and random.random() < 0.10:
-                        estimated_time = trans.get('estimated_time_minutes', 15)
-                        delay_percentage = random.uniform(0.2, 0.5)
-                        delay_minutes = int(estimated_time * delay_percentage)
-                        expected_completion_time = expected_completion_time + timedelta(minutes=delay_minutes)
-                        
-                        transports_to_delay.append({
-                            'id': trans['id'],
-                            'expected_completion_time': expected_completion_time.isoformat(),
-                            'delay_minutes': delay_minutes
-                        })
+                    # Prüfe auf Verzögerung während der Fahrt (nur wenn noch keine vorliegt)
+                    if not trans.get('delay_minutes'):
+                        delay_minutes, delay_delta = _maybe_delay(trans.get('estimated_time_minutes', 15))
+                        if delay_delta:
+                            expected_completion_time = expected_completion_time + delay_delta
+                            
+                            transports_to_delay.append({
+                                'id': trans['id'],
+                                'expected_completion_time': expected_completion_time.isoformat(),
+                                'delay_minutes': delay_minutes
+                            })
                     
                     # Prüfe ob Transport abgeschlossen werden muss
                     if expected_completion_time <= now:
-                        if isinstance(start_time_str, str):
-                            start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-                        else:
-                            start_time = start_time_str
+                        start_time = _parse_iso(start_time_str)
                         
                         actual_time_minutes = int((now - start_time).total_seconds() / 60)
                         
@@ -110,71 +242,74 @@ def _update_transport_statuses(db):
                 except Exception:
                     pass
     
-    # Batch: Führe alle Updates aus
-    for trans_data in transports_to_activate:
-        try:
-            transport_id = trans_data['id']
-            # Hole Transport-Details um zu prüfen ob es ein Inventar-Transport ist
-            transport = next((t for t in transport if t['id'] == transport_id), None)
-            
-            update_kwargs = {
-                'status': 'in_progress',
-                'start_time': now.isoformat(),
-                'expected_completion_time': trans_data['expected_completion']
-            }
-            if trans_data['delay_minutes'] > 0:
-                update_kwargs['delay_minutes'] = trans_data['delay_minutes']
-            
-            if db.update_transport_status(transport_id, **update_kwargs):
-                updates_made = True
-                
-                # Wenn es ein Inventar-Transport ist, setze Bestellstatus auf 'in_transit'
-                if transport and transport.get('related_entity_type') == 'inventory_order':
-                    try:
-                        order_id = transport.get('related_entity_id')
-                        if order_id:
-                            db.update_inventory_order_status(order_id, 'in_transit')
-                    except Exception:
-                        pass  # Fehler ignorieren, um UI nicht zu blockieren
-        except Exception:
-            pass
+    # Häufigster Fall: nichts fällig – keine DB-Zugriffe und keine Cache-Invalidierung
+    if not (transports_to_activate or transports_to_delay or transports_to_complete):
+        return False
     
-    for trans_data in transports_to_delay:
-        try:
-            if db.update_transport_status(
-                trans_data['id'],
-                expected_completion_time=trans_data['expected_completion_time'],
-                delay_minutes=trans_data['delay_minutes']
-            ):
-                updates_made = True
-        except Exception:
-            pass
+    # Index nach ID für O(1)-Lookups in den Update-Schleifen
+    transport_by_id = {t['id']: t for t in transport}
     
-    for trans_data in transports_to_complete:
+    # Batch: Führe alle Updates je Kategorie in einer Transaktion aus
+    activate_updates = []
+    # Startzeit ist für alle Aktivierungen dieses Durchlaufs gleich: nur einmal serialisieren
+    now_iso = now.isoformat()
+    for trans_data in transports_to_activate:
+        update = {
+            'id': trans_data['id'],
+            'status': 'in_progress',
+            'start_time': now_iso,
+            'expected_completion_time': trans_data['expected_completion']
+        }
+        if trans_data['delay_minutes'] > 0:
+            update['delay_minutes'] = trans_data['delay_minutes']
+        activate_updates.append(update)
+    
+    try:
+        activated_ids = db.update_transport_status_batch(activate_updates)
+    except Exception:
+        activated_ids = []
+    if activated_ids:
+        updates_made = True
+        # Bei Inventar-Transporten Bestellstatus gesammelt auf 'in_transit' setzen
+        order_ids = []
+        for transport_id in activated_ids:
+            trans = transport_by_id.get(transport_id)
+            if trans and trans.get('related_entity_type') == 'inventory_order' and trans.get('related_entity_id'):
+                order_ids.append(trans['related_entity_id'])
         try:
-            transport_id = trans_data['id']
-            # Hole Transport-Details um zu prüfen ob es ein Inventar-Transport ist
-            transport = next((t for t in transport if t['id'] == transport_id), None)
-            
-            if db.update_transport_status(
-                transport_id,
-                status='completed',
-                actual_time_minutes=trans_data['actual_time_minutes']
-            ):
-                updates_made = True
-                
-                # Wenn es ein Inventar-Transport ist, verarbeite die Lieferung
-                if transport and transport.get('related_entity_type') == 'inventory_order':
-                    try:
-                        db.process_completed_inventory_transport(transport_id)
-                    except Exception:
-                        pass  # Fehler ignorieren, um UI nicht zu blockieren
+            db.update_inventory_order_status_batch(order_ids, 'in_transit')
         except Exception:
-            pass
+            pass  # Fehler ignorieren, um UI nicht zu blockieren
+    
+    try:
+        if db.update_transport_status_batch(transports_to_delay):
+            updates_made = True
+    except Exception:
+        pass
+    
+    try:
+        completed_ids = db.update_transport_status_batch([
+            {'id': trans_data['id'], 'status': 'completed', 'actual_time_minutes': trans_data['actual_time_minutes']}
+            for trans_data in transports_to_complete
+        ])
+    except Exception:
+        completed_ids = []
+    if completed_ids:
+        updates_made = True
+        # Wenn es ein Inventar-Transport ist, verarbeite die Lieferung
+        for transport_id in completed_ids:
+            trans = transport_by_id.get(transport_id)
+            if trans and trans.get('related_entity_type') == 'inventory_order':
+                try:
+                    db.process_completed_inventory_transport(transport_id)
+                except Exception:
+                    pass  # Fehler ignorieren, um UI nicht zu blockieren
     
     # Cache nur einmal invalidieren wenn Updates gemacht wurden
+    # Transport-Cache wird über db.transport_rev neu geladen; aktivierte/abgeschlossene
+    # Inventar-Transporte ändern aber auch die Bestellungen
     if updates_made:
-        _get_transport_requests_cached.clear()
+        _get_orders_by_id_cached.clear()
     
     return updates_made
 
@@ -201,7 +336,7 @@ def _show_schedule_dialog(trans, db, sim, is_edit=False):
             if is_edit and trans.get('planned_start_time'):
                 try:
                     if isinstance(trans['planned_start_time'], str):
-                        planned_time_utc = datetime.fromisoformat(trans['planned_start_time'].replace('Z', '+00:00'))
+                        planned_time_utc = _parse_iso(trans['planned_start_time'])
                     else:
                         planned_time_utc = trans['planned_start_time']
                         if planned_time_utc.tzinfo is None:
@@ -291,12 +426,12 @@ def _show_schedule_dialog(trans, db, sim, is_edit=False):
                         selected_datetime_local = datetime.combine(selected_date, selected_time)
                         
                         # Warnung wenn Zeit in der Vergangenheit liegt (aber trotzdem erlauben)
-                        now_local = datetime.now(ZoneInfo(LOCAL_TIMEZONE)).replace(tzinfo=None)
+                        now_local = datetime.now(LOCAL_TZ).replace(tzinfo=None)
                         if selected_datetime_local < now_local:
                             st.warning("⚠️ Die geplante Zeit liegt in der Vergangenheit.")
                         
                         # Interpretiere als lokale Zeit und konvertiere zu UTC
-                        selected_datetime_local_tz = selected_datetime_local.replace(tzinfo=ZoneInfo(LOCAL_TIMEZONE))
+                        selected_datetime_local_tz = selected_datetime_local.replace(tzinfo=LOCAL_TZ)
                         selected_datetime_utc = selected_datetime_local_tz.astimezone(timezone.utc)
                         planned_start_time_str = selected_datetime_utc.isoformat()
                         
@@ -315,20 +450,8 @@ def _show_schedule_dialog(trans, db, sim, is_edit=False):
                             success = db.update_transport_status(transport_id, **update_kwargs)
                         
                         if success:
-                            # Cache invalidieren
-                            _get_transport_requests_cached.clear()
-                            # Markiere dass ein Update gemacht wurde (für sofortige Datenaktualisierung)
-                            st.session_state['last_transport_update_time'] = time.time()
-                            # Background-Daten Cache invalidieren, damit aktualisierte Daten geladen werden
-                            if 'background_data' in st.session_state and st.session_state.background_data:
-                                # Aktualisiere nur Transport-Daten im Background-Cache
-                                try:
-                                    updated_transport = db.get_transport_requests()
-                                    st.session_state.background_data['transport'] = updated_transport
-                                    st.session_state.background_data['timestamp'] = time.time()
-                                except:
-                                    # Falls Fehler, lösche Background-Cache komplett
-                                    st.session_state.background_data_timestamp = 0
+                            # Markiere Update und aktualisiere Background-Daten (füllt zugleich den Cache für den Rerun)
+                            _refresh_transport_after_write(db)
                             # Dialog schließen
                             st.session_state[dialog_key] = False
                             # Erfolgsmeldung anzeigen (wird beim nächsten Render nicht mehr angezeigt, da Dialog geschlossen)
@@ -339,8 +462,9 @@ def _show_schedule_dialog(trans, db, sim, is_edit=False):
                             st.error("❌ Fehler beim Speichern der Änderungen. Bitte versuchen Sie es erneut.")
                     except Exception as e:
                         st.error(f"❌ Fehler beim Verarbeiten der Zeitangabe: {str(e)}")
-                        # Zeige vollständige Fehlerdetails für Debugging
-                        st.exception(e)
+                        # Vollständige Fehlerdetails nur im Debug-Modus anzeigen
+                        if st.session_state.get('debug_mode'):
+                            st.exception(e)
             
             if cancelled:
                 st.session_state[dialog_key] = False
@@ -361,15 +485,13 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
     content_placeholder = st.empty()
     
     # ===== PERIODISCHE STATUS-UPDATES =====
-    # Nur alle 10 Sekunden Status-Updates durchführen (nicht bei jedem Render)
-    update_interval = 10  # Sekunden
+    # Nur alle STATUS_UPDATE_INTERVAL Sekunden Status-Updates durchführen (nicht bei jedem Render);
+    # monotone Uhr, damit Systemzeit-Sprünge das Intervall nicht verfälschen
     last_update_key = 'transport_last_status_update'
     
-    if last_update_key not in st.session_state:
-        st.session_state[last_update_key] = 0
-    
-    current_time = time.time()
-    should_update = (current_time - st.session_state[last_update_key]) >= update_interval
+    current_time = time.monotonic()
+    last_update = st.session_state.get(last_update_key)
+    should_update = last_update is None or (current_time - last_update) >= STATUS_UPDATE_INTERVAL
     
     if should_update:
         # Führe Batch-Updates aus
@@ -381,10 +503,10 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
     # In diesem Fall lade direkt aus DB für sofortige Aktualisierung
     last_transport_update_key = 'last_transport_update_time'
     if last_transport_update_key in st.session_state:
-        time_since_update = time.time() - st.session_state[last_transport_update_key]
+        time_since_update = time.monotonic() - st.session_state[last_transport_update_key]
         if time_since_update < 5:  # Wenn Update vor weniger als 5 Sekunden
             # Lade direkt aus DB für sofortige Aktualisierung
-            transport = _get_transport_requests_cached(db)
+            transport = _get_transport_requests_cached(db, db.transport_rev)
             # Aktualisiere auch Background-Cache
             if 'background_data' in st.session_state and st.session_state.background_data:
                 st.session_state.background_data['transport'] = transport
@@ -394,33 +516,50 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
             if 'background_data' in st.session_state and st.session_state.background_data:
                 transport = st.session_state.background_data.get('transport', [])
             else:
-                transport = _get_transport_requests_cached(db)  # Fallback: Gecacht
+                transport = _get_transport_requests_cached(db, db.transport_rev)  # Fallback: Gecacht
     else:
         # Verwende Background-Daten für sofortigen Zugriff
         if 'background_data' in st.session_state and st.session_state.background_data:
             transport = st.session_state.background_data.get('transport', [])
         else:
-            transport = _get_transport_requests_cached(db)  # Fallback: Gecacht
+            transport = _get_transport_requests_cached(db, db.transport_rev)  # Fallback: Gecacht
     
     # Spinner entfernen
     spinner_placeholder.empty()
     
     with content_placeholder.container():
         if transport:
+            # Gruppiere Transporte nach Status (ein Durchlauf für Kennzahlen und Abschnitte)
+            pending_transports, active_transports, planned_transports, completed_transports = [], [], [], []
+            for t in transport:
+                status = t['status']
+                if status in PENDING_STATUSES:
+                    pending_transports.append(t)
+                elif status in ACTIVE_STATUSES:
+                    active_transports.append(t)
+                elif status == 'planned':
+                    planned_transports.append(t)
+                elif status in COMPLETED_STATUSES:
+                    completed_transports.append(t)
+            
+            # Inventar-Bestellungen für die Kartendetails einmal pro Render laden
+            try:
+                orders_by_id = _get_orders_by_id_cached(db)
+            except Exception:
+                orders_by_id = {}
+            # Lokale Uhrzeit (naiv, wie convert_utc_to_local) einmal pro Render für alle Karten
+            render_now = datetime.now(LOCAL_TZ).replace(tzinfo=None)
+            
             # Zusammenfassende Kennzahlen
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                pending_count = len([t for t in transport if t['status'] in ['pending', 'ausstehend']])
-                st.metric("Anfragen", pending_count)
+                st.metric("Anfragen", len(pending_transports))
             with col2:
-                in_progress_count = len([t for t in transport if t['status'] in ['in_progress', 'in_bearbeitung']])
-                st.metric("Aktiv", in_progress_count)
+                st.metric("Aktiv", len(active_transports))
             with col3:
-                planned_count = len([t for t in transport if t['status'] == 'planned'])
-                st.metric("Geplant", planned_count)
+                st.metric("Geplant", len(planned_transports))
             with col4:
-                completed_count = len([t for t in transport if t['status'] in ['completed', 'abgeschlossen']])
-                st.metric("Abgeschlossen", completed_count)
+                st.metric("Abgeschlossen", len(completed_transports))
 
             # Button zum Löschen aller Transportanfragen
             col_delete = st.columns([4, 1])
@@ -436,20 +575,8 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
                 with col_confirm:
                     if st.button("Ja, alle löschen", key="confirm_delete_all_yes", type="secondary", use_container_width=True):
                         if db.delete_all_transport_requests():
-                            # Cache invalidieren
-                            _get_transport_requests_cached.clear()
-                            # Markiere dass ein Update gemacht wurde (für sofortige Datenaktualisierung)
-                            st.session_state['last_transport_update_time'] = time.time()
-                            # Background-Daten Cache invalidieren, damit aktualisierte Daten geladen werden
-                            if 'background_data' in st.session_state and st.session_state.background_data:
-                                # Aktualisiere nur Transport-Daten im Background-Cache
-                                try:
-                                    updated_transport = db.get_transport_requests()
-                                    st.session_state.background_data['transport'] = updated_transport
-                                    st.session_state.background_data['timestamp'] = time.time()
-                                except:
-                                    # Falls Fehler, lösche Background-Cache komplett
-                                    st.session_state.background_data_timestamp = 0
+                            # Markiere Update und aktualisiere Background-Daten (füllt zugleich den Cache für den Rerun)
+                            _refresh_transport_after_write(db)
                             st.session_state['confirm_delete_all'] = False
                             st.rerun()
                         else:
@@ -461,17 +588,11 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
 
             st.markdown("---")
             
-            # Gruppiere Transporte nach Status
-            pending_transports = [t for t in transport if t['status'] in ['pending', 'ausstehend']]
-            active_transports = [t for t in transport if t['status'] in ['in_progress', 'in_bearbeitung']]
-            planned_transports = [t for t in transport if t['status'] == 'planned']
-            completed_transports = [t for t in transport if t['status'] in ['completed', 'abgeschlossen']]
-            
             # 1. Transportanfragen (pending) - mit Bestätigungs-Button
             st.markdown("### 📋 Transportanfragen")
             if pending_transports:
                 for i, trans in enumerate(pending_transports):
-                    _render_transport_card(trans, db, sim, show_confirm_button=True, delay_class="fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3")
+                    _render_transport_card(trans, db, sim, show_confirm_button=True, delay_class=_fade_class(i), orders_by_id=orders_by_id, now=render_now)
             else:
                 st.info("Keine ausstehenden Transportanfragen")
             st.markdown("---")
@@ -479,8 +600,8 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
             # 2. Aktive Transporte (in_progress)
             st.markdown("### 🚑 Aktive Transporte")
             if active_transports:
-                for i, trans in enumerate(active_transports):
-                    _render_transport_card(trans, db, sim, delay_class="fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3")
+                # Aktive Karten haben keine Buttons: gesammelt in einem Element rendern
+                _render_static_cards(active_transports, db, orders_by_id=orders_by_id, now=render_now)
             else:
                 st.info("Keine aktiven Transporte")
             st.markdown("---")
@@ -489,58 +610,71 @@ def render(db, sim, get_cached_alerts=None, get_cached_recommendations=None, get
             st.markdown("### 📅 Geplante Transporte")
             if planned_transports:
                 for i, trans in enumerate(planned_transports):
-                    _render_transport_card(trans, db, sim, delay_class="fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3")
+                    _render_transport_card(trans, db, sim, delay_class=_fade_class(i), orders_by_id=orders_by_id, now=render_now)
             else:
                 st.info("Keine geplanten Transporte")
             st.markdown("---")
             
             # 4. Abgeschlossene Transporte (completed) - in Expander
-            with st.expander(f"✅ Abgeschlossene Transporte ({len(completed_transports)})", expanded=False):
-                if completed_transports:
-                    for i, trans in enumerate(completed_transports):
-                        _render_transport_card(trans, db, sim, delay_class="fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}" if i <= 3 else "fade-in-delayed-3")
-                else:
-                    st.info("Keine abgeschlossenen Transporte")
+            completed_expander = _lazy_expander(f"✅ Abgeschlossene Transporte ({len(completed_transports)})", key="transport_completed_expander")
+            with completed_expander:
+                # Geschlossener Expander: Karten gar nicht erst rendern (verstecktes DOM spart keine Arbeit)
+                if getattr(completed_expander, 'open', None) is not False:
+                    if completed_transports:
+                        shown = st.session_state.get('transport_completed_shown', TRANSPORT_PAGE_SIZE)
+                        _render_static_cards(completed_transports[:shown], db, orders_by_id=orders_by_id, now=render_now)
+                        _render_show_more('transport_completed_shown', len(completed_transports), shown)
+                    else:
+                        st.info("Keine abgeschlossenen Transporte")
         else:
             st.markdown(render_empty_state("🚑", "Keine Transportanfragen", "Zurzeit keine aktiven Transportanfragen"), unsafe_allow_html=True)
 
 
-def _render_transport_card(trans, db, sim, show_confirm_button=False, delay_class="fade-in"):
-    """Rendert eine einzelne Transportkarte"""
-    priority_color = get_priority_color(trans['priority'])
-    status_color = get_status_color(trans['status'])
-    
-    # Translate priority, status, and request_type to German
-    priority_map = {'high': 'HOCH', 'medium': 'MITTEL', 'low': 'NIEDRIG', 'hoch': 'HOCH', 'mittel': 'MITTEL', 'niedrig': 'NIEDRIG'}
-    status_map = {
-        'pending': 'AUSSTEHEND',
-        'in_progress': 'IN BEARBEITUNG',
-        'completed': 'ABGESCHLOSSEN',
-        'planned': 'GEPLANT',
-        'ausstehend': 'AUSSTEHEND',
-        'in_bearbeitung': 'IN BEARBEITUNG',
-        'abgeschlossen': 'ABGESCHLOSSEN'
-    }
-    request_type_map = {
-        'patient': 'Patient',
-        'equipment': 'Gerät',
-        'specimen': 'Probe',
-        'Patient': 'Patient',
-        'Gerät': 'Gerät',
-        'Probe': 'Probe'
-    }
-    priority_display = priority_map.get(trans['priority'].lower(), trans['priority'].upper())
-    status_display = status_map.get(trans['status'].lower().replace(' ', '_'), trans['status'].replace('_', ' ').upper())
-    request_type_display = request_type_map.get(trans['request_type'], trans['request_type'].title())
+def _fade_class(i):
+    """CSS-Klasse für die gestaffelte Einblend-Animation der i-ten Karte"""
+    return "fade-in" if i == 0 else f"fade-in-delayed-{min(i, 3)}"
+
+
+def _render_static_cards(transports, db, orders_by_id=None, now=None):
+    """Rendert Karten ohne Buttons gesammelt in einem einzigen st.html-Aufruf"""
+    st.html(''.join(
+        _build_transport_card_html(trans, db, _fade_class(i), orders_by_id, now) + _CARD_DIVIDER_HTML
+        for i, trans in enumerate(transports)
+    ))
+
+
+def _build_transport_card_html(trans, db, delay_class="fade-in", orders_by_id=None, now=None):
+    """Baut das HTML einer Transportkarte (now: lokale Renderzeit, einmal pro Durchlauf bestimmt)"""
+    # Statuskategorie einmal bestimmen statt wiederholter Vergleiche
+    status = trans['status']
+    is_pending = status in PENDING_STATUSES
+    is_active = status in ACTIVE_STATUSES
+    is_planned = status == 'planned'
+    
+    # Translate priority, status, and request_type to German (Farbe + Text aus einer Tabelle)
+    priority = trans['priority']
+    priority_style = PRIORITY_STYLE.get(priority)
+    if priority_style:
+        priority_color, priority_display = priority_style
+    else:
+        priority_color = get_priority_color(priority)
+        priority_display = PRIORITY_MAP.get(priority.lower(), priority.upper())
+    status_style = STATUS_STYLE.get(status)
+    if status_style:
+        status_color, status_display = status_style
+    else:
+        status_color = get_status_color(status)
+        # Normalisierung nur, wenn der Status nicht direkt bekannt ist
+        status_display = STATUS_MAP.get(status.lower().replace(' ', '_'), status.replace('_', ' ').upper())
+    request_type = trans['request_type']
+    request_type_display = REQUEST_TYPE_MAP.get(request_type, request_type.title())
     
     # Translate department names for locations
-    from utils import get_department_name_mapping
-    dept_map = get_department_name_mapping()
     from_location = trans['from_location']
     to_location = trans['to_location']
     # Translate if it's a department name, otherwise keep as is (for city names, etc.)
-    from_location_de = dept_map.get(from_location, from_location)
-    to_location_de = dept_map.get(to_location, to_location)
+    from_location_de = DEPT_MAP.get(from_location, from_location)
+    to_location_de = DEPT_MAP.get(to_location, to_location)
     
     # Hole Details basierend auf related_entity_type
     details_info = ""
@@ -549,11 +683,12 @@ def _render_transport_card(trans, db, sim, show_confirm_button=False, delay_clas
         # Hole Bestellungs-Details
         order_id = trans.get('related_entity_id')
         if order_id:
-            # Hole Bestellungs-Details über Mock-Datenbank
+            # Bestellungen werden einmal pro Render geladen und nach ID nachgeschlagen
             order = None
             try:
-                orders = db.get_inventory_orders()
-                order = next((o for o in orders if o['id'] == order_id), None)
+                if orders_by_id is None:
+                    orders_by_id = _get_orders_by_id_cached(db)
+                order = orders_by_id.get(order_id)
             except Exception:
                 pass
             if order:
@@ -567,60 +702,34 @@ def _render_transport_card(trans, db, sim, show_confirm_button=False, delay_clas
     planned_start = trans.get('planned_start_time')
     if planned_start:
         try:
-            # Konvertiere UTC zu lokaler Zeit
-            planned_time = convert_utc_to_local(planned_start)
-            if planned_time:
-                formatted_date = planned_time.strftime('%d.%m.%Y')
-                formatted_time = planned_time.strftime('%H:%M')
-            else:
-                # Fallback falls Konvertierung fehlschlägt
-                if isinstance(planned_start, str):
-                    planned_time = datetime.fromisoformat(planned_start.replace('Z', '+00:00'))
-                else:
-                    planned_time = planned_start
-                if planned_time.tzinfo:
-                    planned_time = planned_time.replace(tzinfo=None)
-                formatted_date = planned_time.strftime('%d.%m.%Y')
-                formatted_time = planned_time.strftime('%H:%M')
+            # Konvertiere UTC zu lokaler Zeit (gecacht je Zeitstempel)
+            formatted_date, formatted_time = _format_planned_time(planned_start)
             
             # Prominente Anzeige für alle Status mit geplanter Zeit
-            planned_time_display = f"<div style='color: {status_color}; font-weight: 600; font-size: 0.9375rem; margin-top: 0.25rem;'>📅 Geplant: {formatted_date} um {formatted_time} Uhr</div>"
+            planned_time_display = _PLANNED_TIME_TMPL.format(status_color=status_color, date=formatted_date, time=formatted_time)
             
             # Zusätzliche Info in der Detailzeile (nur wenn nicht bereits prominent angezeigt)
             # planned_time_info wird nicht mehr verwendet, da wir planned_time_display immer zeigen
-        except:
+        except (ValueError, TypeError, AttributeError):
+            # Unlesbarer Zeitstempel: Karte ohne geplante Zeit anzeigen
             pass
-    elif trans['status'] == 'planned':
+    elif is_planned:
         # Wenn Status 'planned' aber keine geplante Zeit vorhanden
-        planned_time_display = "<div style='color: #F59E0B; font-weight: 600; font-size: 0.9375rem; margin-top: 0.25rem;'>⚠️ Geplante Startzeit noch nicht festgelegt</div>"
+        planned_time_display = _PLANNED_TIME_MISSING_HTML
     
     # Erwartete Abschlusszeit für in_progress Transporte
     completion_info = ""
-    if trans['status'] in ['in_progress', 'in_bearbeitung']:
+    if is_active:
         expected_completion = trans.get('expected_completion_time')
         if expected_completion:
-            try:
-                # Konvertiere UTC zu lokaler Zeit
-                completion_time = convert_utc_to_local(expected_completion)
-                if completion_time:
-                    now = datetime.now()
-                    remaining = (completion_time - now).total_seconds() / 60
-                else:
-                    # Fallback falls Konvertierung fehlschlägt
-                    if isinstance(expected_completion, str):
-                        completion_time = datetime.fromisoformat(expected_completion.replace('Z', '+00:00'))
-                    else:
-                        completion_time = expected_completion
-                    if completion_time.tzinfo:
-                        completion_time = completion_time.replace(tzinfo=None)
-                    now = datetime.now()
-                    remaining = (completion_time - now).total_seconds() / 60
+            if now is None:
+                now = datetime.now(LOCAL_TZ).replace(tzinfo=None)
+            remaining = _completion_remaining_minutes(expected_completion, now)
+            if remaining is not None:
                 if remaining > 0:
                     completion_info = f" • Erwartete Ankunft in: <span style='color: {status_color}; font-weight: 600;'>{format_duration_minutes(int(remaining))}</span>"
                 else:
                     completion_info = " • Erwartete Ankunft: <span style='color: #DC2626; font-weight: 600;'>Jetzt</span>"
-            except:
-                pass
     
     # Verzögerung/Stau anzeigen
     delay_info = ""
@@ -630,47 +739,49 @@ def _render_transport_card(trans, db, sim, show_confirm_button=False, delay_clas
     
     # Wunschzeitfenster für pending Transporte anzeigen
     requested_time_info = ""
-    if trans['status'] in ['pending', 'ausstehend']:
+    if is_pending:
         requested_start = trans.get('requested_time_start')
         requested_end = trans.get('requested_time_end')
         if requested_start and requested_end:
             requested_time_info = f"<div style='color: #4f46e5; font-size: 0.875rem; margin-top: 0.25rem;'>💡 Wunsch: {requested_start} - {requested_end} Uhr</div>"
     
+    estimated_time = trans['estimated_time_minutes']
+    actual_time = trans['actual_time_minutes']
+    return _TRANSPORT_CARD_TMPL.format(
+        delay_class=delay_class,
+        priority_color=priority_color,
+        priority_display=priority_display,
+        status_color=status_color,
+        status_display=status_display,
+        request_type_display=request_type_display,
+        details_info=details_info,
+        planned_time_display=planned_time_display,
+        requested_time_info=requested_time_info,
+        from_location_de=from_location_de,
+        to_location_de=to_location_de,
+        estimated_info=f"• Geschätzt: {format_duration_minutes(estimated_time)}" if estimated_time else "",
+        actual_info=f"• Tatsächlich: {format_duration_minutes(actual_time)}" if actual_time else "",
+        completion_info=completion_info,
+        delay_info=delay_info,
+        time_ago=_format_time_ago_minute(trans['timestamp'], int(time.time() // 60))
+    )
+
+
+def _render_transport_card(trans, db, sim, show_confirm_button=False, delay_class="fade-in", orders_by_id=None, now=None):
+    """Rendert eine einzelne Transportkarte inklusive Buttons und Planungsdialog"""
+    status = trans['status']
+    transport_id = trans['id']
+    dialog_key = f"schedule_dialog_{transport_id}"
     # Container für Karte und Button (nur wenn Button benötigt wird)
-    show_button = show_confirm_button and trans['status'] in ['pending', 'ausstehend']
-    show_edit_button = trans['status'] == 'planned'
+    show_button = show_confirm_button and status in PENDING_STATUSES
+    show_edit_button = status == 'planned'
     
-    st.html(f"""
-    <div class="{delay_class}" style="background: white; padding: 1rem; border-radius: 8px; margin-bottom: 0.5rem;">
-        <div style="display: flex; justify-content: space-between; align-items: center;">
-            <div style="flex: 1;">
-                <div>
-                    <span class="badge" style="background: {priority_color}; color: white;">{priority_display}</span>
-                    <span class="badge" style="background: {status_color}; color: white; margin-left: 0.5rem;">{status_display}</span>
-                    <strong style="margin-left: 0.5rem;">{request_type_display}</strong>
-                    {details_info}
-                </div>
-                {planned_time_display}
-                {requested_time_info}
-                <div style="color: #6b7280; font-size: 0.875rem; margin-top: 0.25rem;">
-                    {from_location_de} → {to_location_de}
-                    {f"• Geschätzt: {format_duration_minutes(trans['estimated_time_minutes'])}" if trans['estimated_time_minutes'] else ""}
-                    {f"• Tatsächlich: {format_duration_minutes(trans['actual_time_minutes'])}" if trans['actual_time_minutes'] else ""}
-                    {completion_info}
-                    {delay_info}
-                    • {format_time_ago(trans['timestamp'])}
-                </div>
-            </div>
-        </div>
-    </div>
-    """)
+    st.html(_build_transport_card_html(trans, db, delay_class, orders_by_id, now))
     
     # Bestätigungs- und Ablehnungs-Buttons für pending Transporte
     if show_button:
-        transport_id = trans['id']
         button_key = f"confirm_transport_{transport_id}"
         reject_button_key = f"reject_transport_{transport_id}"
-        dialog_key = f"schedule_dialog_{transport_id}"
         
         # Beide Buttons nebeneinander auf der gleichen Linie
         btn_col1, btn_col2 = st.columns(2)
@@ -681,44 +792,29 @@ def _render_transport_card(trans, db, sim, show_confirm_button=False, delay_clas
         with btn_col2:
             if st.button("❌ Ablehnen", key=reject_button_key, use_container_width=True):
                 if db.delete_transport_request(transport_id):
-                    # Cache invalidieren
-                    _get_transport_requests_cached.clear()
-                    # Markiere dass ein Update gemacht wurde (für sofortige Datenaktualisierung)
-                    st.session_state['last_transport_update_time'] = time.time()
-                    # Background-Daten Cache invalidieren, damit aktualisierte Daten geladen werden
-                    if 'background_data' in st.session_state and st.session_state.background_data:
-                        # Aktualisiere nur Transport-Daten im Background-Cache
-                        try:
-                            updated_transport = db.get_transport_requests()
-                            st.session_state.background_data['transport'] = updated_transport
-                            st.session_state.background_data['timestamp'] = time.time()
-                        except:
-                            # Falls Fehler, lösche Background-Cache komplett
-                            st.session_state.background_data_timestamp = 0
+                    # Markiere Update und aktualisiere Background-Daten (füllt zugleich den Cache für den Rerun)
+                    _refresh_transport_after_write(db)
                     st.rerun()
                 else:
                     st.error("Fehler beim Löschen der Anfrage")
         
         # Dividing line after buttons
-        st.html('<div style="border-bottom: 1px solid #e5e7eb; margin-top: 0.5rem; margin-bottom: 0.5rem;"></div>')
+        st.html(_CARD_DIVIDER_HTML)
     
     # Bearbeitungs-Button für geplante Transporte
     if show_edit_button:
-        transport_id = trans['id']
         button_key = f"edit_transport_{transport_id}"
-        dialog_key = f"schedule_dialog_{transport_id}"
         if st.button("✏️ Bearbeiten", key=button_key, use_container_width=True):
             st.session_state[dialog_key] = True
             st.rerun()
         # Dividing line after edit button
-        st.html('<div style="border-bottom: 1px solid #e5e7eb; margin-top: 0.5rem; margin-bottom: 0.5rem;"></div>')
+        st.html(_CARD_DIVIDER_HTML)
     
     # Dividing line for cards without buttons
     if not show_button and not show_edit_button:
-        st.html('<div style="border-bottom: 1px solid #e5e7eb; margin-top: 0.5rem; margin-bottom: 0.5rem;"></div>')
+        st.html(_CARD_DIVIDER_HTML)
     
-    # Zeige Dialog wenn geöffnet (nach den Buttons, damit Formular nach Button-Klick erscheint)
-    transport_id = trans['id']
-    dialog_key = f"schedule_dialog_{transport_id}"
-    if st.session_state.get(dialog_key, False):
+    # Zeige Dialog wenn geöffnet (nach den Buttons, damit Formular nach Button-Klick erscheint);
+    # nur Karten mit Buttons können einen Dialog öffnen
+    if (show_button or show_edit_button) and st.session_state.get(dialog_key, False):
         _show_schedule_dialog(trans, db, sim, is_edit=show_edit_button)
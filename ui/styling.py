@@ -11,27 +11,20 @@ Es definiert ein professionelles Design-System mit:
 
 Das Styling wird über apply_custom_styles() in die Streamlit-App eingebunden.
 """
+import re
+
 import streamlit as st
 
 
-def apply_custom_styles():
-    """
-    Wendet benutzerdefiniertes CSS-Styling auf die Streamlit-Anwendung an.
-    
-    Diese Funktion muss einmal beim Start der Anwendung aufgerufen werden,
-    um das gesamte Design-System zu aktivieren. Das CSS wird in die HTML-Seite
-    eingefügt und überschreibt/ergänzt die Standard-Streamlit-Styles.
-    
-    Das Styling umfasst:
-    - Typografie und Schriftarten
-    - Farben und Badges
-    - Metrik-Karten
-    - Empty States
-    - Footer und Header
-    - Buttons und Eingabefelder
-    - Responsive Design
-    """
-    st.markdown("""
+def _minify_css(css):
+    """Entfernt Kommentare und überflüssige Leerzeichen aus CSS (einmal beim Import)"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};:,>])\s*', r'\1', css).replace(';}', '}').strip()
+
+
+# Gesamtes CSS des Design-Systems als statischer String (einmal beim Import erzeugt und minifiziert)
+_CUSTOM_CSS_HTML = _minify_css("""
     <style>
         /* Professionelle Typografie */
         * {
@@ -64,7 +57,6 @@ def apply_custom_styles():
             padding: 1.25rem 0;
             margin: -1rem 0 2rem 0;
             box-shadow: 0 2px 8px rgba(0, 0, 0, 0.04);
-            backdrop-filter: blur(10px);
         }
         
         .header-content {
@@ -135,10 +127,11 @@ def apply_custom_styles():
             background: linear-gradient(to bottom, #ffffff 0%, #fafbfc 100%);
             padding: 1.75rem;
             border-radius: 16px;
-            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.06), 0 1px 2px rgba(0, 0, 0, 0.04);
+            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.07);
             border: 1px solid #e5e7eb;
             border-left: 4px solid #667eea;
-            transition: all 0.2s ease;
+            transition: transform 0.2s ease, box-shadow 0.2s ease;
+            will-change: transform;
             position: relative;
             overflow: hidden;
         }
@@ -157,7 +150,7 @@ def apply_custom_styles():
         
         .metric-card:hover {
             transform: translateY(-2px);
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.08), 0 2px 4px rgba(0, 0, 0, 0.06);
+            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
         }
         
         .metric-card:hover::before {
@@ -286,7 +279,8 @@ def apply_custom_styles():
             border: 1px solid #e5e7eb;
             box-shadow: 0 2px 6px rgba(0, 0, 0, 0.05);
             margin-bottom: 1rem;
-            transition: all 0.2s ease;
+            transition: transform 0.2s ease, box-shadow 0.2s ease;
+            will-change: transform;
         }
         
         .info-card:hover {
@@ -298,7 +292,7 @@ def apply_custom_styles():
         .stButton > button {
             border-radius: 8px;
             font-weight: 600;
-            transition: all 0.2s ease;
+            transition: transform 0.2s ease, box-shadow 0.2s ease, background-color 0.2s ease, border-color 0.2s ease;
             box-shadow: 0 1px 2px rgba(0, 0, 0, 0.05);
         }
         
@@ -356,7 +350,7 @@ def apply_custom_styles():
         .stTextInput > div > div > input {
             border-radius: 8px;
             border: 1px solid #d1d5db;
-            transition: all 0.2s ease;
+            transition: border-color 0.2s ease, box-shadow 0.2s ease;
         }
         
         .stTextInput > div > div > input:focus {
@@ -446,6 +440,48 @@ def apply_custom_styles():
         .empty-state {
             animation: fadeIn 0.3s ease-out;
         }
+        
+        /* Reduzierte Bewegung: Einblend-Animationen und Übergänge abschalten */
+        @media (prefers-reduced-motion: reduce) {
+            .fade-in,
+            .fade-in-delayed,
+            .fade-in-delayed-2,
+            .fade-in-delayed-3,
+            .metric-card,
+            .info-card,
+            .empty-state {
+                animation: none;
+            }
+            
+            .metric-card,
+            .info-card,
+            .stButton > button,
+            .stTextInput > div > div > input {
+                transition: none;
+            }
+        }
     </style>
-    """, unsafe_allow_html=True)
+    """)
+
+
+def apply_custom_styles():
+    """
+    Wendet benutzerdefiniertes CSS-Styling auf die Streamlit-Anwendung an.
+    
+    Diese Funktion muss einmal beim Start der Anwendung aufgerufen werden,
+    um das gesamte Design-System zu aktivieren. Das CSS wird in die HTML-Seite
+    eingefügt und überschreibt/ergänzt die Standard-Streamlit-Styles.
+    
+    Das Styling umfasst:
+    - Typografie und Schriftarten
+    - Farben und Badges
+    - Metrik-Karten
+    - Empty States
+    - Footer und Header
+    - Buttons und Eingabefelder
+    - Responsive Design
+    """
+    # Das Element muss bei jedem Rerun erneut ausgegeben werden, sonst entfernt Streamlit es;
+    # der statische String wird dabei nur einmal beim Import aufgebaut
+    st.markdown(_CUSTOM_CSS_HTML, unsafe_allow_html=True)
 
@@ -10,13 +10,21 @@ Diese Datei enthält:
 Alle Funktionen sind darauf ausgelegt, realistische Krankenhausmetriken
 zu berechnen und zu formatieren.
 """
-from datetime import datetime, timedelta, timezone
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Dict, List, Optional
 import random
+import threading
 from zoneinfo import ZoneInfo
 
 # Lokale Zeitzone (UTC+1 für Berlin)
 LOCAL_TIMEZONE = 'Europe/Berlin'
+# Zeitzonen-Objekt einmal beim Import auflösen (statt pro Konvertierung)
+LOCAL_TZ = ZoneInfo(LOCAL_TIMEZONE)
+
+# Schwellenwerte für Auslastungsmetriken in Prozent (kritisch / beobachten)
+LOAD_THRESHOLDS = {'critical': 90, 'watch': 75}
 
 
 def calculate_prediction_confidence(base_value: float, time_horizon: int) -> float:
@@ -59,10 +67,13 @@ def round_timestamp_to_seconds(dt):
     
     if isinstance(dt, pd.Series):
         # Für pandas Series: runde jeden Wert auf Sekunden
-        return pd.to_datetime(dt).dt.floor('S')
+        # Bereits datetime-typisierte Series nicht erneut über to_datetime kopieren
+        if not pd.api.types.is_datetime64_any_dtype(dt):
+            dt = pd.to_datetime(dt)
+        return dt.dt.floor('s')
     elif isinstance(dt, pd.Timestamp):
         # Für pandas Timestamp: runde auf Sekunden
-        return dt.floor('S')
+        return dt.floor('s')
     elif isinstance(dt, datetime):
         # Für datetime: entferne Mikrosekunden
         return dt.replace(microsecond=0)
@@ -70,18 +81,22 @@ def round_timestamp_to_seconds(dt):
         # Für String: parse und runde
         try:
             parsed = pd.to_datetime(dt)
-            return parsed.floor('S').to_pydatetime()
-        except:
+            return parsed.floor('s').to_pydatetime()
+        except (ValueError, TypeError, AttributeError):
             return dt
     else:
         # Fallback: versuche zu konvertieren
         try:
             parsed = pd.to_datetime(dt)
-            return parsed.floor('S').to_pydatetime()
-        except:
+            return parsed.floor('s').to_pydatetime()
+        except (ValueError, TypeError, AttributeError):
             return dt
 
 
+# Unterstützte Aggregationsfunktionen für aggregate_to_30_seconds
+_AGG_FUNCS = frozenset({'mean', 'last', 'first', 'max', 'min'})
+
+
 def aggregate_to_30_seconds(df, timestamp_col='timestamp', value_col='value', agg_func='mean'):
     """
     Aggregiert einen DataFrame auf 30-Sekunden-Intervalle.
@@ -103,46 +118,38 @@ def aggregate_to_30_seconds(df, timestamp_col='timestamp', value_col='value', ag
     if df.empty or timestamp_col not in df.columns:
         return df
     
-    # Erstelle Kopie des DataFrames
-    df_agg = df.copy()
-    
-    # Konvertiere Timestamp-Spalte zu datetime
-    df_agg[timestamp_col] = pd.to_datetime(df_agg[timestamp_col])
-    
-    # Runde auf 30-Sekunden-Intervalle
+    # Gruppierungsschlüssel als eigene Serie berechnen (keine Kopie des gesamten DataFrames)
+    timestamps = pd.to_datetime(df[timestamp_col])
+    # Zeitzonen-behaftete Schlüssel gruppieren deutlich langsamer: in naives UTC umwandeln
+    # und die Zeitzone am Ende wieder anbringen
+    tz = timestamps.dt.tz
+    if tz is not None:
+        timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
     # Verwende floor um auf das nächste 30-Sekunden-Intervall abzurunden
-    df_agg['_30s_interval'] = df_agg[timestamp_col].dt.floor('30S')
-    
-    # Aggregiere nach 30-Sekunden-Intervallen
-    if agg_func == 'mean':
-        agg_dict = {value_col: 'mean'}
-    elif agg_func == 'last':
-        agg_dict = {value_col: 'last'}
-    elif agg_func == 'first':
-        agg_dict = {value_col: 'first'}
-    elif agg_func == 'max':
-        agg_dict = {value_col: 'max'}
-    elif agg_func == 'min':
-        agg_dict = {value_col: 'min'}
-    else:
-        agg_dict = {value_col: 'mean'}  # Default
+    interval_key = timestamps.dt.floor('30s').rename('_30s_interval')
     
     # Behalte alle anderen Spalten (z.B. 'department', 'Abteilung' für Farben)
-    other_cols = [col for col in df_agg.columns if col not in [timestamp_col, value_col, '_30s_interval']]
-    if other_cols:
-        # Für andere Spalten: nimm den ersten Wert pro Intervall
-        for col in other_cols:
-            agg_dict[col] = 'first'
+    other_cols = [col for col in df.columns if col not in [timestamp_col, value_col]]
     
-    # Gruppiere und aggregiere
-    df_agg = df_agg.groupby('_30s_interval', as_index=False).agg(agg_dict)
+    # Aggregiere nach 30-Sekunden-Intervallen (Default: mean);
+    # für andere Spalten: nimm den ersten Wert pro Intervall
+    agg_dict = {value_col: agg_func if agg_func in _AGG_FUNCS else 'mean'} | dict.fromkeys(other_cols, 'first')
+    
+    if other_cols:
+        # Gruppiere und aggregiere (ohne Sortierung der Gruppen – es wird unten einmal sortiert)
+        df_agg = df.groupby(interval_key, sort=False).agg(agg_dict)
+    else:
+        # Schneller Pfad (typischer Dashboard-Fall): nur die Wert-Spalte als Serie aggregieren
+        df_agg = df[value_col].groupby(interval_key, sort=False).agg(agg_dict[value_col]).to_frame()
     
     # Ersetze _30s_interval durch timestamp
-    df_agg[timestamp_col] = df_agg['_30s_interval']
-    df_agg = df_agg.drop(columns=['_30s_interval'])
+    interval_index = df_agg.index
+    if tz is not None:
+        interval_index = interval_index.tz_localize('UTC').tz_convert(tz)
+    df_agg[timestamp_col] = interval_index
     
-    # Sortiere nach Timestamp
-    df_agg = df_agg.sort_values(timestamp_col)
+    # Sortiere nach Timestamp (mit neuem fortlaufenden Index)
+    df_agg = df_agg.sort_values(timestamp_col, ignore_index=True)
     
     return df_agg
 
@@ -168,21 +175,12 @@ def convert_utc_to_local(utc_timestamp):
     # Parse String zu datetime
     if isinstance(utc_timestamp, str):
         try:
-            # Versuche ISO-Format (z.B. "2024-01-01T12:00:00Z" oder "2024-01-01T12:00:00+00:00")
-            dt = datetime.fromisoformat(utc_timestamp.replace('Z', '+00:00'))
-        except:
-            try:
-                # Versuche SQLite-Format mit Mikrosekunden
-                dt = datetime.strptime(utc_timestamp, '%Y-%m-%d %H:%M:%S.%f')
-                dt = dt.replace(tzinfo=timezone.utc)
-            except:
-                try:
-                    # Versuche SQLite-Format ohne Mikrosekunden
-                    dt = datetime.strptime(utc_timestamp, '%Y-%m-%d %H:%M:%S')
-                    dt = dt.replace(tzinfo=timezone.utc)
-                except:
-                    # Fallback: return None wenn Parsing fehlschlägt
-                    return None
+            # fromisoformat (Python 3.11+) liest ISO ("...T12:00:00Z") und
+            # SQLite-Format ("... 12:00:00[.ffffff]") direkt im C-Pfad
+            dt = datetime.fromisoformat(utc_timestamp)
+        except ValueError:
+            # Fallback: return None wenn Parsing fehlschlägt
+            return None
     elif isinstance(utc_timestamp, datetime):
         dt = utc_timestamp
     else:
@@ -193,12 +191,35 @@ def convert_utc_to_local(utc_timestamp):
         dt = dt.replace(tzinfo=timezone.utc)
     
     # Konvertiere zu lokaler Zeitzone
-    local_dt = dt.astimezone(ZoneInfo(LOCAL_TIMEZONE))
+    local_dt = dt.astimezone(LOCAL_TZ)
     
     # Entferne timezone-Info für einfache Anzeige (da wir in lokaler Zeit sind)
     return local_dt.replace(tzinfo=None)
 
 
+# Eingefrorene "Jetzt"-Zeit je Thread (Streamlit rendert jede Sitzung in eigenem Thread)
+_batch_now_tl = threading.local()
+
+
+@contextmanager
+def batch_now():
+    """
+    Friert die aktuelle UTC-Zeit für einen Render-Durchlauf ein.
+    
+    Innerhalb des Blocks verwenden alle format_time_ago-Aufrufe dieselbe Zeit,
+    statt sie pro Zeitstempel neu abzufragen. Verschachtelte Blöcke behalten
+    die äußere Zeit.
+    """
+    if getattr(_batch_now_tl, 'value', None) is not None:
+        yield
+        return
+    _batch_now_tl.value = datetime.now(timezone.utc)
+    try:
+        yield
+    finally:
+        _batch_now_tl.value = None
+
+
 def format_time_ago(timestamp: str) -> str:
     """
     Formatiert einen Zeitstempel als relative Zeit (z.B. "vor 5 Min.", "vor 2 Std.").
@@ -220,25 +241,15 @@ def format_time_ago(timestamp: str) -> str:
     # Versuche verschiedene Zeitstempelformate zu parsen
     if isinstance(timestamp, str):
         try:
-            # Versuche zuerst ISO-Format (z.B. "2024-01-01T12:00:00Z")
-            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            # Stelle sicher, dass es timezone-aware ist
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-        except:
-            try:
-                # Versuche SQLite-Datumsformat mit Mikrosekunden
-                # SQLite CURRENT_TIMESTAMP gibt UTC zurück, also als UTC behandeln
-                dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S.%f')
-                dt = dt.replace(tzinfo=timezone.utc)
-            except:
-                try:
-                    # Versuche SQLite-Datumsformat ohne Mikrosekunden
-                    dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-                    dt = dt.replace(tzinfo=timezone.utc)
-                except:
-                    # Fallback auf "kürzlich", wenn das Parsen fehlschlägt
-                    return "kürzlich"
+            # fromisoformat (Python 3.11+) liest ISO ("...T12:00:00Z") und
+            # SQLite-Format ("... 12:00:00[.ffffff]") direkt im C-Pfad
+            dt = datetime.fromisoformat(timestamp)
+        except ValueError:
+            # Fallback auf "kürzlich", wenn das Parsen fehlschlägt
+            return "kürzlich"
+        # SQLite CURRENT_TIMESTAMP gibt UTC zurück, also als UTC behandeln
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
     else:
         dt = timestamp
         # Stelle sicher, dass es timezone-aware ist (behandle als UTC wenn nicht gesetzt)
@@ -247,24 +258,38 @@ def format_time_ago(timestamp: str) -> str:
     
     # ===== ZEITDIFFERENZ BERECHNEN =====
     # Vergleiche UTC-Zeit mit UTC-Zeit für korrekte Zeitdifferenz
-    now_utc = datetime.now(timezone.utc)
-    diff = now_utc - dt
+    now_utc = getattr(_batch_now_tl, 'value', None) or datetime.now(timezone.utc)
+    secs = (now_utc - dt).total_seconds()
     
     # ===== RELATIVE ZEIT FORMATIEREN =====
     # Formatiere basierend auf der Zeitdifferenz
-    if diff.total_seconds() < 60:
+    if secs < 60:
         return "gerade eben"  # Weniger als 1 Minute
-    elif diff.total_seconds() < 3600:  # Weniger als 1 Stunde
-        mins = int(diff.total_seconds() / 60)
+    elif secs < 3600:  # Weniger als 1 Stunde
+        mins = int(secs / 60)
         return f"vor {mins} Min."
-    elif diff.total_seconds() < 86400:  # Weniger als 1 Tag
-        hours = int(diff.total_seconds() / 3600)
+    elif secs < 86400:  # Weniger als 1 Tag
+        hours = int(secs / 3600)
         return f"vor {hours} Std."
     else:  # 1 Tag oder mehr
-        days = int(diff.total_seconds() / 86400)
+        days = int(secs / 86400)
         return f"vor {days} Tg."
 
 
+# Farben je Schweregrad (einmal beim Import aufgebaut)
+_SEVERITY_COLORS = {
+    "hoch": "#DC2626",      # rot-600
+    "mittel": "#F59E0B",    # bernstein-500
+    "niedrig": "#10B981",   # smaragd-500
+    "kritisch": "#991B1B",  # rot-800
+    # Für Kompatibilität mit englischen Keys:
+    "high": "#DC2626",
+    "medium": "#F59E0B",
+    "low": "#10B981",
+    "critical": "#991B1B",
+}
+
+
 def get_severity_color(severity: str) -> str:
     """
     Ermittelt die Farbe für einen Schweregrad-Badge.
@@ -281,18 +306,11 @@ def get_severity_color(severity: str) -> str:
     Returns:
         str: Hex-Farbcode (z.B. "#DC2626" für rot)
     """
-    farben = {
-        "hoch": "#DC2626",      # rot-600
-        "mittel": "#F59E0B",    # bernstein-500
-        "niedrig": "#10B981",   # smaragd-500
-        "kritisch": "#991B1B",  # rot-800
-        # Für Kompatibilität mit englischen Keys:
-        "high": "#DC2626",
-        "medium": "#F59E0B",
-        "low": "#10B981",
-        "critical": "#991B1B",
-    }
-    return farben.get(severity.lower(), "#6B7280")  # Standard: Grau
+    # Schlüssel kommen fast immer schon kleingeschrieben; lower() nur bei Fehltreffer
+    color = _SEVERITY_COLORS.get(severity)
+    if color is not None:
+        return color
+    return _SEVERITY_COLORS.get(severity.lower(), "#6B7280")  # Standard: Grau
 
 
 def get_priority_color(priority: str) -> str:
@@ -326,6 +344,31 @@ def get_risk_color(risk_level: str) -> str:
     return get_severity_color(risk_level)
 
 
+# Farben je Status (einmal beim Import aufgebaut)
+_STATUS_COLORS = {
+    # Deutsch
+    "ausstehend": "#F59E0B",      # bernstein-500 (wartend)
+    "in_bearbeitung": "#3B82F6",  # blau-500 (aktiv)
+    "abgeschlossen": "#10B981",   # smaragd-500 (erfolgreich)
+    "akzeptiert": "#10B981",      # smaragd-500 (erfolgreich)
+    "abgelehnt": "#EF4444",       # rot-500 (negativ)
+    "betriebsbereit": "#10B981",  # smaragd-500 (operativ)
+    "wartung": "#F59E0B",         # bernstein-500 (wartend)
+    "kritisch": "#DC2626",        # rot-600 (kritisch)
+    "geplant": "#F59E0B",         # bernstein-500 (geplant)
+    # Englisch (Kompatibilität)
+    "pending": "#F59E0B",
+    "in_progress": "#3B82F6",
+    "completed": "#10B981",
+    "accepted": "#10B981",
+    "rejected": "#EF4444",
+    "operational": "#10B981",
+    "maintenance": "#F59E0B",
+    "critical": "#DC2626",
+    "planned": "#F59E0B",         # bernstein-500 (geplant)
+}
+
+
 def get_status_color(status: str) -> str:
     """
     Ermittelt die Farbe für einen Status-Badge.
@@ -342,29 +385,11 @@ def get_status_color(status: str) -> str:
     Returns:
         str: Hex-Farbcode
     """
-    farben = {
-        # Deutsch
-        "ausstehend": "#F59E0B",      # bernstein-500 (wartend)
-        "in_bearbeitung": "#3B82F6",  # blau-500 (aktiv)
-        "abgeschlossen": "#10B981",   # smaragd-500 (erfolgreich)
-        "akzeptiert": "#10B981",      # smaragd-500 (erfolgreich)
-        "abgelehnt": "#EF4444",       # rot-500 (negativ)
-        "betriebsbereit": "#10B981",  # smaragd-500 (operativ)
-        "wartung": "#F59E0B",         # bernstein-500 (wartend)
-        "kritisch": "#DC2626",        # rot-600 (kritisch)
-        "geplant": "#F59E0B",         # bernstein-500 (geplant)
-        # Englisch (Kompatibilität)
-        "pending": "#F59E0B",
-        "in_progress": "#3B82F6",
-        "completed": "#10B981",
-        "accepted": "#10B981",
-        "rejected": "#EF4444",
-        "operational": "#10B981",
-        "maintenance": "#F59E0B",
-        "critical": "#DC2626",
-        "planned": "#F59E0B",         # bernstein-500 (geplant)
-    }
-    return farben.get(status.lower(), "#6B7280")  # Standard: Grau
+    # Schlüssel kommen fast immer schon kleingeschrieben; lower() nur bei Fehltreffer
+    color = _STATUS_COLORS.get(status)
+    if color is not None:
+        return color
+    return _STATUS_COLORS.get(status.lower(), "#6B7280")  # Standard: Grau
 
 
 def calculate_inventory_status(current: int, min_threshold: int, max_capacity: int) -> Dict:
@@ -469,6 +494,7 @@ def calculate_capacity_status(utilization: float) -> Dict:
     }
 
 
+@lru_cache(maxsize=1024)
 def format_duration_minutes(minutes: int) -> str:
     """
     Formatiert eine Dauer in Minuten als lesbare Zeichenkette.
@@ -497,6 +523,34 @@ def format_duration_minutes(minutes: int) -> str:
         return f"{stunden} Std. {minuten} Min."
 
 
+# Abteilungs-Codes → deutsche Vollnamen (einmal beim Import aufgebaut)
+_DEPARTMENT_NAMES = {
+    # Waldkrankenhaus Erlangen - 9 Fachabteilungen + Notaufnahme
+    "ER": "Notaufnahme",
+    "ICU": "Klinik für Anästhesie und Intensivmedizin",
+    "Surgery": "Klinik für Allgemein- und Viszeralchirurgie",
+    "Cardiology": "Klinik für Kardiologie und Angiologie (Medizinische Klinik I)",
+    "Gastroenterology": "Klinik für Gastroenterologie und Onkologie (Medizinische Klinik II)",
+    "Geriatrics": "Klinik für Akutgeriatrie (Medizinische Klinik III / Geriatrie-Zentrum Erlangen)",
+    "Orthopedics": "Klinik für Orthopädie und Unfallchirurgie",
+    "Urology": "Klinik für Urologie",
+    "SpineCenter": "Interdisziplinäres Zentrum für Wirbelsäulen- und Skoliosetherapie",
+    "ENT": "Belegabteilung für Hals-, Nasen-, Ohrenheilkunde",
+    # Alte/alternative Bezeichnungen für Kompatibilität
+    "ED": "Notaufnahme",
+    "General Ward": "Allgemeinstation",
+    "Radiology": "Radiologie",
+    "Neurology": "Neurologie",
+    "Pediatrics": "Pädiatrie",
+    "Oncology": "Onkologie",
+    "Maternity": "Geburtshilfe",
+    "Logistics": "Logistik",
+    "Ward": "Station",
+    "Other": "Andere",
+    "N/A": "K/A",
+}
+
+
 def get_department_name_mapping() -> Dict[str, str]:
     """
     Gibt das zentrale Mapping aller Abteilungen des Waldkrankenhauses Erlangen zurück.
@@ -507,31 +561,8 @@ def get_department_name_mapping() -> Dict[str, str]:
     Returns:
         Dict[str, str]: Mapping von Abteilungs-Code zu deutschem Vollnamen
     """
-    return {
-        # Waldkrankenhaus Erlangen - 9 Fachabteilungen + Notaufnahme
-        "ER": "Notaufnahme",
-        "ICU": "Klinik für Anästhesie und Intensivmedizin",
-        "Surgery": "Klinik für Allgemein- und Viszeralchirurgie",
-        "Cardiology": "Klinik für Kardiologie und Angiologie (Medizinische Klinik I)",
-        "Gastroenterology": "Klinik für Gastroenterologie und Onkologie (Medizinische Klinik II)",
-        "Geriatrics": "Klinik für Akutgeriatrie (Medizinische Klinik III / Geriatrie-Zentrum Erlangen)",
-        "Orthopedics": "Klinik für Orthopädie und Unfallchirurgie",
-        "Urology": "Klinik für Urologie",
-        "SpineCenter": "Interdisziplinäres Zentrum für Wirbelsäulen- und Skoliosetherapie",
-        "ENT": "Belegabteilung für Hals-, Nasen-, Ohrenheilkunde",
-        # Alte/alternative Bezeichnungen für Kompatibilität
-        "ED": "Notaufnahme",
-        "General Ward": "Allgemeinstation",
-        "Radiology": "Radiologie",
-        "Neurology": "Neurologie",
-        "Pediatrics": "Pädiatrie",
-        "Oncology": "Onkologie",
-        "Maternity": "Geburtshilfe",
-        "Logistics": "Logistik",
-        "Ward": "Station",
-        "Other": "Andere",
-        "N/A": "K/A",
-    }
+    # Kopie, da einige Seiten das Mapping lokal ergänzen
+    return dict(_DEPARTMENT_NAMES)
 
 
 def get_department_display_name(dept_code: str) -> str:
@@ -544,8 +575,46 @@ def get_department_display_name(dept_code: str) -> str:
     Returns:
         str: Deutscher Vollname der Abteilung, oder der Code selbst falls nicht gefunden
     """
-    mapping = get_department_name_mapping()
-    return mapping.get(dept_code, dept_code)
+    return _DEPARTMENT_NAMES.get(dept_code, dept_code)
+
+
+# Farben je Abteilung (einmal beim Import aufgebaut)
+_DEPARTMENT_COLORS = {
+    # Waldkrankenhaus Erlangen Abteilungen (Codes)
+    "ER": "#EF4444",              # Notaufnahme (Rot)
+    "ED": "#EF4444",              # Notaufnahme (Rot) - Alternative
+    "ICU": "#DC2626",             # Anästhesie und Intensivmedizin (Dunkelrot)
+    "Surgery": "#3B82F6",         # Allgemein- und Viszeralchirurgie (Blau)
+    "Cardiology": "#8B5CF6",      # Kardiologie (Lila)
+    "Orthopedics": "#F59E0B",     # Orthopädie und Unfallchirurgie (Bernstein)
+    "Urology": "#06B6D4",         # Urologie (Cyan)
+    "Gastroenterology": "#10B981", # Gastroenterologie (Grün)
+    "Geriatrics": "#84CC16",      # Akutgeriatrie (Lime)
+    "SpineCenter": "#6366F1",     # Wirbelsäulen- und Skoliosetherapie (Indigo)
+    "ENT": "#EC4899",             # Hals-, Nasen-, Ohrenheilkunde (Pink) - NEU
+    "General Ward": "#10B981",    # Allgemeinstation (Grün)
+    # Deutsche Abteilungsnamen für Kompatibilität
+    "Notaufnahme": "#EF4444",
+    "Anästhesie und Intensivmedizin": "#DC2626",
+    "Intensivstation": "#DC2626",  # Alte Bezeichnung
+    "Allgemein- und Viszeralchirurgie": "#3B82F6",
+    "Chirurgie": "#3B82F6",        # Alte Bezeichnung
+    "Kardiologie": "#8B5CF6",
+    "Klinik für Kardiologie und Angiologie (Medizinische Klinik I)": "#8B5CF6",
+    "Orthopädie und Unfallchirurgie": "#F59E0B",
+    "Orthopädie": "#F59E0B",       # Alte Bezeichnung
+    "Urologie": "#06B6D4",
+    "Gastroenterologie": "#10B981",
+    "Klinik für Gastroenterologie und Onkologie (Medizinische Klinik II)": "#10B981",
+    "Akutgeriatrie": "#84CC16",
+    "Klinik für Akutgeriatrie (Medizinische Klinik III / Geriatrie-Zentrum Erlangen)": "#84CC16",
+    "Wirbelsäulen- und Skoliosetherapie": "#6366F1",
+    "Interdisziplinäres Zentrum für Wirbelsäulen- und Skoliosetherapie": "#6366F1",
+    "Belegabteilung für Hals-, Nasen-, Ohrenheilkunde": "#EC4899",
+    "Hals-, Nasen-, Ohrenheilkunde": "#EC4899",
+    "HNO": "#EC4899",
+    "Allgemeinstation": "#10B981",
+}
 
 
 def get_department_color(department: str) -> str:
@@ -561,43 +630,21 @@ def get_department_color(department: str) -> str:
     Returns:
         str: Hex-Farbcode für die Abteilung
     """
-    farben = {
-        # Waldkrankenhaus Erlangen Abteilungen (Codes)
-        "ER": "#EF4444",              # Notaufnahme (Rot)
-        "ED": "#EF4444",              # Notaufnahme (Rot) - Alternative
-        "ICU": "#DC2626",             # Anästhesie und Intensivmedizin (Dunkelrot)
-        "Surgery": "#3B82F6",         # Allgemein- und Viszeralchirurgie (Blau)
-        "Cardiology": "#8B5CF6",      # Kardiologie (Lila)
-        "Orthopedics": "#F59E0B",     # Orthopädie und Unfallchirurgie (Bernstein)
-        "Urology": "#06B6D4",         # Urologie (Cyan)
-        "Gastroenterology": "#10B981", # Gastroenterologie (Grün)
-        "Geriatrics": "#84CC16",      # Akutgeriatrie (Lime)
-        "SpineCenter": "#6366F1",     # Wirbelsäulen- und Skoliosetherapie (Indigo)
-        "ENT": "#EC4899",             # Hals-, Nasen-, Ohrenheilkunde (Pink) - NEU
-        "General Ward": "#10B981",    # Allgemeinstation (Grün)
-        # Deutsche Abteilungsnamen für Kompatibilität
-        "Notaufnahme": "#EF4444",
-        "Anästhesie und Intensivmedizin": "#DC2626",
-        "Intensivstation": "#DC2626",  # Alte Bezeichnung
-        "Allgemein- und Viszeralchirurgie": "#3B82F6",
-        "Chirurgie": "#3B82F6",        # Alte Bezeichnung
-        "Kardiologie": "#8B5CF6",
-        "Klinik für Kardiologie und Angiologie (Medizinische Klinik I)": "#8B5CF6",
-        "Orthopädie und Unfallchirurgie": "#F59E0B",
-        "Orthopädie": "#F59E0B",       # Alte Bezeichnung
-        "Urologie": "#06B6D4",
-        "Gastroenterologie": "#10B981",
-        "Klinik für Gastroenterologie und Onkologie (Medizinische Klinik II)": "#10B981",
-        "Akutgeriatrie": "#84CC16",
-        "Klinik für Akutgeriatrie (Medizinische Klinik III / Geriatrie-Zentrum Erlangen)": "#84CC16",
-        "Wirbelsäulen- und Skoliosetherapie": "#6366F1",
-        "Interdisziplinäres Zentrum für Wirbelsäulen- und Skoliosetherapie": "#6366F1",
-        "Belegabteilung für Hals-, Nasen-, Ohrenheilkunde": "#EC4899",
-        "Hals-, Nasen-, Ohrenheilkunde": "#EC4899",
-        "HNO": "#EC4899",
-        "Allgemeinstation": "#10B981",
-    }
-    return farben.get(department, "#6B7280")  # Standard: Grau für unbekannte Abteilungen
+    return _DEPARTMENT_COLORS.get(department, "#6B7280")  # Standard: Grau für unbekannte Abteilungen
+
+
+# Maximale Betriebsstunden je Gerätetyp (einmal beim Import aufgebaut)
+_MAX_USAGE_HOURS = {
+    'Beatmungsgerät': 4200,      # Kritische Ausrüstung: häufige Wartung
+    'Monitor': 6000,              # Standard-Monitore: längere Intervalle
+    'OP-Monitor': 6000,           # OP-Monitore: ähnlich wie Standard
+    'Defibrillator': 3000,        # Kritische Ausrüstung: häufige Wartung
+    'CT-Gerät': 5000,             # Bildgebung: mittlere Intervalle
+    'MRT-Gerät': 5500,            # Bildgebung: mittlere Intervalle
+    'Röntgengerät': 4000,         # Bildgebung: häufigere Wartung
+    'EKG-Gerät': 3000,            # Diagnostik: häufigere Wartung
+    'Ultraschallgerät': 3500,     # Bildgebung: häufigere Wartung
+}
 
 
 def get_max_usage_hours(device_type: str) -> int:
@@ -614,18 +661,34 @@ def get_max_usage_hours(device_type: str) -> int:
     Returns:
         int: Maximale Betriebsstunden vor Wartung (Standard: 4000)
     """
-    max_hours_mapping = {
-        'Beatmungsgerät': 4200,      # Kritische Ausrüstung: häufige Wartung
-        'Monitor': 6000,              # Standard-Monitore: längere Intervalle
-        'OP-Monitor': 6000,           # OP-Monitore: ähnlich wie Standard
-        'Defibrillator': 3000,        # Kritische Ausrüstung: häufige Wartung
-        'CT-Gerät': 5000,             # Bildgebung: mittlere Intervalle
-        'MRT-Gerät': 5500,            # Bildgebung: mittlere Intervalle
-        'Röntgengerät': 4000,         # Bildgebung: häufigere Wartung
-        'EKG-Gerät': 3000,            # Diagnostik: häufigere Wartung
-        'Ultraschallgerät': 3500,     # Bildgebung: häufigere Wartung
-    }
-    return max_hours_mapping.get(device_type, 4000)  # Default: 4000 Stunden
+    return _MAX_USAGE_HOURS.get(device_type, 4000)  # Default: 4000 Stunden
+
+
+# Wartungsdauern in Minuten je Gerätetyp (einmal beim Import aufgebaut).
+# Deutsche Bezeichnungen haben Vorrang vor den englischen Kategorien.
+_MAINTENANCE_DURATIONS = {
+    # Englische Bezeichnungen
+    'Imaging': 180,
+    'Life Support': 90,
+    'Emergency': 60,
+    'Monitoring': 60,
+    'Therapy': 90,
+    'Surgical': 120,
+    'Diagnostic': 90,
+    'Other': 60,
+    # Bildgebung - längere Wartung
+    'CT-Gerät': 240,  # 4 Stunden
+    'MRT-Gerät': 300,  # 5 Stunden
+    'Röntgengerät': 180,  # 3 Stunden
+    'Ultraschallgerät': 120,  # 2 Stunden
+    # Lebensunterstützung - kritisch, aber schnellere Wartung
+    'Beatmungsgerät': 90,  # 1.5 Stunden
+    'Defibrillator': 60,  # 1 Stunde
+    # Überwachung - kürzere Wartung
+    'Monitor': 60,  # 1 Stunde
+    'OP-Monitor': 60,  # 1 Stunde
+    'EKG-Gerät': 45,  # 45 Minuten
+}
 
 
 def get_maintenance_duration(device_type: str) -> int:
@@ -638,47 +701,24 @@ def get_maintenance_duration(device_type: str) -> int:
     Returns:
         Wartungsdauer in Minuten
     """
-    # Mapping für Wartungsdauern basierend auf Gerätetyp
-    duration_mapping = {
-        # Bildgebung - längere Wartung
-        'CT-Gerät': 240,  # 4 Stunden
-        'MRT-Gerät': 300,  # 5 Stunden
-        'Röntgengerät': 180,  # 3 Stunden
-        'Ultraschallgerät': 120,  # 2 Stunden
-        # Lebensunterstützung - kritisch, aber schnellere Wartung
-        'Beatmungsgerät': 90,  # 1.5 Stunden
-        'Defibrillator': 60,  # 1 Stunde
-        # Überwachung - kürzere Wartung
-        'Monitor': 60,  # 1 Stunde
-        'OP-Monitor': 60,  # 1 Stunde
-        'EKG-Gerät': 45,  # 45 Minuten
-        # Chirurgisch
-        'Surgical': 120,  # 2 Stunden
-        # Standard für unbekannte Typen
-    }
-    
-    # Prüfe auch englische Bezeichnungen
-    english_mapping = {
-        'Imaging': 180,
-        'Life Support': 90,
-        'Emergency': 60,
-        'Monitoring': 60,
-        'Therapy': 90,
-        'Surgical': 120,
-        'Diagnostic': 90,
-        'Other': 60,
-    }
-    
-    # Zuerst spezifische deutsche Bezeichnungen prüfen
-    if device_type in duration_mapping:
-        return duration_mapping[device_type]
-    
-    # Dann englische Bezeichnungen
-    if device_type in english_mapping:
-        return english_mapping[device_type]
-    
     # Default: 90 Minuten (1.5 Stunden)
-    return 90
+    return _MAINTENANCE_DURATIONS.get(device_type, 90)
+
+
+# Begründungen für Wartungsvorschläge (Dringlichkeit, Patientenlast, Timing)
+_SUGGESTION_REASONS = (
+    "Passt gut zum Fälligkeitsdatum",
+    "Niedrige erwartete Patientenlast",
+    "Gute Timing",
+)
+
+
+def _is_sqlite_timestamp(value: str) -> bool:
+    """Prüft, ob ein String exakt die Form 'YYYY-MM-DD HH:MM:SS' hat."""
+    return (
+        len(value) == 19 and value[4] == value[7] == '-' and value[10] == ' '
+        and value[13] == value[16] == ':'
+    )
 
 
 def suggest_maintenance_times(device: Dict, predictions: List[Dict], days_ahead: int = 30) -> List[Dict]:
@@ -694,13 +734,18 @@ def suggest_maintenance_times(device: Dict, predictions: List[Dict], days_ahead:
         Liste von vorgeschlagenen Zeitfenstern mit Score, sortiert nach Score (höchster zuerst)
         Jedes Element enthält: start_time, end_time, score, expected_patients, reason
     """
-    from datetime import datetime, timedelta, timezone
+    import numpy as np
     
     now = datetime.now(timezone.utc).replace(tzinfo=None)
     suggestions = []
     
+    # Gerätefelder einmal auslesen
+    urgency = (device.get('urgency_level') or '').lower()
+    next_due = device.get('next_maintenance_due')
+    device_type = device.get('device_type', '')
+    department = device.get('department', '')
+    
     # Bestimme Zeitfenster basierend auf Dringlichkeit
-    urgency = device.get('urgency_level', '').lower()
     if urgency in ['high', 'hoch']:
         max_days = 3
         min_days = 0
@@ -711,8 +756,7 @@ def suggest_maintenance_times(device: Dict, predictions: List[Dict], days_ahead:
         max_days = min(days_ahead, 30)
         min_days = 3
     
-    # Hole next_maintenance_due
-    next_due = device.get('next_maintenance_due')
+    # Fälligkeitsdatum auswerten
     next_due_date = None
     if next_due:
         try:
@@ -727,22 +771,15 @@ def suggest_maintenance_times(device: Dict, predictions: List[Dict], days_ahead:
                 days_until_due = (next_due_date - now.date()).days
             else:
                 days_until_due = None
-        except:
+        except (ValueError, TypeError, AttributeError):
             days_until_due = None
     else:
         days_until_due = None
     
     # Wartungsdauer
-    device_type = device.get('device_type', '')
     duration_minutes = get_maintenance_duration(device_type)
     duration_hours = duration_minutes / 60.0
     
-    # Abteilung des Geräts
-    department = device.get('department', '')
-    
-    # Filtere Vorhersagen für diese Abteilung
-    dept_predictions = [p for p in predictions if p.get('department') == department and p.get('prediction_type') == 'patient_arrival']
-    
     # Generiere Kandidaten-Zeiten in 3-Stunden-Schritten
     # Bevorzuge Zeiten außerhalb der Hauptarbeitszeit (weniger Patienten)
     # Ideal: 22:00-06:00 oder 12:00-14:00 (Mittagspause)
@@ -753,124 +790,148 @@ def suggest_maintenance_times(device: Dict, predictions: List[Dict], days_ahead:
     
     end_date = current_date + timedelta(days=max_days - min_days)
     
-    # Generiere Zeitfenster-Kandidaten
-    candidate_times = []
-    date = current_date
-    
-    while date <= end_date:
-        # Bevorzuge verschiedene Tageszeiten
-        time_slots = [
-            (2, 0),   # 02:00 - Nacht (sehr niedrige Patientenlast)
-            (6, 0),   # 06:00 - Früher Morgen
-            (12, 0),  # 12:00 - Mittagspause
-            (14, 0),  # 14:00 - Nachmittag
-            (22, 0),  # 22:00 - Später Abend
-        ]
-        
-        for hour, minute in time_slots:
-            candidate_time = date.replace(hour=hour, minute=minute)
-            if candidate_time > now:  # Nur zukünftige Zeiten
-                candidate_times.append(candidate_time)
-        
-        date += timedelta(days=1)
-    
-    # Bewerte jeden Kandidaten
-    for start_time in candidate_times:
-        end_time = start_time + timedelta(hours=duration_hours)
-        
-        # Berechne erwartete Patientenlast für dieses Zeitfenster
-        expected_patients = 0
-        prediction_count = 0
-        
-        # Finde relevante Vorhersagen für dieses Zeitfenster
-        for pred in dept_predictions:
-            pred_time = pred.get('timestamp')
-            if isinstance(pred_time, str):
-                try:
+    # Generiere Zeitfenster-Kandidaten (alle Tage × Tageszeiten auf einmal)
+    # Bevorzuge verschiedene Tageszeiten
+    slot_offsets = np.array([
+        2,    # 02:00 - Nacht (sehr niedrige Patientenlast)
+        6,    # 06:00 - Früher Morgen
+        12,   # 12:00 - Mittagspause
+        14,   # 14:00 - Nachmittag
+        22,   # 22:00 - Später Abend
+    ], dtype='timedelta64[h]')
+    days = np.arange(np.datetime64(current_date, 'D'), np.datetime64(end_date, 'D') + 1)
+    candidate_arr = (days[:, None] + slot_offsets[None, :]).ravel().astype('datetime64[us]')
+    # Nur zukünftige Zeiten
+    candidate_arr = candidate_arr[candidate_arr > np.datetime64(now, 'us')]
+    candidate_times = candidate_arr.tolist()
+    
+    # Vorhersagen dieser Abteilung in einem Durchlauf filtern und parsen
+    # (statt für jeden Kandidaten erneut) und als Arrays ablegen
+    pred_starts = []
+    pred_ends = []
+    pred_values = []
+    for pred in predictions:
+        if pred.get('department') != department or pred.get('prediction_type') != 'patient_arrival':
+            continue
+        pred_time = pred.get('timestamp')
+        if isinstance(pred_time, str):
+            try:
+                if _is_sqlite_timestamp(pred_time):
+                    # Häufigster Fall: direkt über den schnellen C-Parser
+                    pred_time = datetime.fromisoformat(pred_time)
+                else:
                     pred_time = datetime.strptime(pred_time, '%Y-%m-%d %H:%M:%S')
-                except:
-                    try:
-                        pred_time = datetime.strptime(pred_time, '%Y-%m-%d')
-                    except:
-                        continue
-            elif not isinstance(pred_time, datetime):
-                continue
-            
-            # Prüfe ob Vorhersage in unserem Zeitfenster liegt
-            time_horizon = pred.get('time_horizon_minutes', 15)
-            pred_end = pred_time + timedelta(minutes=time_horizon)
-            
-            # Überschneidung?
-            if (pred_time <= end_time and pred_end >= start_time):
-                expected_patients += pred.get('predicted_value', 0)
-                prediction_count += 1
-        
-        # Normalisiere auf Stunden (falls mehrere Vorhersagen)
-        if prediction_count > 0:
-            # Skaliere basierend auf Dauer
-            expected_patients = expected_patients * (duration_hours / (prediction_count * 0.25))  # 0.25 = 15min in Stunden
+            except ValueError:
+                try:
+                    pred_time = datetime.strptime(pred_time, '%Y-%m-%d')
+                except ValueError:
+                    continue
+        elif not isinstance(pred_time, datetime):
+            continue
         
-        # Score-Berechnung
-        # 1. Dringlichkeit (40%): Je näher am Fälligkeitsdatum, desto besser
-        urgency_score = 0.0
-        if days_until_due is not None and next_due_date:
-            days_diff = abs((start_time.date() - next_due_date).days)
-            if days_until_due < 0:  # Überfällig
-                urgency_score = 1.0 if days_diff <= 1 else max(0.7, 1.0 - (days_diff / 7))
-            elif days_until_due <= 3:
-                urgency_score = max(0.8, 1.0 - (days_diff / 5))
-            elif days_until_due <= 7:
-                urgency_score = max(0.6, 1.0 - (days_diff / 10))
-            else:
-                urgency_score = max(0.4, 1.0 - (days_diff / 20))
+        time_horizon = pred.get('time_horizon_minutes', 15)
+        pred_starts.append(pred_time)
+        pred_ends.append(pred_time + timedelta(minutes=time_horizon))
+        pred_values.append(pred.get('predicted_value', 0))
+    
+    # Nach Startzeit sortiert, damit jedes Zeitfenster nur einen zusammenhängenden
+    # Bereich von Vorhersagen betrifft
+    pred_start_arr = np.array(pred_starts, dtype='datetime64[us]')
+    order = np.argsort(pred_start_arr, kind='stable')
+    pred_start_arr = pred_start_arr[order]
+    pred_end_arr = np.array(pred_ends, dtype='datetime64[us]')[order]
+    pred_value_arr = np.array(pred_values, dtype=np.float64)[order]
+    
+    # Bereich [lo, hi) je Kandidat per Binärsuche: hi = erste Vorhersage, die nach
+    # dem Fensterende beginnt; lo über das laufende Maximum der Endzeiten, da diese
+    # nicht monoton sein müssen
+    duration = timedelta(hours=duration_hours)
+    end_arr = candidate_arr + np.timedelta64(duration)
+    hi = np.searchsorted(pred_start_arr, end_arr, side='right')
+    lo = np.searchsorted(np.maximum.accumulate(pred_end_arr), candidate_arr, side='left') if len(pred_end_arr) else hi
+    lo = np.minimum(lo, hi)
+    
+    # Überschneidungen nur innerhalb der Bereiche prüfen (Kandidaten × breitester Bereich)
+    width = int((hi - lo).max()) if len(hi) else 0
+    idx = lo[:, None] + np.arange(width)[None, :]
+    in_range = idx < hi[:, None]
+    idx = np.where(in_range, idx, 0)
+    overlap = in_range & (pred_end_arr[idx] >= candidate_arr[:, None]) if width else np.zeros((len(hi), 0), dtype=bool)
+    count_arr = overlap.sum(axis=1).tolist()
+    patients_arr = np.where(overlap, pred_value_arr[idx], 0.0).sum(axis=1).tolist() if width else [0.0] * len(hi)
+    
+    # Bewerte alle Kandidaten gemeinsam (gleiche Rechenschritte wie pro Kandidat, als Arrays)
+    count_arr = np.asarray(count_arr)
+    patients = np.asarray(patients_arr, dtype=np.float64)
+    
+    # Normalisiere auf Stunden (falls mehrere Vorhersagen)
+    # Skaliere basierend auf Dauer (0.25 = 15min in Stunden)
+    has_predictions = count_arr > 0
+    patients[has_predictions] = patients[has_predictions] * (duration_hours / (count_arr[has_predictions] * 0.25))
+    
+    start_days = candidate_arr.astype('datetime64[D]')
+    
+    # Score-Berechnung
+    # 1. Dringlichkeit (40%): Je näher am Fälligkeitsdatum, desto besser
+    if days_until_due is not None and next_due_date:
+        days_diff = np.abs((start_days - np.datetime64(next_due_date, 'D')).astype(np.int64))
+        if days_until_due < 0:  # Überfällig
+            urgency_scores = np.where(days_diff <= 1, 1.0, np.maximum(0.7, 1.0 - (days_diff / 7)))
+        elif days_until_due <= 3:
+            urgency_scores = np.maximum(0.8, 1.0 - (days_diff / 5))
+        elif days_until_due <= 7:
+            urgency_scores = np.maximum(0.6, 1.0 - (days_diff / 10))
         else:
-            urgency_score = 0.5  # Neutral wenn kein Fälligkeitsdatum
-        
-        # 2. Patientenlast (40%): Niedrigere Last = besser
-        # Normalisiere auf 0-1 (0 Patienten = 1.0, 10+ Patienten = 0.0)
-        patient_score = max(0.0, min(1.0, 1.0 - (expected_patients / 10.0)))
-        
-        # 3. Zeit bis Fälligkeit (20%): Je näher, desto besser (aber nicht überfällig)
-        time_score = 0.5
-        if days_until_due is not None:
-            days_to_start = (start_time.date() - now.date()).days
-            if days_until_due < 0:  # Überfällig - sofort ist am besten
-                time_score = 1.0 if days_to_start <= 1 else 0.8
-            elif days_until_due <= 3:
-                time_score = 1.0 if days_to_start <= days_until_due else 0.7
-            elif days_until_due <= 7:
-                time_score = 0.9 if days_to_start <= days_until_due else 0.6
-            else:
-                time_score = 0.8 if days_to_start <= days_until_due else 0.5
-        
-        # Gesamt-Score (gewichtet)
-        total_score = (urgency_score * 0.4) + (patient_score * 0.4) + (time_score * 0.2)
-        
+            urgency_scores = np.maximum(0.4, 1.0 - (days_diff / 20))
+    else:
+        urgency_scores = np.full(len(start_days), 0.5)  # Neutral wenn kein Fälligkeitsdatum
+    
+    # 2. Patientenlast (40%): Niedrigere Last = besser
+    # Normalisiere auf 0-1 (0 Patienten = 1.0, 10+ Patienten = 0.0)
+    patient_scores = np.clip(1.0 - (patients / 10.0), 0.0, 1.0)
+    
+    # 3. Zeit bis Fälligkeit (20%): Je näher, desto besser (aber nicht überfällig)
+    if days_until_due is not None:
+        days_to_start = (start_days - np.datetime64(now.date(), 'D')).astype(np.int64)
+        if days_until_due < 0:  # Überfällig - sofort ist am besten
+            time_scores = np.where(days_to_start <= 1, 1.0, 0.8)
+        elif days_until_due <= 3:
+            time_scores = np.where(days_to_start <= days_until_due, 1.0, 0.7)
+        elif days_until_due <= 7:
+            time_scores = np.where(days_to_start <= days_until_due, 0.9, 0.6)
+        else:
+            time_scores = np.where(days_to_start <= days_until_due, 0.8, 0.5)
+    else:
+        time_scores = np.full(len(start_days), 0.5)
+    
+    # Gesamt-Score (gewichtet)
+    total_scores = (urgency_scores * 0.4) + (patient_scores * 0.4) + (time_scores * 0.2)
+    
+    # Sortiere nach Score (höchster zuerst, stabil: bei Gleichstand frühere Zeit zuerst)
+    # und baue nur für die Top 10 Ergebnis-Dicts und Begründungen
+    scores = [round(score, 2) for score in total_scores.tolist()]
+    top = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:10]
+    patients = patients.tolist()
+    flags = ((urgency_scores > 0.7), (patient_scores > 0.7), (time_scores > 0.7))
+    
+    for i in top:
         # Grund für Vorschlag
-        reasons = []
-        if urgency_score > 0.7:
-            reasons.append("Passt gut zum Fälligkeitsdatum")
-        if patient_score > 0.7:
-            reasons.append("Niedrige erwartete Patientenlast")
-        if time_score > 0.7:
-            reasons.append("Gute Timing")
-        
-        reason_text = "; ".join(reasons) if reasons else "Geeignete Zeit"
+        reason_text = "; ".join(
+            text for text, flag in zip(_SUGGESTION_REASONS, flags) if flag[i]
+        ) or "Geeignete Zeit"
         
+        start_time = candidate_times[i]
         suggestions.append({
             'start_time': start_time,
-            'end_time': end_time,
-            'score': round(total_score, 2),
-            'expected_patients': round(expected_patients, 1),
+            'end_time': start_time + duration,
+            'score': scores[i],
+            'expected_patients': round(patients[i], 1),
             'reason': reason_text,
             'duration_minutes': duration_minutes
         })
     
-    # Sortiere nach Score (höchster zuerst)
-    suggestions.sort(key=lambda x: x['score'], reverse=True)
-    
     # Gib Top 10 zurück
-    return suggestions[:10]
+    return suggestions
 
 
 def calculate_device_urgency(days_until_maintenance: int, usage_hours: int, max_usage_hours: int) -> str:
@@ -896,11 +957,12 @@ def calculate_device_urgency(days_until_maintenance: int, usage_hours: int, max_
     
     # Berechne Dringlichkeit basierend auf Betriebsstunden
     if max_usage_hours > 0:
-        hours_percentage = (usage_hours / max_usage_hours) * 100
+        # Prozentvergleich ohne Division: usage/max*100 >= p  <=>  usage*100 >= max*p
+        usage_scaled = usage_hours * 100
         hours_urgency = "niedrig"
-        if hours_percentage >= 95:  # >= 95% = hoch
+        if usage_scaled >= max_usage_hours * 95:  # >= 95% = hoch
             hours_urgency = "hoch"
-        elif hours_percentage >= 85:  # >= 85% = mittel
+        elif usage_scaled >= max_usage_hours * 85:  # >= 85% = mittel
             hours_urgency = "mittel"
     else:
         hours_urgency = "niedrig"
@@ -936,9 +998,9 @@ def calculate_metric_severity(value: float, thresholds: dict) -> tuple[str, str]
 
 def get_metric_severity_for_load(load_percent: float) -> tuple[str, str]:
     """Gibt den Schweregrad für Auslastungsmetriken (0-100%) zurück"""
-    if load_percent >= 90:
+    if load_percent >= LOAD_THRESHOLDS['critical']:
         return 'hoch', 'Kritisch'
-    elif load_percent >= 75:
+    elif load_percent >= LOAD_THRESHOLDS['watch']:
         return 'mittel', 'Beobachten'
     else:
         return 'niedrig', 'Stabil'
@@ -985,18 +1047,36 @@ def calculate_explanation_score(trend_strength: float, data_points: int, confide
         return "niedrig"
 
 
+# Farben je Erklärungsscore (einmal beim Import aufgebaut)
+_SCORE_COLORS = {
+    "hoch": "#10B981",    # smaragd-500
+    "mittel": "#F59E0B",  # bernstein-500
+    "niedrig": "#6B7280", # grau-500
+    # Für Kompatibilität mit englischen Keys:
+    "high": "#10B981",
+    "medium": "#F59E0B",
+    "low": "#6B7280",
+}
+
+
 def get_explanation_score_color(score: str) -> str:
     """Farbe für Erklärungsscore-Badge ermitteln"""
-    farben = {
-        "hoch": "#10B981",    # smaragd-500
-        "mittel": "#F59E0B",  # bernstein-500
-        "niedrig": "#6B7280", # grau-500
-        # Für Kompatibilität mit englischen Keys:
-        "high": "#10B981",
-        "medium": "#F59E0B",
-        "low": "#6B7280",
-    }
-    return farben.get(score.lower(), "#6B7280")
+    # Schlüssel kommen fast immer schon kleingeschrieben; lower() nur bei Fehltreffer
+    color = _SCORE_COLORS.get(score)
+    if color is not None:
+        return color
+    return _SCORE_COLORS.get(score.lower(), "#6B7280")
+
+
+# Spannen des Tageszeit-Multiplikators für Patientenzugänge je Stunde (0-23):
+# Nachmittag (14-18 Uhr) mehr, Vormittag (8-12) normal, Nacht (0-6) weniger
+_ARRIVAL_HOUR_RANGES = tuple(
+    (1.1, 1.3) if 14 <= hour <= 18 else
+    (0.9, 1.1) if 8 <= hour <= 12 else
+    (0.6, 0.8) if hour <= 6 else
+    (0.8, 1.0)
+    for hour in range(24)
+)
 
 
 def calculate_patient_arrival_prediction(
@@ -1004,7 +1084,8 @@ def calculate_patient_arrival_prediction(
     time_horizon_minutes: int,
     trend: float = 0.0,
     has_active_surge: bool = False,
-    historical_arrivals: List[Dict] = None
+    historical_arrivals: List[Dict] = None,
+    now: Optional[datetime] = None
 ) -> tuple[float, float]:
     """
     Berechne Vorhersage für Patientenzugang basierend auf aktuellen Daten.
@@ -1015,6 +1096,8 @@ def calculate_patient_arrival_prediction(
         trend: Trend-Richtung (-1 bis 1, von Simulation)
         has_active_surge: Ob ein aktives Surge-Event läuft
         historical_arrivals: Historische Patientenzugänge (optional)
+        now: Referenzzeit für das Tageszeit-Muster (optional, z.B. einmal pro
+             Durchlauf für alle Zeithorizonte ermittelt; Standard: datetime.now())
     
     Returns:
         tuple: (predicted_count, confidence)
@@ -1038,23 +1121,22 @@ def calculate_patient_arrival_prediction(
         base_prediction *= surge_multiplier
     
     # Tageszeit-Muster: Mehr Ankünfte am Nachmittag (14-18 Uhr)
-    current_hour = datetime.now().hour
-    if 14 <= current_hour <= 18:
-        time_multiplier = random.uniform(1.1, 1.3)
-    elif 8 <= current_hour <= 12:
-        time_multiplier = random.uniform(0.9, 1.1)
-    elif 0 <= current_hour <= 6:
-        time_multiplier = random.uniform(0.6, 0.8)
-    else:
-        time_multiplier = random.uniform(0.8, 1.0)
+    current_hour = (now or datetime.now()).hour
+    time_multiplier = random.uniform(*_ARRIVAL_HOUR_RANGES[current_hour])
     base_prediction *= time_multiplier
     
     # Historische Daten berücksichtigen (falls verfügbar)
     if historical_arrivals:
-        # Berechne Durchschnitt der letzten Stunde
-        recent_arrivals = [a for a in historical_arrivals if a.get('value', 0) > 0]
-        if recent_arrivals:
-            avg_recent = sum(a['value'] for a in recent_arrivals) / len(recent_arrivals)
+        # Berechne Durchschnitt der letzten Stunde (nur positive Werte, in einem Durchlauf)
+        recent_total = 0
+        recent_count = 0
+        for arrival in historical_arrivals:
+            value = arrival.get('value', 0)
+            if value > 0:
+                recent_total += value
+                recent_count += 1
+        if recent_count:
+            avg_recent = recent_total / recent_count
             # Kombiniere Basis-Vorhersage mit historischem Durchschnitt (gewichteter Durchschnitt)
             base_prediction = (base_prediction * 0.6) + (avg_recent * 0.4)
     
@@ -1138,13 +1220,33 @@ def calculate_bed_demand_prediction(
     return round(predicted_utilization_percent, 1), confidence
 
 
+def build_capacity_index(capacity_data: List[Dict]) -> Dict[str, Dict]:
+    """
+    Baut einen Index Abteilung -> Kapazitätsdaten für calculate_daily_consumption_from_activity.
+    
+    Einmal pro Durchlauf über das Inventar aufbauen und als capacity_index übergeben.
+    Bei doppelten Abteilungen gilt (wie bei der linearen Suche) der erste Eintrag.
+    
+    Args:
+        capacity_data: Liste von Kapazitätsdaten pro Abteilung
+    
+    Returns:
+        Dict mit department -> Kapazitätsdaten
+    """
+    index = {}
+    for row in capacity_data or []:
+        index.setdefault(row.get('department'), row)
+    return index
+
+
 def calculate_daily_consumption_from_activity(
     item: Dict,
     ed_load: float,
     beds_occupied: int = 0,
     capacity_data: List[Dict] = None,
     operations_count: int = 0,
-    operations_consumption: Dict[str, float] = None
+    operations_consumption: Dict[str, float] = None,
+    capacity_index: Dict[str, Dict] = None
 ) -> float:
     """
     Berechne täglichen Verbrauch basierend auf Krankenhausaktivität.
@@ -1156,12 +1258,17 @@ def calculate_daily_consumption_from_activity(
         capacity_data: Liste von Kapazitätsdaten pro Abteilung
         operations_count: Anzahl abgeschlossener Operationen in der Abteilung (pro Tag/Tagesschnitt)
         operations_consumption: Dict mit item_name -> consumption_amount von Operationen (optional)
+        capacity_index: Vorberechneter Index Abteilung -> Kapazitätsdaten aus
+                        build_capacity_index (optional, ersetzt die Suche in capacity_data
+                        bei Aufrufen für viele Artikel)
     
     Returns:
         Täglicher Verbrauch als float
     """
     # Basis-Verbrauchsrate basierend auf Artikel-Typ und Mindestbestand
-    item_name = item.get('item_name', '').lower()
+    item_name = item.get('item_name', '')
+    # Kleinschreibung einmal berechnen (für alle Artikel-Typ-Prüfungen)
+    name_lower = item_name.lower()
     department = item.get('department', '')
     min_threshold = item.get('min_threshold', 10)
     
@@ -1169,13 +1276,13 @@ def calculate_daily_consumption_from_activity(
     base_consumption = 1.0
     
     # Bestimme Basis-Verbrauch basierend auf Artikel-Typ
-    if 'sauerstoff' in item_name or 'oxygen' in item_name:
+    if 'sauerstoff' in name_lower or 'oxygen' in name_lower:
         base_consumption = min_threshold * 0.15  # 15% des Mindestbestands pro Tag
-    elif 'infusion' in item_name:
+    elif 'infusion' in name_lower:
         base_consumption = min_threshold * 0.20  # 20% pro Tag
-    elif 'maske' in item_name or 'mask' in item_name:
+    elif 'maske' in name_lower or 'mask' in name_lower:
         base_consumption = min_threshold * 0.10  # 10% pro Tag
-    elif 'filter' in item_name:
+    elif 'filter' in name_lower:
         base_consumption = min_threshold * 0.12  # 12% pro Tag
     else:
         # Standard: 10% des Mindestbestands pro Tag
@@ -1187,9 +1294,12 @@ def calculate_daily_consumption_from_activity(
     
     # Bettenauslastung Multiplikator (0.7-1.3x)
     # Berechne Bettenauslastung wenn nicht gegeben
-    if beds_occupied == 0 and capacity_data:
-        # Finde Abteilung in capacity_data
-        dept_capacity = next((c for c in capacity_data if c.get('department') == department), None)
+    if beds_occupied == 0 and (capacity_index or capacity_data):
+        # Finde Abteilung (Index-Lookup statt linearer Suche, falls vorhanden)
+        if capacity_index is not None:
+            dept_capacity = capacity_index.get(department)
+        else:
+            dept_capacity = next((c for c in capacity_data if c.get('department') == department), None)
         if dept_capacity:
             total_beds = dept_capacity.get('total_beds', 0)
             occupied = dept_capacity.get('occupied_beds', 0)
@@ -1223,23 +1333,22 @@ def calculate_daily_consumption_from_activity(
     
     # Operations-basierter Verbrauch
     operations_consumption_amount = 0.0
-    item_name = item.get('item_name', '')
     if operations_consumption and item_name in operations_consumption:
         # Direkter Verbrauch aus Operationen (bereits berechnet)
         operations_consumption_amount = operations_consumption[item_name] * operations_count
     elif operations_count > 0:
         # Schätze Operations-Verbrauch basierend auf Artikel-Typ
-        if 'maske' in item_name.lower() or 'mask' in item_name.lower():
+        if 'maske' in name_lower or 'mask' in name_lower:
             operations_consumption_amount = operations_count * random.uniform(2.0, 5.0)
-        elif 'handschuh' in item_name.lower():
+        elif 'handschuh' in name_lower:
             operations_consumption_amount = operations_count * random.uniform(8.0, 15.0)
-        elif 'verband' in item_name.lower() or 'kompresse' in item_name.lower():
+        elif 'verband' in name_lower or 'kompresse' in name_lower:
             operations_consumption_amount = operations_count * random.uniform(3.0, 8.0)
-        elif 'kittel' in item_name.lower():
+        elif 'kittel' in name_lower:
             operations_consumption_amount = operations_count * random.uniform(1.0, 2.0)
-        elif 'naht' in item_name.lower():
+        elif 'naht' in name_lower:
             operations_consumption_amount = operations_count * random.uniform(1.0, 3.0)
-        elif 'tuch' in item_name.lower():
+        elif 'tuch' in name_lower:
             operations_consumption_amount = operations_count * random.uniform(3.0, 8.0)
     
     # Kombinierte Berechnung: Basis-Verbrauch + Operations-Verbrauch
@@ -1250,6 +1359,15 @@ def calculate_daily_consumption_from_activity(
     return max(1.0, round(daily_consumption, 2))
 
 
+# Basis-Materialien für jede Operation (Material, Basismenge)
+_OPERATION_BASE_MATERIALS = (
+    ('OP-Masken', 2.0),  # 2-5 Masken pro OP
+    ('OP-Handschuhe', 8.0),  # 8-15 Paare pro OP
+    ('OP-Tücher', 3.0),  # 3-8 Tücher
+    ('Desinfektionsmittel', 0.5),  # Liter
+)
+
+
 def calculate_operation_consumption(
     operation_type: str,
     department: str,
@@ -1268,30 +1386,22 @@ def calculate_operation_consumption(
     """
     consumption = {}
     
-    # Basis-Materialien für jede Operation
-    base_materials = {
-        'OP-Masken': 2.0,  # 2-5 Masken pro OP
-        'OP-Handschuhe': 8.0,  # 8-15 Paare pro OP
-        'OP-Tücher': 3.0,  # 3-8 Tücher
-        'Desinfektionsmittel': 0.5,  # Liter
-    }
-    
     # Kleine Operationen (unter 60 Min)
     if duration_minutes < 60:
-        for material, base_amount in base_materials.items():
+        for material, base_amount in _OPERATION_BASE_MATERIALS:
             consumption[material] = base_amount * random.uniform(0.7, 1.0)
         consumption['Wundverbände'] = random.uniform(2.0, 4.0)
         consumption['Sterile Kompressen'] = random.uniform(2.0, 5.0)
     # Mittlere Operationen (60-120 Min)
     elif duration_minutes < 120:
-        for material, base_amount in base_materials.items():
+        for material, base_amount in _OPERATION_BASE_MATERIALS:
             consumption[material] = base_amount * random.uniform(1.0, 1.5)
         consumption['Wundverbände'] = random.uniform(4.0, 8.0)
         consumption['Sterile Kompressen'] = random.uniform(5.0, 10.0)
         consumption['Nahtmaterial'] = random.uniform(1.0, 2.0)
     # Große Operationen (über 120 Min)
     else:
-        for material, base_amount in base_materials.items():
+        for material, base_amount in _OPERATION_BASE_MATERIALS:
             consumption[material] = base_amount * random.uniform(1.5, 2.5)
         consumption['Wundverbände'] = random.uniform(8.0, 15.0)
         consumption['Sterile Kompressen'] = random.uniform(10.0, 20.0)
@@ -1299,12 +1409,13 @@ def calculate_operation_consumption(
     
     # Abteilungs-spezifische Materialien
     dept_lower = department.lower()
+    op_lower = operation_type.lower()
     if 'chirurgie' in dept_lower:
         consumption['OP-Kittel'] = random.uniform(1.0, 2.0)
-        if 'darm' in operation_type.lower() or 'resektion' in operation_type.lower():
+        if 'darm' in op_lower or 'resektion' in op_lower:
             consumption['Drainagen'] = random.uniform(1.0, 3.0)
     elif 'orthopädie' in dept_lower:
-        if 'gelenk' in operation_type.lower() or 'bruch' in operation_type.lower():
+        if 'gelenk' in op_lower or 'bruch' in op_lower:
             consumption['Gipsbinden'] = random.uniform(2.0, 5.0)
             consumption['Schienen'] = random.uniform(0.0, 1.0)
     elif 'urologie' in dept_lower:
@@ -1346,7 +1457,8 @@ def calculate_reorder_suggestion(
     daily_consumption_rate: float,
     days_until_stockout: Optional[float],
     safety_buffer_days: int = 2,
-    delivery_time_days: int = 1
+    delivery_time_days: int = 1,
+    now_date: Optional[date] = None
 ) -> Dict:
     """
     Berechne Nachfüllvorschlag mit Menge und Bestelltermin.
@@ -1357,6 +1469,8 @@ def calculate_reorder_suggestion(
         days_until_stockout: Tage bis Engpass (None wenn kein Engpass)
         safety_buffer_days: Sicherheitspuffer in Tagen (Standard: 2)
         delivery_time_days: Lieferzeit in Tagen (Standard: 1)
+        now_date: Heutiges Datum (optional, bei Aufrufen für viele Artikel einmal
+                  ermitteln und übergeben; Standard: datetime.now().date())
     
     Returns:
         Dict mit 'suggested_qty', 'order_by_date', 'order_by_days', 'priority', 'reasoning'
@@ -1413,10 +1527,9 @@ def calculate_reorder_suggestion(
         suggested_qty = min(suggested_qty, max_capacity)
     
     # Berechne Bestelltermin (Datum)
-    from datetime import datetime, timedelta
     if order_by_days is not None:
-        order_by_date = (datetime.now() + timedelta(days=order_by_days)).date()
-        order_by_date_str = order_by_date.strftime('%Y-%m-%d')
+        order_by_date = (now_date or datetime.now().date()) + timedelta(days=order_by_days)
+        order_by_date_str = order_by_date.isoformat()  # 'YYYY-MM-DD'
     else:
         order_by_date_str = None
     